@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import models and config
 from app.db.base import Base
-from app.models import Order, Shipment
+from app import models  # noqa: F401  (registers every model on Base.metadata)
 from app.config import settings
 
 # this is the Alembic Config object
@@ -0,0 +1,57 @@
+"""Add fulfilment pipeline tables
+
+Revision ID: 5b1f0c7d2a41
+Revises: e639b1acaa0c
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c7d2a41'
+down_revision: Union[str, None] = 'e639b1acaa0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fulfilment_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('courier_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fulfilment_batches_id'), 'fulfilment_batches', ['id'], unique=False)
+    op.create_table('fulfilment_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('shipment_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('stage', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['batch_id'], ['fulfilment_batches.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fulfilment_items_batch_id'), 'fulfilment_items', ['batch_id'], unique=False)
+    op.create_index(op.f('ix_fulfilment_items_id'), 'fulfilment_items', ['id'], unique=False)
+    op.create_index(op.f('ix_fulfilment_items_status'), 'fulfilment_items', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_fulfilment_items_status'), table_name='fulfilment_items')
+    op.drop_index(op.f('ix_fulfilment_items_id'), table_name='fulfilment_items')
+    op.drop_index(op.f('ix_fulfilment_items_batch_id'), table_name='fulfilment_items')
+    op.drop_table('fulfilment_items')
+    op.drop_index(op.f('ix_fulfilment_batches_id'), table_name='fulfilment_batches')
+    op.drop_table('fulfilment_batches')
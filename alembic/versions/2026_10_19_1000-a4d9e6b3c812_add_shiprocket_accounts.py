@@ -0,0 +1,44 @@
+"""Add per-merchant Shiprocket accounts
+
+Revision ID: a4d9e6b3c812
+Revises: 8c3e2f917b05
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d9e6b3c812'
+down_revision: Union[str, None] = '8c3e2f917b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('shiprocket_accounts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('max_concurrency', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shiprocket_accounts_id'), 'shiprocket_accounts', ['id'], unique=False)
+    op.create_index(op.f('ix_shiprocket_accounts_tenant_id'), 'shiprocket_accounts', ['tenant_id'], unique=True)
+    op.add_column('orders', sa.Column('tenant_id', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_orders_tenant_id'), 'orders', ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_orders_tenant_id'), table_name='orders')
+    op.drop_column('orders', 'tenant_id')
+    op.drop_index(op.f('ix_shiprocket_accounts_tenant_id'), table_name='shiprocket_accounts')
+    op.drop_index(op.f('ix_shiprocket_accounts_id'), table_name='shiprocket_accounts')
+    op.drop_table('shiprocket_accounts')
@@ -0,0 +1,139 @@
+"""Partition orders and shipments by created_at
+
+Revision ID: c7f2a91d4e60
+Revises: a4d9e6b3c812
+Create Date: 2026-10-19 10:30:00.000000
+
+Converts ``orders`` and ``shipments`` into tables range-partitioned by month
+on ``created_at``. Postgres requires the partition key in every unique
+constraint of a partitioned table, which has two consequences:
+
+* primary keys become ``(id, created_at)`` and foreign keys that pointed at
+  ``orders.id`` / ``shipments.id`` are dropped (the ORM relationships keep
+  working, cascades are done by the ORM);
+* global uniqueness of the client-supplied ``orders.order_id`` is kept by
+  the ``order_id_registry`` table, filled by an insert trigger. Upstream
+  issued ``shiprocket_shipment_id`` and ``awb_code`` keep plain indexes.
+
+Existing rows are copied into monthly partitions, and a DEFAULT partition
+catches anything outside the pre-created range.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2a91d4e60'
+down_revision: Union[str, None] = 'a4d9e6b3c812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_partitions(table: str) -> None:
+    """Create monthly partitions covering existing rows and a few months ahead."""
+    conn = op.get_bind()
+    oldest = conn.execute(sa.text(f"SELECT min(created_at) FROM {table}_unpartitioned")).scalar()
+    start = (oldest.date() if oldest else date.today()).replace(day=1)
+    end = _add_months(date.today().replace(day=1), MONTHS_AHEAD + 1)
+
+    month = start
+    while month < end:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _partition(table: str) -> None:
+    """Swap ``table`` for a partitioned copy holding the same rows."""
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (created_at)"
+    )
+    _create_partitions(table)
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"DROP TABLE {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+
+
+def _unpartition(table: str) -> None:
+    """Swap a partitioned ``table`` back for a plain table."""
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+
+
+def upgrade() -> None:
+    op.drop_constraint('fulfilment_items_order_id_fkey', 'fulfilment_items', type_='foreignkey')
+    op.drop_constraint('fulfilment_items_shipment_id_fkey', 'fulfilment_items', type_='foreignkey')
+    op.drop_constraint('shipments_order_id_fkey', 'shipments', type_='foreignkey')
+
+    # Global order_id uniqueness, independent of partitions
+    op.create_table('order_id_registry',
+    sa.Column('order_id', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+    op.execute("INSERT INTO order_id_registry (order_id) SELECT order_id FROM orders")
+
+    _partition('orders')
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_order_id'), 'orders', ['order_id'], unique=False)
+    op.create_index(op.f('ix_orders_tenant_id'), 'orders', ['tenant_id'], unique=False)
+    op.execute("""
+        CREATE FUNCTION register_order_id() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO order_id_registry (order_id) VALUES (NEW.order_id);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER orders_register_order_id
+        BEFORE INSERT ON orders
+        FOR EACH ROW EXECUTE FUNCTION register_order_id()
+    """)
+
+    _partition('shipments')
+    op.create_index(op.f('ix_shipments_id'), 'shipments', ['id'], unique=False)
+    op.create_index(op.f('ix_shipments_awb_code'), 'shipments', ['awb_code'], unique=False)
+    op.create_index('ix_shipments_shiprocket_shipment_id', 'shipments', ['shiprocket_shipment_id'], unique=False)
+    op.create_index('ix_shipments_order_id', 'shipments', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    _unpartition('shipments')
+    op.create_index(op.f('ix_shipments_id'), 'shipments', ['id'], unique=False)
+    op.create_index(op.f('ix_shipments_awb_code'), 'shipments', ['awb_code'], unique=True)
+    op.create_unique_constraint('shipments_shiprocket_shipment_id_key', 'shipments', ['shiprocket_shipment_id'])
+
+    op.execute("DROP TRIGGER IF EXISTS orders_register_order_id ON orders")
+    op.execute("DROP FUNCTION IF EXISTS register_order_id()")
+    _unpartition('orders')
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_order_id'), 'orders', ['order_id'], unique=True)
+    op.create_index(op.f('ix_orders_tenant_id'), 'orders', ['tenant_id'], unique=False)
+    op.drop_table('order_id_registry')
+
+    op.create_foreign_key('shipments_order_id_fkey', 'shipments', 'orders', ['order_id'], ['id'])
+    op.create_foreign_key('fulfilment_items_shipment_id_fkey', 'fulfilment_items', 'shipments', ['shipment_id'], ['id'])
+    op.create_foreign_key('fulfilment_items_order_id_fkey', 'fulfilment_items', 'orders', ['order_id'], ['id'])
@@ -0,0 +1,44 @@
+"""Add shipment analytics summary tables
+
+Revision ID: d18b5e0f3a27
+Revises: c7f2a91d4e60
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd18b5e0f3a27'
+down_revision: Union[str, None] = 'c7f2a91d4e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('courier_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('courier_name', sa.String(length=100), nullable=False),
+    sa.Column('lane', sa.String(length=300), nullable=False),
+    sa.Column('shipments', sa.Integer(), nullable=False),
+    sa.Column('delivered', sa.Integer(), nullable=False),
+    sa.Column('rto', sa.Integer(), nullable=False),
+    sa.Column('delivery_days_sum', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'courier_name', 'lane')
+    )
+    op.create_table('courier_delivery_histogram',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('courier_name', sa.String(length=100), nullable=False),
+    sa.Column('lane', sa.String(length=300), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'courier_name', 'lane', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('courier_delivery_histogram')
+    op.drop_table('courier_daily_stats')
@@ -0,0 +1,53 @@
+"""Add indexes backing the order and shipment list filters
+
+Revision ID: e52a7c9f1b84
+Revises: d18b5e0f3a27
+Create Date: 2026-10-19 11:30:00.000000
+
+Composite ``(filter, created_at)`` indexes serve equality filters with the
+newest-first ordering, trigram GIN indexes serve substring search on the
+customer name and phone, and a ``varchar_pattern_ops`` index serves AWB
+prefix search. Indexes on the partitioned parents cascade to every
+partition.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e52a7c9f1b84'
+down_revision: Union[str, None] = 'd18b5e0f3a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_billing_pincode_created_at', 'orders', ['billing_pincode', 'created_at'], unique=False)
+    op.create_index('ix_orders_payment_method_created_at', 'orders', ['payment_method', 'created_at'], unique=False)
+    op.create_index('ix_orders_billing_customer_name_trgm', 'orders', ['billing_customer_name'], unique=False, postgresql_using='gin', postgresql_ops={'billing_customer_name': 'gin_trgm_ops'})
+    op.create_index('ix_orders_billing_phone_trgm', 'orders', ['billing_phone'], unique=False, postgresql_using='gin', postgresql_ops={'billing_phone': 'gin_trgm_ops'})
+
+    op.create_index('ix_shipments_created_at', 'shipments', ['created_at'], unique=False)
+    op.create_index('ix_shipments_status_created_at', 'shipments', ['status', 'created_at'], unique=False)
+    op.create_index('ix_shipments_courier_name_created_at', 'shipments', ['courier_name', 'created_at'], unique=False)
+    op.create_index('ix_shipments_awb_code_pattern', 'shipments', ['awb_code'], unique=False, postgresql_ops={'awb_code': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shipments_awb_code_pattern', table_name='shipments')
+    op.drop_index('ix_shipments_courier_name_created_at', table_name='shipments')
+    op.drop_index('ix_shipments_status_created_at', table_name='shipments')
+    op.drop_index('ix_shipments_created_at', table_name='shipments')
+
+    op.drop_index('ix_orders_billing_phone_trgm', table_name='orders')
+    op.drop_index('ix_orders_billing_customer_name_trgm', table_name='orders')
+    op.drop_index('ix_orders_payment_method_created_at', table_name='orders')
+    op.drop_index('ix_orders_billing_pincode_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at', table_name='orders')
@@ -0,0 +1,50 @@
+"""Add order sheet upload jobs
+
+Revision ID: f3b8d14a6c92
+Revises: e52a7c9f1b84
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d14a6c92'
+down_revision: Union[str, None] = 'e52a7c9f1b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.String(length=100), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('rows_processed', sa.Integer(), nullable=False),
+    sa.Column('orders_accepted', sa.Integer(), nullable=False),
+    sa.Column('orders_rejected', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.JSON(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_jobs_id'), 'upload_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_upload_jobs_tenant_id'), 'upload_jobs', ['tenant_id'], unique=False)
+    op.add_column('fulfilment_batches', sa.Column('upload_job_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_fulfilment_batches_upload_job_id'), 'fulfilment_batches', ['upload_job_id'], unique=False)
+    op.create_foreign_key('fulfilment_batches_upload_job_id_fkey', 'fulfilment_batches', 'upload_jobs', ['upload_job_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fulfilment_batches_upload_job_id_fkey', 'fulfilment_batches', type_='foreignkey')
+    op.drop_index(op.f('ix_fulfilment_batches_upload_job_id'), table_name='fulfilment_batches')
+    op.drop_column('fulfilment_batches', 'upload_job_id')
+    op.drop_index(op.f('ix_upload_jobs_tenant_id'), table_name='upload_jobs')
+    op.drop_index(op.f('ix_upload_jobs_id'), table_name='upload_jobs')
+    op.drop_table('upload_jobs')
@@ -0,0 +1,40 @@
+"""Store order_items as JSONB with a jsonb_path_ops GIN index
+
+Revision ID: 1a7e4c9b2d05
+Revises: f3b8d14a6c92
+Create Date: 2026-10-19 12:30:00.000000
+
+The GIN index serves containment (``order_items @> '[{"sku": ...}]'``)
+lookups by SKU. Changing the type rewrites the table, so run this in a
+maintenance window on large installations.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a7e4c9b2d05'
+down_revision: Union[str, None] = 'f3b8d14a6c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('orders', 'order_items',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='order_items::jsonb')
+    op.create_index('ix_orders_order_items', 'orders', ['order_items'], unique=False, postgresql_using='gin', postgresql_ops={'order_items': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_order_items', table_name='orders')
+    op.alter_column('orders', 'order_items',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using='order_items::json')
@@ -0,0 +1,63 @@
+"""Add courier rate history tables
+
+Revision ID: 2b9f5d3e7a16
+Revises: 1a7e4c9b2d05
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9f5d3e7a16'
+down_revision: Union[str, None] = '1a7e4c9b2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('couriers',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('courier_rate_quotes',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.Column('account', sa.String(length=100), nullable=False),
+    sa.Column('pickup_postcode', sa.String(length=6), nullable=False),
+    sa.Column('delivery_postcode', sa.String(length=6), nullable=False),
+    sa.Column('weight_slab', sa.Integer(), nullable=False),
+    sa.Column('cod', sa.Boolean(), nullable=False),
+    sa.Column('courier_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('rates', postgresql.ARRAY(sa.Float()), nullable=False),
+    sa.Column('etas', postgresql.ARRAY(sa.SmallInteger()), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_courier_rate_quotes_route', 'courier_rate_quotes', ['account', 'pickup_postcode', 'delivery_postcode', 'weight_slab', 'cod', 'observed_at'], unique=False)
+    op.create_index('ix_courier_rate_quotes_observed_at', 'courier_rate_quotes', ['observed_at'], unique=False)
+    op.create_table('courier_rate_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('account', sa.String(length=100), nullable=False),
+    sa.Column('lane', sa.String(length=20), nullable=False),
+    sa.Column('weight_slab', sa.Integer(), nullable=False),
+    sa.Column('courier_id', sa.Integer(), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('rate_min', sa.Float(), nullable=False),
+    sa.Column('rate_max', sa.Float(), nullable=False),
+    sa.Column('rate_sum', sa.Float(), nullable=False),
+    sa.Column('eta_sum', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'account', 'lane', 'weight_slab', 'courier_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('courier_rate_daily')
+    op.drop_index('ix_courier_rate_quotes_observed_at', table_name='courier_rate_quotes')
+    op.drop_index('ix_courier_rate_quotes_route', table_name='courier_rate_quotes')
+    op.drop_table('courier_rate_quotes')
+    op.drop_table('couriers')
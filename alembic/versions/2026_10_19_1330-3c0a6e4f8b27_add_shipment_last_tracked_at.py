@@ -0,0 +1,28 @@
+"""Add shipments.last_tracked_at
+
+Revision ID: 3c0a6e4f8b27
+Revises: 2b9f5d3e7a16
+Create Date: 2026-10-19 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c0a6e4f8b27'
+down_revision: Union[str, None] = '2b9f5d3e7a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: a catalog-only change, also on the
+    # partitioned table
+    op.add_column('shipments', sa.Column('last_tracked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('shipments', 'last_tracked_at')
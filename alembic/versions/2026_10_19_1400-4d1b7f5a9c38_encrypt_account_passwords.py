@@ -0,0 +1,54 @@
+"""Encrypt stored Shiprocket account passwords
+
+Revision ID: 4d1b7f5a9c38
+Revises: 3c0a6e4f8b27
+Create Date: 2026-10-19 14:00:00.000000
+
+Passwords are encrypted with the current ``CREDENTIALS_KEYS`` (see
+``app.db.types.credentials_cipher``), so set them before upgrading.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.types import decrypt, encrypt
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d1b7f5a9c38'
+down_revision: Union[str, None] = '3c0a6e4f8b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+accounts = sa.table(
+    'shiprocket_accounts',
+    sa.column('id', sa.Integer()),
+    sa.column('password', sa.String()),
+)
+
+
+def _rewrite(convert) -> None:
+    bind = op.get_bind()
+    for account_id, password in bind.execute(sa.select(accounts.c.id, accounts.c.password)).all():
+        bind.execute(
+            accounts.update()
+            .where(accounts.c.id == account_id)
+            .values(password=convert(password))
+        )
+
+
+def upgrade() -> None:
+    op.alter_column('shiprocket_accounts', 'password',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=512),
+               existing_nullable=False)
+    _rewrite(encrypt)
+
+
+def downgrade() -> None:
+    _rewrite(decrypt)
+    op.alter_column('shiprocket_accounts', 'password',
+               existing_type=sa.String(length=512),
+               type_=sa.String(length=255),
+               existing_nullable=False)
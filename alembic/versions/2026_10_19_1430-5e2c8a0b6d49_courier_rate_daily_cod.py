@@ -0,0 +1,50 @@
+"""Key daily courier rate summaries by payment mode
+
+Revision ID: 5e2c8a0b6d49
+Revises: 4d1b7f5a9c38
+Create Date: 2026-10-19 14:30:00.000000
+
+COD rates differ from prepaid ones, so ``cod`` joins the primary key of
+``courier_rate_daily``. Existing summaries mixed both modes; they are kept
+as prepaid.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c8a0b6d49'
+down_revision: Union[str, None] = '4d1b7f5a9c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('courier_rate_daily', sa.Column('cod', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.alter_column('courier_rate_daily', 'cod', server_default=None)
+    op.drop_constraint('courier_rate_daily_pkey', 'courier_rate_daily', type_='primary')
+    op.create_primary_key('courier_rate_daily_pkey', 'courier_rate_daily', ['day', 'account', 'lane', 'weight_slab', 'cod', 'courier_id'])
+
+
+def downgrade() -> None:
+    # Fold COD summaries back into the prepaid rows of the same key
+    op.execute("""
+        INSERT INTO courier_rate_daily AS d
+            (day, account, lane, weight_slab, cod, courier_id,
+             samples, rate_min, rate_max, rate_sum, eta_sum)
+        SELECT day, account, lane, weight_slab, false, courier_id,
+               samples, rate_min, rate_max, rate_sum, eta_sum
+        FROM courier_rate_daily WHERE cod
+        ON CONFLICT (day, account, lane, weight_slab, cod, courier_id) DO UPDATE SET
+            samples = d.samples + EXCLUDED.samples,
+            rate_min = least(d.rate_min, EXCLUDED.rate_min),
+            rate_max = greatest(d.rate_max, EXCLUDED.rate_max),
+            rate_sum = d.rate_sum + EXCLUDED.rate_sum,
+            eta_sum = d.eta_sum + EXCLUDED.eta_sum
+    """)
+    op.execute("DELETE FROM courier_rate_daily WHERE cod")
+    op.drop_constraint('courier_rate_daily_pkey', 'courier_rate_daily', type_='primary')
+    op.create_primary_key('courier_rate_daily_pkey', 'courier_rate_daily', ['day', 'account', 'lane', 'weight_slab', 'courier_id'])
+    op.drop_column('courier_rate_daily', 'cod')
@@ -0,0 +1,30 @@
+"""Lease fulfilment items to the worker processing them
+
+Revision ID: 6f3d9b1c7e50
+Revises: 5e2c8a0b6d49
+Create Date: 2026-10-19 15:00:00.000000
+
+Items in flight are resumed only once their worker's lease has expired.
+Existing items have no lease and fall back to ``updated_at``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f3d9b1c7e50'
+down_revision: Union[str, None] = '5e2c8a0b6d49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('fulfilment_items', sa.Column('owner', sa.String(length=64), nullable=True))
+    op.add_column('fulfilment_items', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('fulfilment_items', 'claimed_at')
+    op.drop_column('fulfilment_items', 'owner')
@@ -1,10 +1,14 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
 
 from app.config import settings
-from app.services.auth import ALGORITHM
+from app.db.session import is_statement_timeout
+from app.services.auth import decode_access_token
+from app.utils import deadline
+from app.utils.concurrency import QueueDeadlineExceeded
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_PREFIX}/auth/login"
@@ -17,14 +21,11 @@ async def get_current_user(
     """
     Verify JWT token and return the subject (email).
     
-    This is a simple implementation since there's no User model yet.
-    It just ensures the token is valid and issued by us.
+    Verified tokens are cached until expiry, so only the first request
+    with a given token pays for signature verification.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        token_data = payload.get("sub")
+        token_data = decode_access_token(token)
         if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -36,3 +37,41 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+
+
+async def get_admin_user(
+    user: str = Depends(get_current_user)
+) -> str:
+    """Require an authenticated user listed in ``ADMIN_EMAILS``."""
+    admins = settings.ADMIN_EMAILS or [settings.FIRST_USER_EMAIL]
+    if user not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
+
+
+def timeout_error(error: Exception) -> Optional[HTTPException]:
+    """
+    The response for a request that ran out of time, or None for other errors.
+
+    503 when its deadline passed before a transaction could start (nothing
+    was done, retrying is safe), 504 when a statement was cancelled by the
+    deadline's statement timeout. Shiprocket calls that gave up waiting for
+    a slot are raised as ``httpx.PoolTimeout`` caused by the deadline, and
+    are answered with a 503 as well.
+    """
+    if isinstance(error, deadline.DeadlineExceeded) or isinstance(
+        error.__cause__, (deadline.DeadlineExceeded, QueueDeadlineExceeded)
+    ):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Request deadline exceeded",
+        )
+    if is_statement_timeout(error):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Database statement timed out",
+        )
+    return None
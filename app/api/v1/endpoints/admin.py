@@ -0,0 +1,59 @@
+"""Admin endpoints: request profiles."""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.schemas.admin import ProfileSummary, ProfileToken
+from app.utils.profiling import profile_store, sign_token
+
+router = APIRouter()
+
+
+@router.post("/profiles/token", response_model=ProfileToken)
+async def create_profile_token(
+    ttl: int = Query(300, ge=1, description="Seconds the token stays valid")
+):
+    """
+    Sign an ``X-Profile`` header value.
+    
+    Requests sending it before it expires are profiled (one at a time per
+    worker, when ``PROFILING_ENABLED``); the response's ``X-Profile-Id``
+    names the stored profile.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=409, detail="Profiling is disabled")
+    
+    expires_at = int(time.time()) + min(ttl, settings.PROFILING_TOKEN_MAX_TTL_SECONDS)
+    return ProfileToken(
+        value=sign_token(expires_at),
+        expires_at=datetime.utcfromtimestamp(expires_at),
+    )
+
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+async def list_profiles():
+    """Profiles stored on this worker, newest first."""
+    return await asyncio.to_thread(profile_store.list)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str) -> Dict[str, Any]:
+    """Summary of a profile with every DB statement and Shiprocket call it made."""
+    summary = await asyncio.to_thread(profile_store.summary, profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@router.get("/profiles/{profile_id}/folded")
+async def download_profile(profile_id: str):
+    """Sampled stacks in collapsed format, for flamegraph.pl or speedscope."""
+    path = profile_store.path(profile_id, "folded")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
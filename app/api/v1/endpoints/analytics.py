@@ -0,0 +1,56 @@
+"""Analytics endpoints."""
+
+from datetime import date, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas.analytics import CourierPerformance, RateTrendPoint
+from app.services.analytics import get_courier_performance
+from app.services.rates import rate_history
+
+router = APIRouter()
+
+
+@router.get("/couriers", response_model=List[CourierPerformance])
+async def courier_performance(
+    start: Optional[date] = Query(None, description="First day (default: 7 days ago)"),
+    end: Optional[date] = Query(None, description="Last day (default: today)"),
+    lane: Optional[str] = Query(None, description="Lane, e.g. 'Primary>560'"),
+    courier_name: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Courier performance (volume, RTO, delivery time) per courier and lane."""
+    end = end or date.today()
+    start = start or end - timedelta(days=6)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    return await get_courier_performance(db, start, end, lane=lane, courier_name=courier_name)
+
+
+@router.get("/rates", response_model=List[RateTrendPoint])
+async def rate_trend(
+    pickup_postcode: str = Query(..., min_length=6, max_length=6),
+    delivery_postcode: str = Query(
+        ..., min_length=6, max_length=6, description="Any pincode of the delivery district"
+    ),
+    weight: float = Query(..., gt=0),
+    cod: int = Query(0, ge=0, le=1),
+    start: Optional[date] = Query(None, description="First day (default: 30 days ago)"),
+    end: Optional[date] = Query(None, description="Last day (default: today)"),
+    tenant_id: Optional[str] = Query(None, max_length=100),
+    courier_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Daily courier rates and ETAs on a lane, from recorded serviceability quotes."""
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    return await rate_history.trend(
+        db, pickup_postcode, delivery_postcode, weight, cod, start, end,
+        tenant_id=tenant_id, courier_id=courier_id
+    )
@@ -1,34 +1,28 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
 from app.schemas.auth import TokenResponse
-from app.services.shiprocket import ShiprocketService
 from app.services import auth as auth_service
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get access token by authenticating with Shiprocket.
+    Get access token for a local API user.
     
-    This endpoint verifies credentials with Shiprocket and returns a local JWT.
+    Credentials are checked against the local user store; Shiprocket is
+    not contacted.
     """
-    try:
-        # In this implementation, we verify the credentials by trying to login to Shiprocket
-        # Note: ShiprocketService by default uses settings.SHIPROCKET_EMAIL/PASSWORD
-        # If we want to support multiple users, we'd need to modify ShiprocketService
-        # but for now we follow the existing pattern and just issue a JWT if Shiprocket auth passes.
-        
-        service = ShiprocketService()
-        # You might want to compare form_data.username/password here if you want to restrict login
-        # to the ones in settings, or just try to use them for Shiprocket.
-        
-        await service.authenticate()
-        
-        access_token = auth_service.create_access_token(
-            subject=form_data.username
-        )
-        return TokenResponse(token=access_token)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+    user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    
+    access_token = auth_service.create_access_token(subject=user.email)
+    return TokenResponse(token=access_token)
@@ -0,0 +1,82 @@
+"""Fulfilment pipeline endpoints."""
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.db.session import get_db
+from app.models.fulfilment import FulfilmentBatch, FulfilmentItem
+from app.models.order import Order
+from app.schemas.fulfilment import FulfilmentRequest, FulfilmentBatchResponse
+from app.services.accounts import ShiprocketAccountRegistry, get_account_registry
+from app.services.fulfilment import run_fulfilment
+from app.services.orders import build_order
+from app.services.prevalidation import order_prevalidator
+
+router = APIRouter()
+
+
+@router.post("/", response_model=FulfilmentBatchResponse, status_code=202)
+async def submit_fulfilment(
+    request: FulfilmentRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
+):
+    """
+    Submit a batch of orders for end-to-end fulfilment.
+    
+    Orders are stored immediately and then created, assigned an AWB,
+    labelled and scheduled for pickup in the background.
+    """
+    order_ids = [order_data.order_id for order_data in request.orders]
+    if len(set(order_ids)) != len(order_ids):
+        raise HTTPException(status_code=400, detail="Duplicate order IDs in batch")
+    
+    _, rejected = await order_prevalidator.split(list(enumerate(request.orders)), accounts)
+    if rejected:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"order_id": row["order_id"], "errors": row["errors"]} for row in rejected]
+        )
+    
+    result = await db.execute(select(Order.order_id).where(Order.order_id.in_(order_ids)))
+    existing = result.scalars().all()
+    if existing:
+        raise HTTPException(
+            status_code=400, detail=f"Order IDs already exist: {', '.join(existing)}"
+        )
+    
+    batch = FulfilmentBatch(courier_id=request.courier_id, items=[])
+    for order_data in request.orders:
+        batch.items.append(
+            FulfilmentItem(
+                order=build_order(order_data), payload=order_data.to_shiprocket_payload()
+            )
+        )
+    
+    db.add(batch)
+    await db.commit()
+    
+    background_tasks.add_task(run_fulfilment, [item.id for item in batch.items])
+    return batch
+
+
+@router.get("/{batch_id}", response_model=FulfilmentBatchResponse)
+async def get_fulfilment(
+    batch_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get per-order pipeline state of a fulfilment batch."""
+    result = await db.execute(
+        select(FulfilmentBatch)
+        .where(FulfilmentBatch.id == batch_id)
+        .options(selectinload(FulfilmentBatch.items))
+    )
+    batch = result.scalar_one_or_none()
+    
+    if not batch:
+        raise HTTPException(status_code=404, detail="Fulfilment batch not found")
+    
+    return batch
@@ -2,15 +2,29 @@
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from loguru import logger
 
+from app.api.deps import timeout_error
 from app.db.session import get_db
 from app.models.order import Order
 from app.models.shipment import Shipment
-from app.schemas.order import OrderCreate, OrderResponse
-from app.services.shiprocket import ShiprocketService
+from app.schemas.order import OrderCreate, OrderFilters, OrderResponse, SkuDailyUnits
+from app.services.accounts import (
+    ShiprocketAccountRegistry,
+    UnknownAccountError,
+    get_account_registry,
+)
+from app.services.orders import build_order
+from app.services.prevalidation import order_prevalidator
+from app.services.queries import (
+    ORDER_LIST_COLUMNS,
+    fetch_rows,
+    order_list_query,
+    sku_units_query,
+)
 
 router = APIRouter()
 
@@ -18,10 +32,18 @@ router = APIRouter()
 @router.post("/", response_model=OrderResponse, status_code=201)
 async def create_order(
     order_data: OrderCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
 ):
     """Create a new order and submit to Shiprocket."""
     try:
+        service = await accounts.get(order_data.tenant_id)
+        
+        # Known-bad orders stop here, before a database write and an upstream call
+        problems = await order_prevalidator.problems(order_data, service)
+        if problems:
+            raise HTTPException(status_code=422, detail=problems)
+        
         result = await db.execute(
             select(Order).where(Order.order_id == order_data.order_id)
         )
@@ -30,34 +52,14 @@ async def create_order(
         if existing_order:
             raise HTTPException(status_code=400, detail="Order ID already exists")
         
-        order = Order(
-            order_id=order_data.order_id,
-            order_date=order_data.order_date,
-            pickup_location=order_data.pickup_location,
-            billing_customer_name=order_data.billing_customer_name,
-            billing_city=order_data.billing_city,
-            billing_pincode=order_data.billing_pincode,
-            billing_state=order_data.billing_state,
-            billing_country=order_data.billing_country,
-            billing_phone=order_data.billing_phone,
-            billing_email=order_data.billing_email,
-            billing_address=order_data.billing_address,
-            order_items=[item.model_dump() for item in order_data.order_items],
-            payment_method=order_data.payment_method,
-            weight=order_data.weight,
-            length=order_data.length,
-            breadth=order_data.breadth,
-            height=order_data.height,
-            status="created"
-        )
+        order = build_order(order_data)
         
         db.add(order)
         await db.commit()
         await db.refresh(order)
         
         try:
-            service = ShiprocketService()
-            shiprocket_response = await service.create_order(order_data.model_dump())
+            shiprocket_response = await service.create_order(order_data.to_shiprocket_payload())
             
             order.shiprocket_order_id = shiprocket_response.get("order_id")
             order.status = "submitted"
@@ -78,30 +80,55 @@ async def create_order(
             logger.error(f"Failed to submit order to Shiprocket: {e}")
             order.status = "failed"
             await db.commit()
-            raise HTTPException(status_code=500, detail=f"Failed to submit to Shiprocket: {str(e)}")
+            raise timeout_error(e) or HTTPException(
+                status_code=500, detail=f"Failed to submit to Shiprocket: {str(e)}"
+            )
         
         return order
         
     except HTTPException:
         raise
+    except UnknownAccountError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Order creation failed: {e}")
         await db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/", response_model=List[OrderResponse])
 async def list_orders(
     skip: int = 0,
     limit: int = 100,
+    filters: OrderFilters = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all orders."""
-    result = await db.execute(
-        select(Order).offset(skip).limit(limit).order_by(Order.created_at.desc())
+    """
+    List orders, optionally filtered.
+    
+    Only the response columns are selected and rows are encoded straight to
+    JSON; ``response_model`` documents the shape.
+    """
+    rows = await fetch_rows(
+        db, order_list_query(filters, ORDER_LIST_COLUMNS).offset(skip).limit(limit)
     )
-    orders = result.scalars().all()
-    return orders
+    return ORJSONResponse(rows)
+
+
+@router.get("/skus/{sku}/units", response_model=List[SkuDailyUnits])
+async def sku_units(
+    sku: str,
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Orders and units of one SKU per day.
+    
+    Takes the order list filters; bound the range with ``created_from`` and
+    ``created_to``.
+    """
+    rows = await fetch_rows(db, sku_units_query(sku, filters))
+    return ORJSONResponse(rows)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -1,70 +1,179 @@
 """Shipment endpoints."""
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from loguru import logger
+from redis.exceptions import RedisError
 
+from app.config import settings
+
+from app.api.deps import timeout_error
 from app.db.session import get_db
+from app.models.order import Order
 from app.models.shipment import Shipment
 from app.schemas.shipment import (
     ShipmentResponse,
     CourierServiceability,
     AWBAssignRequest,
+    BatchTrackRequest,
     LabelGenerateRequest,
     PickupScheduleRequest,
+    RateQuote,
+    ShipmentFilters,
     TrackingResponse
 )
-from app.services.shiprocket import ShiprocketService
+from app.services.accounts import (
+    ShiprocketAccountRegistry,
+    UnknownAccountError,
+    get_account_registry,
+)
+from app.services.analytics import record_awb_assigned, record_status_change
+from app.services.batch_tracking import batch_tracker
+from app.services.live_tracking import format_sse, tracking_broker, tracking_event
+from app.services.pickup import pickup_scheduler
+from app.services.prevalidation import order_prevalidator
+from app.services.rates import rate_history
+from app.services.queries import SHIPMENT_LIST_COLUMNS, fetch_rows, shipment_list_query
+from app.services.status_buffer import STATUS_TRANSITION, status_buffer, status_params
+from app.services.tracking import normalize_status
 
 router = APIRouter()
 
 
 @router.get("/serviceability", response_model=List[CourierServiceability])
 async def check_serviceability(
+    background_tasks: BackgroundTasks,
     pickup_postcode: str = Query(..., min_length=6, max_length=6),
     delivery_postcode: str = Query(..., min_length=6, max_length=6),
     weight: float = Query(..., gt=0),
-    cod: int = Query(0, ge=0, le=1)
+    cod: int = Query(0, ge=0, le=1),
+    tenant_id: Optional[str] = Query(None, max_length=100),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
 ):
     """Check courier serviceability."""
     try:
-        service = ShiprocketService()
+        service = await accounts.get(tenant_id)
         couriers = await service.check_serviceability(
             pickup_postcode=pickup_postcode,
             delivery_postcode=delivery_postcode,
             weight=weight,
             cod=cod
         )
+        order_prevalidator.record_serviceability(
+            tenant_id, pickup_postcode, delivery_postcode, weight, cod, couriers
+        )
+        if settings.RATE_HISTORY_ENABLED:
+            background_tasks.add_task(
+                rate_history.record,
+                pickup_postcode, delivery_postcode, weight, cod, couriers, tenant_id=tenant_id
+            )
         return couriers
+    except UnknownAccountError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Serviceability check failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/quote", response_model=RateQuote)
+async def quote_rates(
+    background_tasks: BackgroundTasks,
+    pickup_postcode: str = Query(..., min_length=6, max_length=6),
+    delivery_postcode: str = Query(..., min_length=6, max_length=6),
+    weight: float = Query(..., gt=0),
+    cod: int = Query(0, ge=0, le=1),
+    tenant_id: Optional[str] = Query(None, max_length=100),
+    max_age_seconds: Optional[int] = Query(
+        None, ge=0, description="Oldest acceptable recorded quote (0: always live)"
+    ),
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
+):
+    """
+    Courier rates for a route, cheapest first.
+    
+    Answered from the latest recorded quote for the same route, weight slab
+    and account when it is recent enough, otherwise from Shiprocket.
+    """
+    try:
+        if max_age_seconds is None:
+            max_age_seconds = settings.RATE_QUOTE_MAX_AGE_SECONDS
+        
+        if max_age_seconds and settings.RATE_HISTORY_ENABLED:
+            observed_at, couriers = await rate_history.latest(
+                db, pickup_postcode, delivery_postcode, weight, cod,
+                tenant_id=tenant_id, max_age=timedelta(seconds=max_age_seconds)
+            )
+            if couriers and observed_at is not None:
+                return RateQuote(
+                    source="history",
+                    observed_at=observed_at,
+                    couriers=[CourierServiceability.model_validate(c) for c in couriers],
+                )
+        
+        service = await accounts.get(tenant_id)
+        couriers = await service.check_serviceability(
+            pickup_postcode=pickup_postcode,
+            delivery_postcode=delivery_postcode,
+            weight=weight,
+            cod=cod
+        )
+        order_prevalidator.record_serviceability(
+            tenant_id, pickup_postcode, delivery_postcode, weight, cod, couriers
+        )
+        if settings.RATE_HISTORY_ENABLED:
+            background_tasks.add_task(
+                rate_history.record,
+                pickup_postcode, delivery_postcode, weight, cod, couriers, tenant_id=tenant_id
+            )
+        couriers = sorted(couriers, key=lambda courier: courier.get("rate") or 0)
+        return RateQuote(
+            source="live",
+            observed_at=datetime.utcnow(),
+            couriers=[CourierServiceability.model_validate(c) for c in couriers],
+        )
+    except UnknownAccountError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Rate quote failed: {e}")
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/assign-awb")
 async def assign_awb(
     request: AWBAssignRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
 ):
     """Assign AWB to shipment."""
     try:
         result = await db.execute(
-            select(Shipment).where(Shipment.shiprocket_shipment_id == request.shipment_id)
+            select(Shipment, Order)
+            .join(Order, Shipment.order_id == Order.id)
+            .where(Shipment.shiprocket_shipment_id == request.shipment_id)
+            .with_for_update(of=Shipment)
         )
-        shipment = result.scalar_one_or_none()
+        row = result.one_or_none()
         
-        if not shipment:
+        if not row:
             raise HTTPException(status_code=404, detail="Shipment not found")
         
-        service = ShiprocketService()
+        shipment, order = row
+        previous_awb = shipment.awb_code
+        service = await accounts.get(order.tenant_id)
         awb_response = await service.assign_awb(request.shipment_id, request.courier_id)
         
         shipment.awb_code = awb_response.get("response", {}).get("data", {}).get("awb_code")
         shipment.courier_id = awb_response.get("response", {}).get("data", {}).get("courier_company_id")
         shipment.courier_name = awb_response.get("response", {}).get("data", {}).get("courier_name")
         shipment.status = "awb_assigned"
+        await record_awb_assigned(db, shipment.courier_name, order, previous_awb)
         
         await db.commit()
         await db.refresh(shipment)
@@ -75,38 +184,48 @@ async def assign_awb(
         raise
     except Exception as e:
         logger.error(f"AWB assignment failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-label")
 async def generate_label(
     request: LabelGenerateRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
 ):
     """Generate shipping label."""
     try:
-        service = ShiprocketService()
+        result = await db.execute(
+            select(Order.tenant_id)
+            .join(Shipment, Shipment.order_id == Order.id)
+            .where(Shipment.shiprocket_shipment_id.in_(request.shipment_id))
+            .distinct()
+        )
+        tenant_ids = result.scalars().all()
+        if len(tenant_ids) > 1:
+            raise HTTPException(
+                status_code=400, detail="Shipments belong to different merchants"
+            )
+        
+        service = await accounts.get(tenant_ids[0] if tenant_ids else None)
         label_response = await service.generate_label(request.shipment_id)
         
         label_url = label_response.get("label_url")
         
-        for shipment_id in request.shipment_id:
-            result = await db.execute(
-                select(Shipment).where(Shipment.shiprocket_shipment_id == shipment_id)
-            )
-            shipment = result.scalar_one_or_none()
-            
-            if shipment:
-                shipment.label_url = label_url
-                shipment.status = "label_generated"
-        
+        await db.execute(
+            update(Shipment)
+            .where(Shipment.shiprocket_shipment_id.in_(request.shipment_id))
+            .values(label_url=label_url, status="label_generated")
+        )
         await db.commit()
         
         return {"message": "Label generated successfully", "label_url": label_url}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Label generation failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/schedule-pickup")
@@ -114,70 +233,241 @@ async def schedule_pickup(
     request: PickupScheduleRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Schedule pickup for shipments."""
+    """
+    Schedule pickup for shipments.
+    
+    Requests are coalesced per pickup location with other concurrent
+    callers and sent to Shiprocket as one pickup request per location.
+    """
     try:
-        service = ShiprocketService()
-        pickup_response = await service.schedule_pickup(request.shipment_id)
+        result = await db.execute(
+            select(Shipment.shiprocket_shipment_id, Order.tenant_id, Order.pickup_location)
+            .join(Order, Shipment.order_id == Order.id)
+            .where(Shipment.shiprocket_shipment_id.in_(request.shipment_id))
+        )
+        locations: Dict[Tuple[Optional[str], str], List[int]] = defaultdict(list)
+        for shipment_id, tenant_id, pickup_location in result.all():
+            locations[(tenant_id, pickup_location)].append(shipment_id)
         
-        for shipment_id in request.shipment_id:
-            result = await db.execute(
-                select(Shipment).where(Shipment.shiprocket_shipment_id == shipment_id)
+        missing = set(request.shipment_id) - {sid for ids in locations.values() for sid in ids}
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Shipments not found: {', '.join(map(str, sorted(missing)))}"
             )
-            shipment = result.scalar_one_or_none()
-            
-            if shipment:
-                shipment.pickup_scheduled = True
-                shipment.status = "pickup_scheduled"
+        # Release the connection while waiting out the coalescing window
+        await db.commit()
         
+        results = await asyncio.gather(
+            *(
+                pickup_scheduler.schedule(tenant_id, location, ids)
+                for (tenant_id, location), ids in locations.items()
+            ),
+            return_exceptions=True,
+        )
+        responses = dict(zip(locations.keys(), results))
+        failures = [r for r in responses.values() if isinstance(r, BaseException)]
+        if failures and len(failures) == len(responses):
+            raise failures[0]
+        scheduled = [
+            sid for key, ids in locations.items()
+            if not isinstance(responses[key], BaseException) for sid in ids
+        ]
+        
+        # Only locations Shiprocket accepted are marked, so a retry of the
+        # failed ones does not schedule the others again
+        await db.execute(
+            update(Shipment)
+            .where(Shipment.shiprocket_shipment_id.in_(scheduled))
+            .values(pickup_scheduled=True, status="pickup_scheduled")
+        )
         await db.commit()
         
-        return {"message": "Pickup scheduled successfully", "response": pickup_response}
+        errors = {
+            location: str(response)
+            for (_, location), response in responses.items()
+            if isinstance(response, BaseException)
+        }
+        return {
+            "message": (
+                "Pickup scheduled successfully" if not errors
+                else "Pickup scheduled for some locations"
+            ),
+            "response": {
+                location: response
+                for (_, location), response in responses.items()
+                if not isinstance(response, BaseException)
+            },
+            "errors": errors,
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Pickup scheduling failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/track/stream")
+async def stream_tracking(
+    request: Request,
+    awb: List[str] = Query(..., description="AWB codes to watch (repeat the parameter)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream tracking status changes as server-sent events.
+    
+    The stored status of each AWB is sent first, then every change recorded
+    by any worker. A keep-alive comment is sent when nothing happened for a
+    while. No database connection is held while the stream is open.
+    """
+    awb_codes = list(dict.fromkeys(awb))
+    if len(awb_codes) > settings.TRACKING_STREAM_MAX_AWBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.TRACKING_STREAM_MAX_AWBS} AWB codes per stream"
+        )
+    
+    result = await db.execute(
+        select(Shipment.awb_code, Shipment.current_status, Shipment.updated_at)
+        .where(Shipment.awb_code.in_(awb_codes))
+    )
+    snapshot = [tracking_event(*row) for row in result.all()]
+    
+    try:
+        subscription = await tracking_broker.subscribe(awb_codes)
+    except RedisError as e:
+        logger.error(f"Tracking stream unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Tracking stream unavailable")
+    
+    async def events():
+        try:
+            for event in snapshot:
+                yield format_sse(event)
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.TRACKING_STREAM_HEARTBEAT_SECONDS)
+                yield format_sse(event) if event else ": keep-alive\n\n"
+        finally:
+            await tracking_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/track")
+async def track_shipments(
+    request: BatchTrackRequest,
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
+):
+    """
+    Track many AWBs at once, streaming one JSON line per AWB (NDJSON).
+    
+    AWBs tracked within ``max_age_seconds`` are answered from the database
+    first (``"source": "cache"``); the rest are fetched from Shiprocket in
+    multi-AWB requests and streamed as they return (``"shiprocket"``, or
+    ``"error"``), then stored in one write.
+    """
+    awb_codes = list(dict.fromkeys(request.awb_codes))
+    if len(awb_codes) > settings.TRACKING_BATCH_MAX_AWBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.TRACKING_BATCH_MAX_AWBS} AWB codes per request"
+        )
+    
+    result = await db.execute(
+        select(Shipment, Order)
+        .join(Order, Shipment.order_id == Order.id)
+        .where(Shipment.awb_code.in_(awb_codes))
+    )
+    max_age_seconds = request.max_age_seconds
+    if max_age_seconds is None:
+        max_age_seconds = settings.TRACKING_FRESH_SECONDS
+    max_age = timedelta(seconds=max_age_seconds)
+    
+    return StreamingResponse(
+        batch_tracker.stream(result.tuples().all(), awb_codes, max_age, accounts),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/track/{awb_code}", response_model=TrackingResponse)
 async def track_shipment(
     awb_code: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accounts: ShiprocketAccountRegistry = Depends(get_account_registry)
 ):
     """Track shipment by AWB code."""
     try:
-        service = ShiprocketService()
-        tracking_data = await service.track_shipment(awb_code)
-        
         result = await db.execute(
-            select(Shipment).where(Shipment.awb_code == awb_code)
+            select(Shipment, Order)
+            .join(Order, Shipment.order_id == Order.id)
+            .where(Shipment.awb_code == awb_code)
+        )
+        row = result.one_or_none()
+        shipment, order = row if row else (None, None)
+        
+        service = await accounts.get(order.tenant_id if order else None)
+        tracking_data = await service.track_shipment(awb_code)
+        current_status = normalize_status(
+            tracking_data.get("tracking_data", {}).get("shipment_status")
         )
-        shipment = result.scalar_one_or_none()
         
         if shipment:
-            shipment.current_status = tracking_data.get("tracking_data", {}).get("shipment_status")
-            shipment.tracking_history = tracking_data.get("tracking_data", {}).get("shipment_track")
-            await db.commit()
+            tracking_history = tracking_data.get("tracking_data", {}).get("shipment_track")
+            
+            if current_status == shipment.current_status and status_buffer.enabled:
+                # Only the history moved: coalesce with other updates
+                status_buffer.submit(shipment, current_status, tracking_history)
+            else:
+                # Lock the row and read the status this write replaces, so a
+                # transition is counted once however many trackers race on it
+                observed_at = datetime.utcnow()
+                transition = (await db.execute(
+                    STATUS_TRANSITION,
+                    status_params(shipment, current_status, tracking_history, observed_at),
+                )).one_or_none()
+                # No row: a newer write superseded this one
+                previous_status = transition.previous_status if transition else current_status
+                changed = previous_status != current_status
+                if changed:
+                    await record_status_change(
+                        db, shipment, order, previous_status, current_status, observed_at
+                    )
+                await db.commit()
+                status_buffer.discard(shipment.id)
+                
+                if changed:
+                    await tracking_broker.publish(
+                        awb_code, tracking_event(awb_code, current_status, observed_at)
+                    )
         
         return TrackingResponse(
             awb_code=awb_code,
-            current_status=tracking_data.get("tracking_data", {}).get("shipment_status", "Unknown"),
+            current_status=current_status or "Unknown",
             tracking_history=tracking_data.get("tracking_data", {}).get("shipment_track", [])
         )
         
+    except UnknownAccountError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Tracking failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/", response_model=List[ShipmentResponse])
 async def list_shipments(
     skip: int = 0,
     limit: int = 100,
+    filters: ShipmentFilters = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all shipments."""
-    result = await db.execute(
-        select(Shipment).offset(skip).limit(limit).order_by(Shipment.created_at.desc())
+    """List shipments, optionally filtered (column projection, encoded with orjson)."""
+    rows = await fetch_rows(
+        db, shipment_list_query(filters, SHIPMENT_LIST_COLUMNS).offset(skip).limit(limit)
     )
-    shipments = result.scalars().all()
-    return shipments
+    return ORJSONResponse(rows)
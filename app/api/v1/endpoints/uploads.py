@@ -0,0 +1,68 @@
+"""Order sheet upload endpoints."""
+
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.db.session import get_db
+from app.models.fulfilment import FulfilmentBatch
+from app.models.upload import UploadJob
+from app.schemas.upload import UploadJobResponse
+from app.services.uploads import UploadError, file_extension, process_upload, save_upload
+
+router = APIRouter()
+
+
+@router.post("/orders", response_model=UploadJobResponse, status_code=202)
+async def upload_orders(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV or XLSX order sheet"),
+    tenant_id: Optional[str] = Form(None, max_length=100),
+    courier_id: Optional[int] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload an order sheet for fulfilment.
+    
+    One row per order item; consecutive rows sharing an ``order_id`` form
+    one order. Order columns use the ``OrderCreate`` field names and item
+    columns the ``OrderItem`` ones prefixed with ``item_`` (``item_name``,
+    ``item_sku``, ``item_units``, ``item_selling_price``, ...). The sheet is
+    imported in the background; poll the returned job for progress.
+    """
+    try:
+        file_extension(file.filename)
+        path = await save_upload(file)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = UploadJob(filename=file.filename, tenant_id=tenant_id, status="pending", errors=[])
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    
+    background_tasks.add_task(
+        process_upload, job.id, path, tenant_id=tenant_id, courier_id=courier_id
+    )
+    return job
+
+
+@router.get("/{job_id}", response_model=UploadJobResponse)
+async def get_upload(
+    job_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get progress, row errors and fulfilment batches of an upload job."""
+    job = await db.get(UploadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    
+    result = await db.execute(
+        select(FulfilmentBatch.id)
+        .where(FulfilmentBatch.upload_job_id == job_id)
+        .order_by(FulfilmentBatch.id)
+    )
+    response = UploadJobResponse.model_validate(job)
+    response.batch_ids = list(result.scalars().all())
+    return response
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
-from app.api.v1.endpoints import orders, shipments, auth
-from app.api.deps import get_current_user
+from app.api.v1.endpoints import orders, shipments, auth, fulfilment, analytics, uploads, admin
+from app.api.deps import get_admin_user, get_current_user
 
 api_router = APIRouter()
 
@@ -17,3 +17,27 @@ api_router.include_router(
     tags=["Shipments"],
     dependencies=[Depends(get_current_user)]
 )
+api_router.include_router(
+    fulfilment.router,
+    prefix="/fulfilment",
+    tags=["Fulfilment"],
+    dependencies=[Depends(get_current_user)]
+)
+api_router.include_router(
+    analytics.router,
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(get_current_user)]
+)
+api_router.include_router(
+    uploads.router,
+    prefix="/uploads",
+    tags=["Uploads"],
+    dependencies=[Depends(get_current_user)]
+)
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_admin_user)]
+)
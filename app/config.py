@@ -1,6 +1,6 @@
 """Application configuration using Pydantic Settings."""
 
-from typing import List
+from typing import Dict, List
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -25,19 +25,181 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(
         default="postgresql://shiprocket_user:shiprocket_pass@db:5432/shiprocket_db"
     )
+    # Default statement_timeout of every connection (0: none). Requests with
+    # less time left than this lower it for their own transactions.
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
 
     # Shiprocket API
     SHIPROCKET_BASE_URL: str = "https://apiv2.shiprocket.in/v1/external"
     SHIPROCKET_EMAIL: str = "your_email@company.com"
     SHIPROCKET_PASSWORD: str = "your_password"
+    SHIPROCKET_TIMEOUT_SECONDS: float = 30.0
+    SHIPROCKET_MAX_CONNECTIONS: int = 100
+    SHIPROCKET_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SHIPROCKET_MAX_CONCURRENCY: int = 20
+
+    # Adaptive concurrency: the limit starts at SHIPROCKET_MAX_CONCURRENCY (or
+    # the account's max_concurrency), its ceiling, and moves down to the
+    # minimum and back with latency
+    SHIPROCKET_ADAPTIVE_CONCURRENCY: bool = True
+    SHIPROCKET_MIN_CONCURRENCY: int = 2
+    SHIPROCKET_LATENCY_TOLERANCE: float = 2.0
+    SHIPROCKET_LATENCY_WINDOW_SECONDS: float = 60.0
+
+    # Hedging of tracking and serviceability reads: a second request is sent
+    # once the first is slower than this percentile of recent calls, for at
+    # most this fraction of extra requests
+    SHIPROCKET_HEDGING_ENABLED: bool = False
+    SHIPROCKET_HEDGE_PERCENTILE: float = 0.95
+    SHIPROCKET_HEDGE_BUDGET_RATIO: float = 0.05
+
+    # Priority lanes: share of the concurrency cap while backlogged, and how
+    # long a request may wait for a slot before failing
+    SHIPROCKET_LANE_WEIGHTS: Dict[str, float] = {
+        "interactive": 8, "bulk": 3, "background": 1
+    }
+    SHIPROCKET_LANE_DEADLINES: Dict[str, float] = {
+        "interactive": 5.0, "bulk": 60.0, "background": 300.0
+    }
+
+    # Per-merchant Shiprocket accounts
+    SHIPROCKET_ACCOUNT_CACHE_SIZE: int = 256
+    SHIPROCKET_ACCOUNT_IDLE_SECONDS: int = 900
+    SHIPROCKET_ACCOUNT_MAX_CONNECTIONS: int = 10
+    # Fernet keys encrypting stored account passwords, comma separated and
+    # newest first; empty derives one from SECRET_KEY
+    CREDENTIALS_KEYS: str = ""
+
+    # Startup warmup
+    WARMUP_DB_CONNECTIONS: int = 5
+    WARMUP_UPSTREAM_CONNECTIONS: int = 4
+
+    # Fulfilment pipeline
+    FULFILMENT_CONCURRENCY: int = 10
+    FULFILMENT_BATCH_SIZE: int = 50
+    FULFILMENT_BATCH_DELAY_SECONDS: float = 0.5
+    FULFILMENT_STALE_AFTER_SECONDS: int = 600
+
+    # Order sheet uploads
+    UPLOAD_DIR: str = ""  # temporary files; empty means the system temp dir
+    UPLOAD_MAX_BYTES: int = 200 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 500
+    UPLOAD_MAX_PENDING_CHUNKS: int = 2
+    UPLOAD_MAX_REPORTED_ERRORS: int = 1000
+
+    # Write-behind of shipment tracking updates that do not change the status;
+    # status transitions are always written immediately
+    SHIPMENT_WRITE_BEHIND_ENABLED: bool = True
+    SHIPMENT_WRITE_BEHIND_MAX_PENDING: int = 500
+    SHIPMENT_WRITE_BEHIND_FLUSH_SECONDS: float = 1.0
+
+    # Courier rate history: serviceability responses are kept raw for a few
+    # days, then folded into daily summaries
+    RATE_HISTORY_ENABLED: bool = True
+    RATE_WEIGHT_SLAB_GRAMS: int = 500
+    RATE_QUOTE_MAX_AGE_SECONDS: int = 6 * 3600
+    RATE_RAW_RETENTION_DAYS: int = 7
+
+    # Singleton jobs: one worker of the deployment holds a Postgres advisory
+    # lock and runs them; the others take over if its connection drops
+    JOBS_ENABLED: bool = True
+    JOB_LEADER_LOCK_KEY: int = 7_100_453
+    JOB_HEARTBEAT_SECONDS: float = 5.0
+    JOB_LEADER_RETRY_SECONDS: float = 10.0
+    JOB_PARTITIONS_INTERVAL_SECONDS: float = 6 * 3600
+    JOB_RATE_DOWNSAMPLE_INTERVAL_SECONDS: float = 3600
+    JOB_ARCHIVE_ENABLED: bool = False
+    JOB_ARCHIVE_INTERVAL_SECONDS: float = 24 * 3600
+
+    # Local pre-validation of orders before they reach Shiprocket: each
+    # worker caches the account's pickup locations and the lanes that
+    # recently had no courier; package limits are checked on the schema
+    ORDER_PREVALIDATION_ENABLED: bool = True
+    PICKUP_LOCATIONS_REFRESH_SECONDS: float = 900
+    PICKUP_LOCATIONS_RETRY_SECONDS: float = 60
+    UNSERVICEABLE_LANE_TTL_SECONDS: float = 6 * 3600
+    UNSERVICEABLE_LANE_CACHE_SIZE: int = 10_000
+    ORDER_MAX_DIMENSION_CM: float = 300
+    ORDER_MAX_WEIGHT_KG: float = 100
+
+    # Pickup coalescing
+    PICKUP_COALESCE_MAX_REQUESTS: int = 20
+    PICKUP_COALESCE_WINDOW_SECONDS: float = 2.0
+
+    # Partitioning and cold archive
+    PARTITION_MONTHS_AHEAD: int = 3
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_RETENTION_MONTHS: int = 12
+    ARCHIVE_CLOSED_STATUSES: List[str] = [
+        "DELIVERED", "CANCELED", "CANCELLED", "RTO DELIVERED", "LOST", "DESTROYED"
+    ]
 
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 2.0
+
+    # Live tracking stream
+    TRACKING_STREAM_MAX_AWBS: int = 50
+    TRACKING_STREAM_QUEUE_SIZE: int = 8
+    TRACKING_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Batch tracking: AWBs tracked within the freshness window are answered
+    # from the database, the rest are fetched in multi-AWB chunks
+    TRACKING_FRESH_SECONDS: int = 300
+    TRACKING_BATCH_MAX_AWBS: int = 500
+    TRACKING_BATCH_CHUNK_SIZE: int = 50
+    TRACKING_BATCH_CONCURRENCY: int = 4
+
+    # Admission control, per worker: [concurrency, queue depth] per path
+    # prefix (longest match wins); requests beyond both are shed with a 503.
+    # The request deadline comes from X-Request-Timeout, capped below nginx's
+    # 60 s proxy_read_timeout
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_DEFAULT_CONCURRENCY: int = 64
+    ADMISSION_DEFAULT_QUEUE: int = 128
+    ADMISSION_ROUTE_LIMITS: Dict[str, List[int]] = {
+        "/api/v1/shipments": [32, 64],
+        "/api/v1/orders": [32, 64],
+        "/api/v1/fulfilment": [8, 16],
+        "/api/v1/uploads": [4, 4],
+        "/api/v1/auth": [8, 32],
+    }
+    ADMISSION_EXEMPT_PATHS: List[str] = [
+        "/health", "/ready", "/metrics", "/api/v1/shipments/track/stream"
+    ]
+    ADMISSION_DEFAULT_TIMEOUT_SECONDS: float = 55.0
+    ADMISSION_MAX_TIMEOUT_SECONDS: float = 55.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Statement instrumentation: per-request counts (Server-Timing header),
+    # slow statement log and N+1 warnings
+    DB_INSTRUMENTATION_ENABLED: bool = True
+    DB_SLOW_STATEMENT_MS: float = 500.0
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # On-demand profiling: requests carrying a signed X-Profile header, or a
+    # random sample of them, are profiled and stored for admins to download
+    PROFILING_ENABLED: bool = False
+    PROFILING_SECRET: str = ""  # signs X-Profile tokens; empty means SECRET_KEY
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
+    PROFILING_TOKEN_MAX_TTL_SECONDS: int = 3600
 
     # API
     API_V1_PREFIX: str = "/api/v1"
     SECRET_KEY: str = Field(default="change-this-secret-key")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # Initial API user, created at startup if missing
+    FIRST_USER_EMAIL: str = ""
+    FIRST_USER_PASSWORD: str = ""
+
+    # Users allowed on /admin endpoints; empty means only FIRST_USER_EMAIL
+    ADMIN_EMAILS: List[str] = []
 
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
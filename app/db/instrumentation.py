@@ -0,0 +1,129 @@
+"""Statement counting, timing and N+1 detection per request."""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from loguru import logger
+from sqlalchemy import event
+
+from app.config import settings
+from app.utils import metrics, profiling
+
+DB_SLOW_STATEMENTS = metrics.counter(
+    "db_slow_statements_total",
+    "Statements slower than DB_SLOW_STATEMENT_MS",
+)
+DB_N_PLUS_ONE = metrics.counter(
+    "db_n_plus_one_total",
+    "Requests that repeated one statement shape at least DB_N_PLUS_ONE_THRESHOLD times",
+    ("route",),
+)
+DB_STATEMENTS_PER_REQUEST = metrics.histogram(
+    "db_statements_per_request",
+    "Statements executed per request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"(?:\$\d+|\?|%\(\w+\)s)(?:\s*,\s*(?:\$\d+|\?|%\(\w+\)s))*")
+_WHITESPACE = re.compile(r"\s+")
+
+_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    ``statement`` with literals and bind parameter lists reduced to ``?``.
+
+    Two executions of the same query for different ids have the same shape,
+    as do ``IN`` lists of any length.
+    """
+    shape = _PLACEHOLDER_LIST.sub("?", statement)
+    shape = _LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Statements executed within one ``track_queries`` block."""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def add(self, statement: str, seconds: float) -> None:
+        stats: Optional[QueryStats] = self
+        shape = statement_shape(statement)
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: Optional[int] = None) -> List[str]:
+        """Shapes executed at least ``threshold`` times: probable N+1 loops."""
+        threshold = threshold or settings.DB_N_PLUS_ONE_THRESHOLD
+        return [shape for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements run in this context (nested blocks count towards outer ones)."""
+    stats = QueryStats(parent=_stats.get())
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def current() -> Optional[QueryStats]:
+    return _stats.get()
+
+
+def instrument_engine(engine) -> None:
+    """
+    Time every statement of ``engine`` (async or sync).
+
+    Timings feed the request's stats, its profile and the slow statement log.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Session housekeeping (e.g. the deadline's SET LOCAL) opts out
+        if context.execution_options.get("instrument", True):
+            context._instrumentation_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_instrumentation_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        stats = _stats.get()
+        if stats is not None:
+            stats.add(statement, elapsed)
+        profiling.record(
+            "db", " ".join(statement.split())[:300], started,
+            rows=cursor.rowcount, executemany=executemany,
+        )
+
+        if elapsed * 1000 >= settings.DB_SLOW_STATEMENT_MS:
+            DB_SLOW_STATEMENTS.inc()
+            # Parameters carry customer data: log how many there were, never their values
+            params = len(parameters) if executemany else len(parameters or ())
+            logger.warning(
+                f"Slow statement ({elapsed * 1000:.0f} ms, {params} "
+                f"{'parameter sets' if executemany else 'parameters'}): "
+                f"{statement_shape(statement)[:1000]}"
+            )
@@ -1,7 +1,11 @@
 """Database session management."""
 
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
 from app.config import settings
+from app.utils import deadline
 
 # Create async engine
 engine = create_async_engine(
@@ -11,6 +15,9 @@ engine = create_async_engine(
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
+    connect_args={
+        "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    },
 )
 
 # Create async session factory
@@ -23,6 +30,38 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# SQLSTATE of a statement cancelled by statement_timeout (query_canceled)
+QUERY_CANCELED = "57014"
+
+
+@event.listens_for(Session, "after_begin")
+def apply_request_deadline(session, transaction, connection) -> None:
+    """
+    Bound the statements of a transaction by what is left of the request deadline.
+
+    Only when that is tighter than the connection's default timeout, so most
+    transactions pay no extra round trip. The ``SET`` is left out of the
+    request's statement counts.
+    """
+    left = deadline.remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise deadline.DeadlineExceeded("Request deadline exceeded")
+    timeout_ms = max(int(left * 1000), 1)
+    if settings.DB_STATEMENT_TIMEOUT_MS and timeout_ms >= settings.DB_STATEMENT_TIMEOUT_MS:
+        return
+    connection.exec_driver_sql(
+        f"SET LOCAL statement_timeout = {timeout_ms}",
+        execution_options={"instrument": False},
+    )
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """Whether ``error`` is a statement cancelled by its statement_timeout."""
+    return isinstance(error, DBAPIError) and getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+
 async def get_db() -> AsyncSession:
     """Dependency for getting async database session."""
     async with AsyncSessionLocal() as session:
@@ -0,0 +1,56 @@
+"""Custom column types."""
+
+import base64
+import hashlib
+from functools import lru_cache
+from typing import Any, Optional
+
+from cryptography.fernet import Fernet, MultiFernet
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+
+
+@lru_cache(maxsize=None)
+def credentials_cipher(keys: Optional[str] = None) -> MultiFernet:
+    """
+    Cipher for stored credentials.
+
+    ``keys`` (default ``settings.CREDENTIALS_KEYS``) are comma separated
+    Fernet keys, newest first: values are encrypted with the first and
+    decrypted with any of them, so a key can be rotated by prepending the
+    new one. Without keys, one is derived from ``SECRET_KEY``.
+    """
+    keys = settings.CREDENTIALS_KEYS if keys is None else keys
+    fernets = [Fernet(key.strip()) for key in keys.split(",") if key.strip()]
+    if not fernets:
+        derived = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+        fernets = [Fernet(base64.urlsafe_b64encode(derived))]
+    return MultiFernet(fernets)
+
+
+def encrypt(value: str) -> str:
+    return credentials_cipher().encrypt(value.encode()).decode()
+
+
+def decrypt(token: str) -> str:
+    return credentials_cipher().decrypt(token.encode()).decode()
+
+
+class EncryptedString(TypeDecorator):
+    """
+    String stored encrypted with ``credentials_cipher``.
+
+    Values are plain text in Python and Fernet tokens in the database;
+    ``length`` is that of the stored token.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[str]:
+        return None if value is None else encrypt(value)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        return None if value is None else decrypt(value)
@@ -0,0 +1,6 @@
+"""Leader-elected background jobs."""
+
+from app.jobs.lease import AdvisoryLockLease
+from app.jobs.scheduler import Job, JobScheduler
+
+__all__ = ["AdvisoryLockLease", "Job", "JobScheduler"]
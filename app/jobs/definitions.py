@@ -0,0 +1,55 @@
+"""The deployment's singleton jobs."""
+
+from typing import List
+
+from app.config import settings
+from app.jobs.lease import AdvisoryLockLease
+from app.jobs.scheduler import Job, JobScheduler
+from app.services.archive import OrderArchiver, ensure_partitions
+from app.services.fulfilment import pipeline
+from app.services.rates import rate_history
+
+
+async def archive_closed_orders() -> None:
+    await OrderArchiver().run()
+
+
+def default_jobs() -> List[Job]:
+    """Jobs that must run once per deployment, not once per worker."""
+    jobs = [
+        # Takes only items whose worker's lease expired (see FulfilmentPipeline)
+        Job(
+            "resume_fulfilment",
+            pipeline.resume_stalled,
+            interval=settings.FULFILMENT_STALE_AFTER_SECONDS / 2,
+        ),
+        Job(
+            "ensure_partitions",
+            ensure_partitions,
+            interval=settings.JOB_PARTITIONS_INTERVAL_SECONDS,
+            initial_delay=60,
+        ),
+        Job(
+            "rate_downsample",
+            rate_history.downsample,
+            interval=settings.JOB_RATE_DOWNSAMPLE_INTERVAL_SECONDS,
+            initial_delay=120,
+        ),
+    ]
+    if settings.JOB_ARCHIVE_ENABLED:
+        # Archives land on the leader's ARCHIVE_DIR: mount shared storage there
+        jobs.append(Job(
+            "archive_closed_orders",
+            archive_closed_orders,
+            interval=settings.JOB_ARCHIVE_INTERVAL_SECONDS,
+            initial_delay=300,
+        ))
+    return jobs
+
+
+job_scheduler = JobScheduler(
+    AdvisoryLockLease(settings.JOB_LEADER_LOCK_KEY),
+    default_jobs(),
+    heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+    retry_interval=settings.JOB_LEADER_RETRY_SECONDS,
+)
@@ -0,0 +1,85 @@
+"""Cluster-wide leadership backed by a Postgres advisory lock."""
+
+import asyncio
+from typing import Optional
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.session import engine as default_engine
+
+
+class AdvisoryLockLease:
+    """
+    Leadership held as a session-level ``pg_advisory_lock`` on ``key``.
+
+    The leader keeps one dedicated autocommit connection open for as long
+    as it leads; Postgres releases the lock when that session ends, so a
+    crashed worker or pod loses leadership as soon as its connection is
+    gone and another candidate's next attempt succeeds. ``heartbeat``
+    checks the connection, and with it the lock, is still alive.
+
+    Session locks need a direct connection to Postgres: behind a pooler in
+    transaction mode the lock would follow the server connection, not us.
+    """
+
+    def __init__(self, key: int, engine: Optional[AsyncEngine] = None, timeout: float = 5.0):
+        self.key = key
+        self.engine = engine or default_engine
+        self.timeout = timeout
+        self._conn: Optional[AsyncConnection] = None
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None
+
+    async def try_acquire(self) -> bool:
+        """Take the lock if nobody holds it; never waits for the current leader."""
+        conn = await self.engine.connect()
+        try:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            result = await asyncio.wait_for(
+                conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}),
+                self.timeout,
+            )
+            acquired = bool(result.scalar())
+        except BaseException:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def heartbeat(self) -> bool:
+        """Whether the lock is still held; drops the lease if the session is gone."""
+        if self._conn is None:
+            return False
+        try:
+            await asyncio.wait_for(self._conn.execute(text("SELECT 1")), self.timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Leader lease {self.key} lost: {e}")
+            await self._discard()
+            return False
+
+    async def release(self) -> None:
+        """Give up leadership, e.g. on shutdown."""
+        if self._conn is None:
+            return
+        try:
+            await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        except Exception as e:
+            logger.warning(f"Could not unlock leader lease {self.key}: {e}")
+        await self._discard()
+
+    async def _discard(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            await conn.close()
+        except Exception:
+            # Closing a broken connection invalidates it; the lock died with it
+            pass
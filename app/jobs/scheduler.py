@@ -0,0 +1,166 @@
+"""Periodic jobs that run on exactly one worker of the whole deployment."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+from app.utils import metrics
+
+JOB_LEADER = metrics.gauge(
+    "job_leader",
+    "1 while this worker is the job leader",
+)
+JOB_RUNS = metrics.counter(
+    "job_runs_total",
+    "Completed job runs",
+    ("job", "result"),
+)
+JOB_RUN_SECONDS = metrics.histogram(
+    "job_run_seconds",
+    "Duration of job runs",
+    ("job",),
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+)
+JOB_OVERLAPS = metrics.counter(
+    "job_overlaps_total",
+    "Runs skipped because the previous run of the job was still going",
+    ("job",),
+)
+JOB_LAST_SUCCESS = metrics.gauge(
+    "job_last_success_timestamp_seconds",
+    "Unix time of the last successful run",
+    ("job",),
+)
+
+
+class Job:
+    """A coroutine function run every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        initial_delay: float = 0.0,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.initial_delay = initial_delay
+
+    def __repr__(self) -> str:
+        return f"<Job(name='{self.name}', interval={self.interval})>"
+
+
+class JobScheduler:
+    """
+    Run jobs only while holding the leader lease.
+
+    Every worker runs a scheduler; all of them campaign for ``lease`` every
+    ``retry_interval`` seconds and the one holding it runs the jobs. The
+    leader checks the lease every ``heartbeat_interval`` seconds and, if it
+    is lost, cancels its running jobs and goes back to campaigning, so at
+    most one copy of a job runs at a time (up to one heartbeat interval
+    after a network partition). A new leader runs each job after its
+    ``initial_delay``; jobs must tolerate being re-run after a failover.
+
+    A job whose previous run is still going when it is due is skipped and
+    counted in ``job_overlaps_total``.
+    """
+
+    def __init__(
+        self,
+        lease,
+        jobs: List[Job],
+        heartbeat_interval: float = 5.0,
+        retry_interval: float = 10.0,
+    ):
+        self.lease = lease
+        self.jobs = jobs
+        self.heartbeat_interval = heartbeat_interval
+        self.retry_interval = retry_interval
+        self.leading = False
+        self._next_run: Dict[str, float] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop campaigning, cancel running jobs and release the lease."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        await self._step_down()
+        await self.lease.release()
+
+    async def run(self) -> None:
+        while True:
+            if not self.leading:
+                try:
+                    acquired = await self.lease.try_acquire()
+                except Exception as e:
+                    logger.warning(f"Job leader election failed: {e}")
+                    acquired = False
+                if not acquired:
+                    await asyncio.sleep(self.retry_interval)
+                    continue
+                self._become_leader()
+            elif not await self.lease.heartbeat():
+                await self._step_down()
+                continue
+
+            self._start_due_jobs()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _become_leader(self) -> None:
+        logger.info("This worker is now the job leader")
+        self.leading = True
+        JOB_LEADER.set(1)
+        now = time.monotonic()
+        self._next_run = {job.name: now + job.initial_delay for job in self.jobs}
+
+    async def _step_down(self) -> None:
+        if self.leading:
+            logger.warning("This worker is no longer the job leader")
+        self.leading = False
+        JOB_LEADER.set(0)
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+
+    def _start_due_jobs(self) -> None:
+        now = time.monotonic()
+        for job in self.jobs:
+            if now < self._next_run[job.name]:
+                continue
+            self._next_run[job.name] = now + job.interval
+
+            running = self._running.get(job.name)
+            if running is not None and not running.done():
+                JOB_OVERLAPS.inc(job=job.name)
+                logger.warning(f"Job {job.name} is still running; skipping this run")
+                continue
+            self._running[job.name] = asyncio.create_task(self._run_job(job))
+
+    async def _run_job(self, job: Job) -> None:
+        started = time.monotonic()
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            JOB_RUNS.inc(job=job.name, result="cancelled")
+            raise
+        except Exception as e:
+            JOB_RUNS.inc(job=job.name, result="error")
+            logger.error(f"Job {job.name} failed: {e}")
+        else:
+            JOB_RUNS.inc(job=job.name, result="ok")
+            JOB_LAST_SUCCESS.set(time.time(), job=job.name)
+        finally:
+            JOB_RUN_SECONDS.observe(time.monotonic() - started, job=job.name)
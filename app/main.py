@@ -1,14 +1,32 @@
 """FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+from sqlalchemy.exc import DBAPIError
 
 from app.config import settings
+from app.api.deps import timeout_error
 from app.api.v1.router import api_router
 from app.db.session import engine
 from app.db.base import Base
+from app.db.instrumentation import instrument_engine
+from app.jobs.definitions import job_scheduler
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.services.accounts import account_registry
+from app.services.auth import ensure_first_user
+from app.services.batch_tracking import batch_tracker
+from app.services.live_tracking import tracking_broker
+from app.services.pickup import pickup_scheduler
+from app.services.shiprocket import shiprocket_service
+from app.services.status_buffer import status_buffer
+from app.services.warmup import warmup_state
+from app.utils import deadline, metrics
 
 
 @asynccontextmanager
@@ -23,10 +41,28 @@ async def lifespan(app: FastAPI):
     # async with engine.begin() as conn:
     #     await conn.run_sync(Base.metadata.create_all)
     
+    await ensure_first_user()
+    
+    # Warm pools, upstream connections and caches; /ready reports completion
+    warmup_task = asyncio.create_task(warmup_state.run())
+    
+    # Singleton jobs (resuming stalled fulfilment, partitions, rate history)
+    # run on whichever worker of the deployment wins leadership
+    if settings.JOBS_ENABLED:
+        job_scheduler.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    warmup_task.cancel()
+    await job_scheduler.stop()
+    await pickup_scheduler.drain()
+    await batch_tracker.drain()
+    await shiprocket_service.aclose()
+    await account_registry.aclose()
+    await tracking_broker.aclose()
+    await status_buffer.drain()
     await engine.dispose()
 
 
@@ -39,6 +75,21 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Statement timing feeds the per-request stats, profiles and the slow log
+if settings.DB_INSTRUMENTATION_ENABLED or settings.PROFILING_ENABLED:
+    instrument_engine(engine)
+
+if settings.DB_INSTRUMENTATION_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# On-demand profiling, inside admission control so queueing is not profiled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Admission control; added before CORS so that CORS headers reach shed responses
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -52,6 +103,16 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 
+@app.exception_handler(deadline.DeadlineExceeded)
+@app.exception_handler(DBAPIError)
+async def timeout_exception_handler(request: Request, exc: Exception):
+    """Requests that ran out of time get a 503 or 504 rather than a generic 500."""
+    error = timeout_error(exc)
+    if error is None:
+        raise exc
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -66,3 +127,17 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until this worker has finished warming up."""
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "warmup_ms": round(warmup_state.duration_ms)}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics of this worker."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,170 @@
+"""Admission control: per-route concurrency limits, bounded queues and deadlines."""
+
+import math
+import time
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils import deadline, metrics
+from app.utils.concurrency import PriorityLimiter, QueueDeadlineExceeded
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+ADMISSION_REJECTED = metrics.counter(
+    "admission_rejected_total",
+    "Requests shed by admission control",
+    ("route", "reason"),
+)
+ADMISSION_IN_FLIGHT = metrics.gauge(
+    "admission_in_flight",
+    "Requests admitted and not yet answered",
+    ("route",),
+)
+ADMISSION_QUEUE_SECONDS = metrics.histogram(
+    "admission_queue_seconds",
+    "Time requests waited for admission",
+    ("route",),
+)
+
+_LANE = "default"
+
+
+class RouteBudget:
+    """Concurrency limit and queue depth shared by every path under ``prefix``."""
+
+    def __init__(self, prefix: str, concurrency: int, queue: int):
+        self.prefix = prefix
+        self.limiter = PriorityLimiter(concurrency, {_LANE: 1})
+        self.max_queue = max(0, int(queue))
+
+    @property
+    def full(self) -> bool:
+        """Whether a new request could neither start nor queue."""
+        return (
+            self.limiter.active >= self.limiter.limit
+            and self.limiter.queued() >= self.max_queue
+        )
+
+
+class AdmissionControlMiddleware:
+    """
+    Bound the work each worker accepts, and shed the rest early.
+
+    Requests are grouped by the longest configured path prefix, each group
+    with its own concurrency limit and queue. A request that finds the
+    queue full is answered with an immediate 503 and ``Retry-After``; one
+    still queued when its deadline passes gets the same answer. Either way
+    no work is done for a client that will not wait for the result, so
+    under overload the worker keeps completing requests at capacity instead
+    of finishing each one just after its client gave up.
+
+    The deadline is ``X-Request-Timeout`` seconds from arrival (default and
+    cap from settings, below nginx's read timeout). It is carried to the DB
+    and Shiprocket calls made for the request through ``app.utils.deadline``.
+    Once the response has been sent the slot is released and the deadline
+    dropped, so background tasks that run after the response neither hold
+    admission capacity nor inherit the client's deadline.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_limits: Optional[Mapping[str, Sequence[int]]] = None,
+        default_concurrency: Optional[int] = None,
+        default_queue: Optional[int] = None,
+        exempt_paths: Optional[Iterable[str]] = None,
+        default_timeout: Optional[float] = None,
+        max_timeout: Optional[float] = None,
+    ):
+        self.app = app
+        if route_limits is None:
+            route_limits = settings.ADMISSION_ROUTE_LIMITS
+        self.default = RouteBudget(
+            "",
+            default_concurrency or settings.ADMISSION_DEFAULT_CONCURRENCY,
+            settings.ADMISSION_DEFAULT_QUEUE if default_queue is None else default_queue,
+        )
+        self.routes: List[RouteBudget] = sorted(
+            (RouteBudget(prefix, *limits) for prefix, limits in route_limits.items()),
+            key=lambda route: len(route.prefix),
+            reverse=True,
+        )
+        self.exempt_paths = tuple(
+            settings.ADMISSION_EXEMPT_PATHS if exempt_paths is None else exempt_paths
+        )
+        self.default_timeout = default_timeout or settings.ADMISSION_DEFAULT_TIMEOUT_SECONDS
+        self.max_timeout = max_timeout or settings.ADMISSION_MAX_TIMEOUT_SECONDS
+
+    def route_for(self, path: str) -> RouteBudget:
+        for route in self.routes:
+            if path.startswith(route.prefix):
+                return route
+        return self.default
+
+    def timeout_for(self, headers: Iterable[Tuple[bytes, bytes]]) -> float:
+        """Seconds the client will wait, from ``X-Request-Timeout`` if valid."""
+        for name, value in headers:
+            if name.lower() == TIMEOUT_HEADER:
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    break
+                if math.isfinite(timeout) and timeout > 0:
+                    return min(timeout, self.max_timeout)
+                break
+        return min(self.default_timeout, self.max_timeout)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        route = self.route_for(scope["path"])
+        label = route.prefix or "default"
+        if route.full:
+            ADMISSION_REJECTED.inc(route=label, reason="queue_full")
+            await self._reject(scope, receive, send, "Server is at capacity, retry shortly")
+            return
+
+        timeout = self.timeout_for(scope["headers"])
+        with deadline.deadline_after(timeout):
+            started = time.monotonic()
+            try:
+                await route.limiter.wait_for_slot(_LANE, timeout=timeout)
+            except QueueDeadlineExceeded:
+                ADMISSION_REJECTED.inc(route=label, reason="deadline")
+                await self._reject(scope, receive, send, "Request deadline expired while queued")
+                return
+            ADMISSION_QUEUE_SECONDS.observe(time.monotonic() - started, route=label)
+            ADMISSION_IN_FLIGHT.inc(route=label)
+
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    route.limiter.release()
+                    ADMISSION_IN_FLIGHT.dec(route=label)
+
+            async def send_wrapper(message: Message) -> None:
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body"):
+                    release()
+                    deadline.clear()
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                release()
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, detail: str) -> None:
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": detail},
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+        await response(scope, receive, send)
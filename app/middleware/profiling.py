@@ -0,0 +1,85 @@
+"""Opt-in profiling of single requests, triggered by a signed header or sampling."""
+
+import asyncio
+import random
+from typing import Optional
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils import metrics
+from app.utils.profiling import ProfileStore, profile_request, profile_store, verify_token
+
+PROFILE_HEADER = b"x-profile"
+
+PROFILES_TAKEN = metrics.counter(
+    "profiles_taken_total",
+    "Requests profiled, by trigger",
+    ("trigger",),
+)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when asked to, and store the result for download.
+
+    A request is profiled when it carries an ``X-Profile`` header signed
+    with ``sign_token`` (see ``POST /api/v1/admin/profiles/token``), or at
+    random for a ``sample_rate`` fraction of requests. The profile is
+    written to the store once the response has been sent and its id is
+    returned in ``X-Profile-Id``. A worker profiles one request at a time;
+    other requests pass straight through, so the cost of an unprofiled
+    request is one header lookup.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: Optional[float] = None,
+        store: Optional[ProfileStore] = None,
+    ):
+        self.app = app
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.store = store or profile_store
+        self._busy = False
+
+    def trigger_for(self, scope: Scope) -> Optional[str]:
+        """Why this request should be profiled, or None."""
+        if self._busy:
+            return None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return "header" if verify_token(value.decode("latin-1")) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self.trigger_for(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        try:
+            with profile_request(scope["method"], scope["path"]) as profile:
+
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        profile.status_code = message["status"]
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"x-profile-id", profile.id.encode())
+                        ]
+                    await send(message)
+
+                await self.app(scope, receive, send_wrapper)
+                # Set by the router once it has matched the request
+                profile.route = getattr(scope.get("route"), "path", None)
+        finally:
+            self._busy = False
+
+        PROFILES_TAKEN.inc(trigger=trigger)
+        try:
+            await asyncio.to_thread(self.store.save, profile)
+        except Exception as e:
+            logger.error(f"Could not save profile {profile.id}: {e}")
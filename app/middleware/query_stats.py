@@ -0,0 +1,48 @@
+"""Per-request statement counts, Server-Timing and N+1 warnings."""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from loguru import logger
+
+from app.db.instrumentation import DB_N_PLUS_ONE, DB_STATEMENTS_PER_REQUEST, track_queries
+
+
+class QueryStatsMiddleware:
+    """
+    Count the statements each request runs and report them.
+
+    The response gets a ``Server-Timing: db;dur=<ms>;desc="<n> queries"``
+    header (shown by browser dev tools), the count is observed per route in
+    ``db_statements_per_request``, and a request that ran one statement
+    shape ``DB_N_PLUS_ONE_THRESHOLD`` times or more is logged as a probable
+    N+1 with the repeated statement.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start" and stats.count:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", stats.server_timing().encode())
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    DB_STATEMENTS_PER_REQUEST.observe(stats.count, route=route)
+                for shape in stats.repeated():
+                    DB_N_PLUS_ONE.inc(route=route or "unmatched")
+                    logger.warning(
+                        f"Probable N+1 in {scope['method']} {route or scope['path']}: "
+                        f"{stats.shapes[shape]} x {shape[:500]}"
+                    )
@@ -2,5 +2,24 @@
 
 from app.models.order import Order
 from app.models.shipment import Shipment
+from app.models.fulfilment import FulfilmentBatch, FulfilmentItem
+from app.models.user import User
+from app.models.account import ShiprocketAccount
+from app.models.analytics import CourierDailyStats, CourierDeliveryHistogram
+from app.models.upload import UploadJob
+from app.models.rates import Courier, CourierRateQuote, CourierRateDaily
 
-__all__ = ["Order", "Shipment"]
+__all__ = [
+    "Order",
+    "Shipment",
+    "FulfilmentBatch",
+    "FulfilmentItem",
+    "User",
+    "ShiprocketAccount",
+    "CourierDailyStats",
+    "CourierDeliveryHistogram",
+    "UploadJob",
+    "Courier",
+    "CourierRateQuote",
+    "CourierRateDaily",
+]
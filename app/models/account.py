@@ -0,0 +1,31 @@
+"""Shiprocket account database model."""
+
+from datetime import datetime
+from sqlalchemy import String, Integer, Boolean, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+from app.db.types import EncryptedString
+
+
+class ShiprocketAccount(Base):
+    """Shiprocket API credentials and upstream budget of one merchant (tenant)."""
+
+    __tablename__ = "shiprocket_accounts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    tenant_id: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
+
+    # Shiprocket API user credentials; the password is stored encrypted
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    password: Mapped[str] = mapped_column(EncryptedString(512), nullable=False)
+
+    # Maximum concurrent upstream requests for this account
+    max_concurrency: Mapped[int] = mapped_column(Integer, default=5)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<ShiprocketAccount(id={self.id}, tenant_id='{self.tenant_id}')>"
@@ -0,0 +1,40 @@
+"""Shipment analytics summary models."""
+
+from datetime import date
+from sqlalchemy import String, Integer, Float, Date
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class CourierDailyStats(Base):
+    """Per courier, lane and day shipment counters, maintained incrementally."""
+
+    __tablename__ = "courier_daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    courier_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    lane: Mapped[str] = mapped_column(String(300), primary_key=True)
+
+    # Counters
+    shipments: Mapped[int] = mapped_column(Integer, default=0)
+    delivered: Mapped[int] = mapped_column(Integer, default=0)
+    rto: Mapped[int] = mapped_column(Integer, default=0)
+    delivery_days_sum: Mapped[float] = mapped_column(Float, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CourierDailyStats(day={self.day}, courier='{self.courier_name}', lane='{self.lane}')>"
+
+
+class CourierDeliveryHistogram(Base):
+    """Delivery time histogram (one row per whole-day bucket) used as a percentile sketch."""
+
+    __tablename__ = "courier_delivery_histogram"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    courier_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    lane: Mapped[str] = mapped_column(String(300), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CourierDeliveryHistogram(day={self.day}, bucket={self.bucket}, count={self.count})>"
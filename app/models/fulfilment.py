@@ -0,0 +1,73 @@
+"""Fulfilment pipeline database models."""
+
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, ForeignKey, JSON, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.db.base import Base
+
+
+class FulfilmentBatch(Base):
+    """A batch of orders pushed through the fulfilment pipeline."""
+
+    __tablename__ = "fulfilment_batches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    courier_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    upload_job_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("upload_jobs.id"), index=True, nullable=True
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    items: Mapped[list["FulfilmentItem"]] = relationship(
+        "FulfilmentItem", back_populates="batch", cascade="all, delete-orphan"
+    )
+    upload_job: Mapped["UploadJob | None"] = relationship("UploadJob", back_populates="batches")
+
+    def __repr__(self) -> str:
+        return f"<FulfilmentBatch(id={self.id})>"
+
+
+class FulfilmentItem(Base):
+    """Per-order pipeline state, persisted after every stage transition."""
+
+    __tablename__ = "fulfilment_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    batch_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("fulfilment_batches.id"), index=True, nullable=False
+    )
+    # No foreign keys: orders and shipments are partitioned tables
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    shipment_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Upstream order payload, kept so an interrupted item can be resumed
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    # Pipeline state: ``stage`` is the next stage to run
+    stage: Mapped[str] = mapped_column(String(50), default="create_order")
+    status: Mapped[str] = mapped_column(String(50), default="pending", index=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Lease of the worker processing the item, renewed while it is in flight
+    owner: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    batch: Mapped["FulfilmentBatch"] = relationship("FulfilmentBatch", back_populates="items")
+    order: Mapped["Order"] = relationship(
+        "Order", primaryjoin="foreign(FulfilmentItem.order_id) == Order.id"
+    )
+    shipment: Mapped["Shipment | None"] = relationship(
+        "Shipment", primaryjoin="foreign(FulfilmentItem.shipment_id) == Shipment.id"
+    )
+
+    def __repr__(self) -> str:
+        return f"<FulfilmentItem(id={self.id}, stage='{self.stage}', status='{self.status}')>"
@@ -1,20 +1,59 @@
 """Order database model."""
 
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, DateTime, JSON
+from sqlalchemy import DDL, Column, String, Integer, Float, DateTime, Index, Table, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 
 class Order(Base):
-    """Order model for storing Shiprocket orders."""
+    """
+    Order model for storing Shiprocket orders.
+
+    In Postgres the table is range-partitioned by month on ``created_at``
+    (see the ``partition_orders_and_shipments`` migration), so the primary
+    key includes ``created_at`` and ``order_id`` is kept unique by the
+    ``order_id_registry`` table rather than a constraint.
+    """
 
     __tablename__ = "orders"
+    __table_args__ = (
+        # List endpoint filters, all ordered by created_at
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_billing_pincode_created_at", "billing_pincode", "created_at"),
+        Index("ix_orders_payment_method_created_at", "payment_method", "created_at"),
+        # Substring search on customer name and phone (pg_trgm)
+        Index(
+            "ix_orders_billing_customer_name_trgm",
+            "billing_customer_name",
+            postgresql_using="gin",
+            postgresql_ops={"billing_customer_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_orders_billing_phone_trgm",
+            "billing_phone",
+            postgresql_using="gin",
+            postgresql_ops={"billing_phone": "gin_trgm_ops"},
+        ),
+        # SKU containment lookups (order_items @> '[{"sku": ...}]')
+        Index(
+            "ix_orders_order_items",
+            "order_items",
+            postgresql_using="gin",
+            postgresql_ops={"order_items": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    order_id: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
+    order_id: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
     shiprocket_order_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     
+    # Merchant whose Shiprocket account handles the order (None: default account)
+    tenant_id: Mapped[str | None] = mapped_column(String(100), index=True, nullable=True)
+    
     # Order details
     order_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     pickup_location: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -29,8 +68,8 @@ class Order(Base):
     billing_email: Mapped[str | None] = mapped_column(String(255), nullable=True)
     billing_address: Mapped[str | None] = mapped_column(String(500), nullable=True)
     
-    # Order items (stored as JSON)
-    order_items: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Order items (stored as JSONB)
+    order_items: Mapped[list] = mapped_column(JSONB, nullable=False)
     
     # Payment and shipping
     payment_method: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -43,11 +82,50 @@ class Order(Base):
     status: Mapped[str] = mapped_column(String(50), default="created")
     
     # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    shipments: Mapped[list["Shipment"]] = relationship("Shipment", back_populates="order", cascade="all, delete-orphan")
+    shipments: Mapped[list["Shipment"]] = relationship(
+        "Shipment",
+        primaryjoin="Order.id == foreign(Shipment.order_id)",
+        back_populates="order",
+        cascade="all, delete-orphan",
+    )
 
     def __repr__(self) -> str:
         return f"<Order(id={self.id}, order_id='{self.order_id}', status='{self.status}')>"
+
+
+# Global order_id uniqueness across partitions, filled by an insert trigger
+order_id_registry = Table(
+    "order_id_registry",
+    Base.metadata,
+    Column("order_id", String(100), primary_key=True),
+)
+
+# Schema objects the partitioning migration creates besides the table itself,
+# so that ``create_all`` builds the same schema (new months are added by
+# ``app.services.archive.ensure_partitions``)
+for statement in (
+    "CREATE TABLE orders_default PARTITION OF orders DEFAULT",
+    """
+    CREATE OR REPLACE FUNCTION register_order_id() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO order_id_registry (order_id) VALUES (NEW.order_id);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER orders_register_order_id
+    BEFORE INSERT ON orders
+    FOR EACH ROW EXECUTE FUNCTION register_order_id()
+    """,
+):
+    event.listen(Order.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Order.__table__,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS register_order_id()").execute_if(dialect="postgresql"),
+)
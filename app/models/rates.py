@@ -0,0 +1,89 @@
+"""Courier rate history models."""
+
+from datetime import date, datetime
+from sqlalchemy import (
+    BigInteger, Boolean, Date, DateTime, Float, Index, Integer, SmallInteger, String
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class Courier(Base):
+    """Shiprocket courier company names, keyed by ``courier_company_id``."""
+
+    __tablename__ = "couriers"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Courier(id={self.id}, name='{self.name}')>"
+
+
+class CourierRateQuote(Base):
+    """
+    One serviceability response: every courier's rate and ETA for a route.
+
+    Couriers, rates and ETAs are parallel arrays, so a quote costs one row
+    however many couriers it lists. Rows older than the raw retention are
+    folded into ``CourierRateDaily`` and deleted.
+    """
+
+    __tablename__ = "courier_rate_quotes"
+    __table_args__ = (
+        Index(
+            "ix_courier_rate_quotes_route",
+            "account", "pickup_postcode", "delivery_postcode", "weight_slab", "cod", "observed_at",
+        ),
+        Index("ix_courier_rate_quotes_observed_at", "observed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    observed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Rates are contract specific: tenant id of the Shiprocket account, "" for the default
+    account: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+
+    # Route
+    pickup_postcode: Mapped[str] = mapped_column(String(6), nullable=False)
+    delivery_postcode: Mapped[str] = mapped_column(String(6), nullable=False)
+    weight_slab: Mapped[int] = mapped_column(Integer, nullable=False)  # grams, rounded up
+    cod: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    # Parallel arrays, one entry per courier
+    courier_ids: Mapped[list] = mapped_column(ARRAY(Integer), nullable=False)
+    rates: Mapped[list] = mapped_column(ARRAY(Float), nullable=False)
+    etas: Mapped[list] = mapped_column(ARRAY(SmallInteger), nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<CourierRateQuote(route='{self.pickup_postcode}>{self.delivery_postcode}', "
+            f"slab={self.weight_slab}, observed_at={self.observed_at})>"
+        )
+
+
+class CourierRateDaily(Base):
+    """Daily rate summary per account, lane, weight slab, payment mode and courier."""
+
+    __tablename__ = "courier_rate_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    account: Mapped[str] = mapped_column(String(100), primary_key=True)
+    # Pickup pincode > delivery district
+    lane: Mapped[str] = mapped_column(String(20), primary_key=True)
+    weight_slab: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cod: Mapped[bool] = mapped_column(Boolean, primary_key=True, default=False)
+    courier_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    samples: Mapped[int] = mapped_column(Integer, default=0)
+    rate_min: Mapped[float] = mapped_column(Float)
+    rate_max: Mapped[float] = mapped_column(Float)
+    rate_sum: Mapped[float] = mapped_column(Float, default=0)
+    eta_sum: Mapped[float] = mapped_column(Float, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<CourierRateDaily(day={self.day}, lane='{self.lane}', cod={self.cod}, "
+            f"courier_id={self.courier_id})>"
+        )
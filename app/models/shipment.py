@@ -1,22 +1,41 @@
 """Shipment database model."""
 
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import DDL, String, Integer, Float, DateTime, JSON, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 
 class Shipment(Base):
-    """Shipment model for storing Shiprocket shipments."""
+    """
+    Shipment model for storing Shiprocket shipments.
+
+    In Postgres the table is range-partitioned by month on ``created_at``
+    (see the ``partition_orders_and_shipments`` migration), so the primary
+    key includes ``created_at`` and there is no foreign key to ``orders``.
+    """
 
     __tablename__ = "shipments"
+    __table_args__ = (
+        # List endpoint filters, all ordered by created_at
+        Index("ix_shipments_created_at", "created_at"),
+        Index("ix_shipments_status_created_at", "status", "created_at"),
+        Index("ix_shipments_courier_name_created_at", "courier_name", "created_at"),
+        # AWB prefix search (LIKE 'prefix%') regardless of collation
+        Index(
+            "ix_shipments_awb_code_pattern",
+            "awb_code",
+            postgresql_ops={"awb_code": "varchar_pattern_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
+    order_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
     
     # Shiprocket IDs
-    shiprocket_shipment_id: Mapped[int | None] = mapped_column(Integer, unique=True, nullable=True)
-    awb_code: Mapped[str | None] = mapped_column(String(100), unique=True, index=True, nullable=True)
+    shiprocket_shipment_id: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
+    awb_code: Mapped[str | None] = mapped_column(String(100), index=True, nullable=True)
     
     # Courier details
     courier_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -30,6 +49,7 @@ class Shipment(Base):
     status: Mapped[str] = mapped_column(String(50), default="created")
     current_status: Mapped[str | None] = mapped_column(String(100), nullable=True)
     tracking_history: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    last_tracked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     
     # Labels and documents
     label_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
@@ -41,11 +61,23 @@ class Shipment(Base):
     pickup_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     
     # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    order: Mapped["Order"] = relationship("Order", back_populates="shipments")
+    order: Mapped["Order"] = relationship(
+        "Order", primaryjoin="foreign(Shipment.order_id) == Order.id", back_populates="shipments"
+    )
 
     def __repr__(self) -> str:
         return f"<Shipment(id={self.id}, awb_code='{self.awb_code}', status='{self.status}')>"
+
+
+# Catch-all partition, as created by the partitioning migration
+event.listen(
+    Shipment.__table__,
+    "after_create",
+    DDL("CREATE TABLE shipments_default PARTITION OF shipments DEFAULT").execute_if(
+        dialect="postgresql"
+    ),
+)
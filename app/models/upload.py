@@ -0,0 +1,39 @@
+"""Order sheet upload database model."""
+
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, JSON, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.db.base import Base
+
+
+class UploadJob(Base):
+    """Progress of one uploaded order sheet (CSV or XLSX)."""
+
+    __tablename__ = "upload_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    tenant_id: Mapped[str | None] = mapped_column(String(100), index=True, nullable=True)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # pending -> processing -> completed | failed
+    status: Mapped[str] = mapped_column(String(50), default="pending")
+
+    # Progress counters, updated after every chunk
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0)
+    orders_accepted: Mapped[int] = mapped_column(Integer, default=0)
+    orders_rejected: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Per-row validation errors (capped) and job-level failure
+    errors: Mapped[list] = mapped_column(JSON, default=list)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Relationships
+    batches: Mapped[list["FulfilmentBatch"]] = relationship("FulfilmentBatch", back_populates="upload_job")
+
+    def __repr__(self) -> str:
+        return f"<UploadJob(id={self.id}, filename='{self.filename}', status='{self.status}')>"
@@ -0,0 +1,38 @@
+"""Admin Pydantic schemas."""
+
+from datetime import datetime
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+class ProfileToken(BaseModel):
+    """Schema for a signed profiling token."""
+    
+    header: str = "X-Profile"
+    value: str
+    expires_at: datetime
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "header": "X-Profile",
+                "value": "1760875200.5f0c…",
+                "expires_at": "2025-10-19T12:00:00"
+            }
+        }
+
+
+class ProfileSummary(BaseModel):
+    """Schema for a stored request profile."""
+    
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    sample_interval_ms: float
+    samples: int
+    waiting_samples: int
+    totals: Dict[str, Dict[str, float]]
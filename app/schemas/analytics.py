@@ -0,0 +1,47 @@
+"""Analytics Pydantic schemas."""
+
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CourierPerformance(BaseModel):
+    """Schema for courier performance on one lane."""
+    
+    courier_name: str
+    lane: str
+    shipments: int
+    delivered: int
+    rto: int
+    rto_rate: Optional[float] = None
+    avg_delivery_days: Optional[float] = None
+    p50_delivery_days: Optional[int] = None
+    p90_delivery_days: Optional[int] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "courier_name": "Delhivery",
+                "lane": "Primary>560",
+                "shipments": 420,
+                "delivered": 388,
+                "rto": 12,
+                "rto_rate": 0.03,
+                "avg_delivery_days": 3.4,
+                "p50_delivery_days": 3,
+                "p90_delivery_days": 5
+            }
+        }
+
+
+class RateTrendPoint(BaseModel):
+    """Schema for one courier's rates on a lane on one day."""
+    
+    day: date
+    courier_id: int
+    courier_name: Optional[str] = None
+    samples: int
+    rate_min: float
+    rate_max: float
+    rate_avg: float
+    eta_avg: float
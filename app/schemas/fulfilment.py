@@ -0,0 +1,41 @@
+"""Fulfilment pipeline Pydantic schemas."""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from app.schemas.order import OrderCreate
+
+
+class FulfilmentRequest(BaseModel):
+    """Schema for submitting a batch of orders to the fulfilment pipeline."""
+    
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=500)
+    courier_id: Optional[int] = Field(None, description="Specific courier ID for AWB assignment")
+
+
+class FulfilmentItemResponse(BaseModel):
+    """Schema for the pipeline state of a single order."""
+    
+    id: int
+    order_id: int
+    shipment_id: Optional[int] = None
+    stage: str
+    status: str
+    error: Optional[str] = None
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class FulfilmentBatchResponse(BaseModel):
+    """Schema for fulfilment batch response."""
+    
+    id: int
+    courier_id: Optional[int] = None
+    created_at: datetime
+    items: List[FulfilmentItemResponse] = []
+    
+    class Config:
+        from_attributes = True
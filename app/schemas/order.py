@@ -1,8 +1,13 @@
 """Order Pydantic schemas."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
+
+from app.config import settings
+
+# Indian PIN codes: six digits, the first one non-zero
+PINCODE_PATTERN = r"^[1-9][0-9]{5}$"
 
 
 class OrderItem(BaseModel):
@@ -21,13 +26,16 @@ class OrderCreate(BaseModel):
     """Schema for creating an order."""
     
     order_id: str = Field(..., description="Unique order ID")
+    tenant_id: Optional[str] = Field(
+        None, max_length=100, description="Merchant whose Shiprocket account handles the order"
+    )
     order_date: str = Field(..., description="Order date in YYYY-MM-DD format")
     pickup_location: str = Field(default="Primary", description="Pickup location name")
     
     # Billing information
     billing_customer_name: str = Field(..., min_length=1, max_length=255)
     billing_city: str = Field(..., min_length=1, max_length=100)
-    billing_pincode: str = Field(..., min_length=6, max_length=6)
+    billing_pincode: str = Field(..., min_length=6, max_length=6, pattern=PINCODE_PATTERN)
     billing_state: str = Field(..., min_length=1, max_length=100)
     billing_country: str = Field(default="India", max_length=100)
     billing_phone: str = Field(..., min_length=10, max_length=10)
@@ -39,7 +47,7 @@ class OrderCreate(BaseModel):
     shipping_is_billing: bool = Field(default=True)
     shipping_customer_name: Optional[str] = None
     shipping_city: Optional[str] = None
-    shipping_pincode: Optional[str] = None
+    shipping_pincode: Optional[str] = Field(None, pattern=PINCODE_PATTERN)
     shipping_state: Optional[str] = None
     shipping_country: Optional[str] = None
     shipping_phone: Optional[str] = None
@@ -73,6 +81,29 @@ class OrderCreate(BaseModel):
         except ValueError:
             raise ValueError("Order date must be in YYYY-MM-DD format")
         return v
+    
+    @root_validator(skip_on_failure=True)
+    def validate_package(cls, values):
+        """Dimensions all or none, and package within the courier limits."""
+        dimensions = [values.get(name) for name in ("length", "breadth", "height")]
+        if any(d is not None for d in dimensions) and any(d is None for d in dimensions):
+            raise ValueError("Give all of length, breadth and height, or none of them")
+        if any(d is not None and d > settings.ORDER_MAX_DIMENSION_CM for d in dimensions):
+            raise ValueError(f"Package dimensions may not exceed {settings.ORDER_MAX_DIMENSION_CM} cm")
+        if values["weight"] > settings.ORDER_MAX_WEIGHT_KG:
+            raise ValueError(f"Package weight may not exceed {settings.ORDER_MAX_WEIGHT_KG} kg")
+        return values
+
+    @property
+    def delivery_pincode(self) -> str:
+        """PIN code the package goes to."""
+        if not self.shipping_is_billing and self.shipping_pincode:
+            return self.shipping_pincode
+        return self.billing_pincode
+
+    def to_shiprocket_payload(self) -> dict:
+        """Compact payload for Shiprocket's create order API: local-only and unset fields removed."""
+        return self.model_dump(exclude={"tenant_id"}, exclude_none=True)
 
     class Config:
         json_schema_extra = {
@@ -106,9 +137,33 @@ class OrderResponse(BaseModel):
     id: int
     order_id: str
     shiprocket_order_id: Optional[int] = None
+    tenant_id: Optional[str] = None
     status: str
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+
+class OrderFilters(BaseModel):
+    """Query filters for listing orders."""
+    
+    status: Optional[str] = None
+    tenant_id: Optional[str] = None
+    created_from: Optional[datetime] = Field(None, description="Created at or after")
+    created_to: Optional[datetime] = Field(None, description="Created before")
+    billing_pincode: Optional[str] = Field(None, min_length=6, max_length=6)
+    payment_method: Optional[str] = None
+    q: Optional[str] = Field(
+        None, min_length=3, max_length=100, description="Customer name or phone search"
+    )
+    sku: Optional[str] = Field(None, max_length=100, description="Orders containing this SKU")
+
+
+class SkuDailyUnits(BaseModel):
+    """Units of one SKU ordered on a day."""
+    
+    day: date
+    orders: int
+    units: int
@@ -27,6 +27,14 @@ class CourierServiceability(BaseModel):
         }
 
 
+class RateQuote(BaseModel):
+    """Schema for courier rates of a route, live or from a recent quote."""
+    
+    source: str = Field(..., description="'history' (recorded quote) or 'live' (Shiprocket)")
+    observed_at: datetime
+    couriers: List[CourierServiceability]
+
+
 class ShipmentResponse(BaseModel):
     """Schema for shipment response."""
     
@@ -66,6 +74,15 @@ class PickupScheduleRequest(BaseModel):
     pickup_date: Optional[str] = Field(None, description="Pickup date in YYYY-MM-DD format")
 
 
+class BatchTrackRequest(BaseModel):
+    """Schema for batch tracking request."""
+    
+    awb_codes: List[str] = Field(..., min_length=1, description="AWB codes to track")
+    max_age_seconds: Optional[int] = Field(
+        None, ge=0, description="Serve stored statuses tracked this recently (default TRACKING_FRESH_SECONDS)"
+    )
+
+
 class TrackingResponse(BaseModel):
     """Schema for tracking response."""
     
@@ -88,3 +105,13 @@ class TrackingResponse(BaseModel):
                 ]
             }
         }
+
+
+class ShipmentFilters(BaseModel):
+    """Query filters for listing shipments."""
+    
+    status: Optional[str] = None
+    created_from: Optional[datetime] = Field(None, description="Created at or after")
+    created_to: Optional[datetime] = Field(None, description="Created before")
+    courier_name: Optional[str] = None
+    awb_prefix: Optional[str] = Field(None, min_length=2, max_length=100)
@@ -0,0 +1,34 @@
+"""Order sheet upload Pydantic schemas."""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class UploadRowError(BaseModel):
+    """Validation errors of one order in an uploaded sheet."""
+    
+    row: int
+    order_id: Optional[str] = None
+    errors: List[str]
+
+
+class UploadJobResponse(BaseModel):
+    """Schema for order sheet upload progress."""
+    
+    id: int
+    filename: str
+    tenant_id: Optional[str] = None
+    status: str
+    rows_processed: int
+    orders_accepted: int
+    orders_rejected: int
+    errors: List[UploadRowError] = []
+    error: Optional[str] = None
+    batch_ids: List[int] = []
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,135 @@
+"""Per-merchant Shiprocket account registry."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from loguru import logger
+from sqlalchemy import select
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.account import ShiprocketAccount
+from app.services.shiprocket import ShiprocketService, shiprocket_service
+
+
+class UnknownAccountError(Exception):
+    """Raised when no active Shiprocket account exists for a tenant."""
+
+
+class ShiprocketAccountRegistry:
+    """
+    LRU registry of per-tenant ``ShiprocketService`` instances.
+
+    Each tenant gets its own service, and therefore its own token cache,
+    connection pool and concurrency budget, so one merchant cannot use up
+    another's upstream capacity. At most ``max_size`` services are kept;
+    the least recently used ones, and any idle for longer than
+    ``idle_seconds``, are evicted and their clients closed once their
+    in-flight requests finish. Orders without a tenant use the default
+    account from settings.
+    """
+
+    def __init__(
+        self,
+        default: Optional[ShiprocketService] = None,
+        session_factory=AsyncSessionLocal,
+        max_size: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+    ):
+        self.default = default or shiprocket_service
+        self.session_factory = session_factory
+        self.max_size = max_size or settings.SHIPROCKET_ACCOUNT_CACHE_SIZE
+        self.idle_seconds = idle_seconds or settings.SHIPROCKET_ACCOUNT_IDLE_SECONDS
+        self._services: "OrderedDict[str, Tuple[float, ShiprocketService]]" = OrderedDict()
+        self._load_lock = asyncio.Lock()
+        self._closing: set = set()
+
+    async def get(self, tenant_id: Optional[str]) -> ShiprocketService:
+        """
+        Return the service for a tenant, loading its account on first use.
+
+        Raises:
+            UnknownAccountError: If the tenant has no active account
+        """
+        if tenant_id is None:
+            return self.default
+
+        entry = self._services.get(tenant_id)
+        if entry is None:
+            async with self._load_lock:
+                entry = self._services.get(tenant_id)
+                if entry is None:
+                    entry = (time.monotonic(), await self._load(tenant_id))
+
+        self._services[tenant_id] = (time.monotonic(), entry[1])
+        self._services.move_to_end(tenant_id)
+        self._evict()
+        return entry[1]
+
+    async def _load(self, tenant_id: str) -> ShiprocketService:
+        """Build a service from the tenant's stored account."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ShiprocketAccount).where(
+                    ShiprocketAccount.tenant_id == tenant_id,
+                    ShiprocketAccount.is_active.is_(True),
+                )
+            )
+            account = result.scalar_one_or_none()
+
+        if account is None:
+            raise UnknownAccountError(f"No active Shiprocket account for tenant '{tenant_id}'")
+
+        return ShiprocketService(
+            email=account.email,
+            password=account.password,
+            max_concurrency=account.max_concurrency,
+            max_connections=settings.SHIPROCKET_ACCOUNT_MAX_CONNECTIONS,
+            name=tenant_id,
+        )
+
+    def invalidate(self, tenant_id: str) -> None:
+        """Drop a tenant's service, e.g. after its credentials changed."""
+        entry = self._services.pop(tenant_id, None)
+        if entry is not None:
+            self._close_later(entry[1])
+
+    def _evict(self) -> None:
+        """Evict least recently used services beyond capacity or idle too long."""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._services:
+            tenant_id, (last_used, service) = next(iter(self._services.items()))
+            if len(self._services) <= self.max_size and last_used >= cutoff:
+                break
+            del self._services[tenant_id]
+            logger.debug(f"Evicting Shiprocket client for tenant {tenant_id}")
+            self._close_later(service)
+
+    def _close_later(self, service: ShiprocketService) -> None:
+        """Close an evicted service once its in-flight requests have finished."""
+        async def close() -> None:
+            while service.in_flight:
+                await asyncio.sleep(1)
+            await service.aclose()
+
+        task = asyncio.get_running_loop().create_task(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def aclose(self) -> None:
+        """Close every cached service."""
+        services = [service for _, service in self._services.values()]
+        self._services.clear()
+        await asyncio.gather(*(service.aclose() for service in services))
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+
+account_registry = ShiprocketAccountRegistry()
+
+
+def get_account_registry() -> ShiprocketAccountRegistry:
+    """Dependency returning the shared account registry."""
+    return account_registry
@@ -0,0 +1,203 @@
+"""Incrementally maintained shipment analytics."""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, cast
+from sqlalchemy import ColumnElement, Table, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import CourierDailyStats, CourierDeliveryHistogram
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.tracking import FINAL_STATUSES, is_delivered, is_rto
+
+# Delivery times above this many days share the last histogram bucket
+MAX_BUCKET_DAYS = 30
+
+UNKNOWN_COURIER = "Unknown"
+
+
+def lane_for(order: Order) -> str:
+    """Lane key: pickup location to the delivery pincode's 3-digit sorting district."""
+    return f"{order.pickup_location}>{order.billing_pincode[:3]}"
+
+
+async def _bump(
+    db: AsyncSession,
+    day: date,
+    courier_name: Optional[str],
+    lane: str,
+    **increments: float,
+) -> None:
+    """Add ``increments`` to one daily stats row, creating it if needed."""
+    table = cast(Table, CourierDailyStats.__table__)
+    stmt = insert(table).values(
+        day=day,
+        courier_name=courier_name or UNKNOWN_COURIER,
+        lane=lane,
+        shipments=increments.get("shipments", 0),
+        delivered=increments.get("delivered", 0),
+        rto=increments.get("rto", 0),
+        delivery_days_sum=increments.get("delivery_days_sum", 0),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.courier_name, table.c.lane],
+        set_={name: table.c[name] + stmt.excluded[name] for name in increments},
+    )
+    await db.execute(stmt)
+
+
+async def record_awb_assigned(
+    db: AsyncSession,
+    courier_name: Optional[str],
+    order: Order,
+    previous_awb: Optional[str] = None,
+) -> None:
+    """
+    Count a shipment booked with a courier. Runs in the caller's transaction.
+
+    ``previous_awb`` is the shipment's AWB before this assignment, read
+    under a row lock; a reassignment (one was already set) is not counted
+    again.
+    """
+    if previous_awb is not None:
+        return
+    await _bump(db, date.today(), courier_name, lane_for(order), shipments=1)
+
+
+async def record_status_change(
+    db: AsyncSession,
+    shipment: Shipment,
+    order: Order,
+    previous: Optional[str],
+    current: Optional[str],
+    at: Optional[datetime] = None,
+) -> None:
+    """
+    Fold a tracking status transition into the summary tables.
+
+    Only transitions into delivered or RTO states are counted, and none out
+    of a final status, so calling this repeatedly with an unchanged status
+    is a no-op and a shipment is counted delivered or returned at most once.
+    ``previous`` must be read under a row lock (see
+    ``app.services.status_buffer.STATUS_TRANSITION``) so that concurrent
+    trackers do not both count one transition. Statuses must be normalized
+    (see ``app.services.tracking.normalize_status``). Runs in the caller's
+    transaction.
+    """
+    if current == previous or previous in FINAL_STATUSES:
+        return
+
+    at = at or datetime.utcnow()
+    lane = lane_for(order)
+
+    if is_delivered(current):
+        started = shipment.pickup_date or shipment.created_at
+        days = max((at - started).total_seconds() / 86400, 0)
+        await _bump(
+            db, at.date(), shipment.courier_name, lane, delivered=1, delivery_days_sum=days
+        )
+
+        table = cast(Table, CourierDeliveryHistogram.__table__)
+        stmt = insert(table).values(
+            day=at.date(),
+            courier_name=shipment.courier_name or UNKNOWN_COURIER,
+            lane=lane,
+            bucket=min(math.ceil(days), MAX_BUCKET_DAYS),
+            count=1,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.courier_name, table.c.lane, table.c.bucket],
+            set_={"count": table.c.count + 1},
+        )
+        await db.execute(stmt)
+
+    elif is_rto(current) and not is_rto(previous):
+        await _bump(db, at.date(), shipment.courier_name, lane, rto=1)
+
+
+def percentile(histogram: Dict[int, int], fraction: float) -> Optional[int]:
+    """Smallest bucket at or below which ``fraction`` of the observations fall."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = fraction * total
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= threshold:
+            return bucket
+    return max(histogram)
+
+
+async def get_courier_performance(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    lane: Optional[str] = None,
+    courier_name: Optional[str] = None,
+) -> List[Dict[str, object]]:
+    """
+    Aggregate courier performance per courier and lane over ``[start, end]``.
+
+    Reads only the summary tables, so the cost depends on the number of
+    couriers, lanes and days, not on the number of shipments.
+    """
+    filters: List[ColumnElement[bool]] = [CourierDailyStats.day.between(start, end)]
+    hist_filters: List[ColumnElement[bool]] = [CourierDeliveryHistogram.day.between(start, end)]
+    if lane:
+        filters.append(CourierDailyStats.lane == lane)
+        hist_filters.append(CourierDeliveryHistogram.lane == lane)
+    if courier_name:
+        filters.append(CourierDailyStats.courier_name == courier_name)
+        hist_filters.append(CourierDeliveryHistogram.courier_name == courier_name)
+
+    stats = await db.execute(
+        select(
+            CourierDailyStats.courier_name,
+            CourierDailyStats.lane,
+            func.sum(CourierDailyStats.shipments),
+            func.sum(CourierDailyStats.delivered),
+            func.sum(CourierDailyStats.rto),
+            func.sum(CourierDailyStats.delivery_days_sum),
+        )
+        .where(*filters)
+        .group_by(CourierDailyStats.courier_name, CourierDailyStats.lane)
+    )
+    buckets = await db.execute(
+        select(
+            CourierDeliveryHistogram.courier_name,
+            CourierDeliveryHistogram.lane,
+            CourierDeliveryHistogram.bucket,
+            func.sum(CourierDeliveryHistogram.count),
+        )
+        .where(*hist_filters)
+        .group_by(
+            CourierDeliveryHistogram.courier_name,
+            CourierDeliveryHistogram.lane,
+            CourierDeliveryHistogram.bucket,
+        )
+    )
+
+    histograms: Dict[Tuple[str, str], Dict[int, int]] = defaultdict(dict)
+    for courier, lane_key, bucket, count in buckets.all():
+        histograms[(courier, lane_key)][bucket] = count
+
+    rows = []
+    for courier, lane_key, shipments, delivered, rto, days_sum in stats.all():
+        histogram = histograms.get((courier, lane_key), {})
+        closed = delivered + rto
+        rows.append({
+            "courier_name": courier,
+            "lane": lane_key,
+            "shipments": shipments,
+            "delivered": delivered,
+            "rto": rto,
+            "rto_rate": round(rto / closed, 4) if closed else None,
+            "avg_delivery_days": round(days_sum / delivered, 2) if delivered else None,
+            "p50_delivery_days": percentile(histogram, 0.5),
+            "p90_delivery_days": percentile(histogram, 0.9),
+        })
+    return rows
@@ -0,0 +1,224 @@
+"""Partition maintenance and cold archival of closed orders."""
+
+import asyncio
+import gzip
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.db.session import engine
+
+PARTITIONED_TABLES = ("orders", "shipments")
+
+# Order is closed when it failed, or every one of its shipments is in a final state
+CLOSED_ORDERS_SQL = """
+    SELECT o.id FROM {partition} o
+    WHERE o.id > :after
+      AND o.created_at < :cutoff
+      AND (
+        o.status IN ('failed', 'cancelled')
+        OR (
+          EXISTS (SELECT 1 FROM shipments s WHERE s.order_id = o.id)
+          AND NOT EXISTS (
+            SELECT 1 FROM shipments s
+            WHERE s.order_id = o.id
+              AND upper(coalesce(s.current_status, '')) <> ALL(:closed_statuses)
+          )
+        )
+      )
+    ORDER BY o.id
+    LIMIT :limit
+"""
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month ``months`` after ``day``'s month."""
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the monthly partition of ``table`` starting at ``month``."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[Tuple[str, date]]:
+    """Return ``(name, month)`` of the monthly partitions of ``table``, oldest first."""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": table},
+    )
+    partitions = []
+    prefix = f"{table}_p"
+    for (name,) in result.all():
+        if name.startswith(prefix):
+            month = datetime.strptime(name[len(prefix):], "%Y_%m").date()
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def create_partition(conn: AsyncConnection, table: str, month: date) -> None:
+    """Create the monthly partition of ``table`` starting at ``month`` unless it exists."""
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+            f"PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+    )
+
+
+async def ensure_partitions(
+    months_ahead: Optional[int] = None, bind: Optional[AsyncEngine] = None
+) -> None:
+    """Create monthly partitions up to ``months_ahead`` months from now."""
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = date.today().replace(day=1)
+
+    async with (bind or engine).begin() as conn:
+        for table in PARTITIONED_TABLES:
+            for offset in range(months_ahead + 1):
+                await create_partition(conn, table, add_months(this_month, offset))
+
+
+class OrderArchiver:
+    """
+    Move closed orders older than the retention window to cold storage.
+
+    Closed orders and their shipments are written as gzipped JSONL (one
+    order per line, shipments nested) and deleted from the hot tables.
+    Monthly partitions that are entirely past the retention window and
+    empty afterwards are detached and dropped, so hot indexes only cover
+    active business. Open orders are never archived; their partitions
+    stay attached until they close.
+    """
+
+    def __init__(
+        self,
+        archive_dir: Optional[str] = None,
+        retention_months: Optional[int] = None,
+        chunk_size: int = 1000,
+        bind: Optional[AsyncEngine] = None,
+    ):
+        self.engine = bind or engine
+        self.archive_dir = archive_dir or settings.ARCHIVE_DIR
+        self.retention_months = retention_months or settings.ARCHIVE_RETENTION_MONTHS
+        self.chunk_size = chunk_size
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Archive every partition older than the retention window.
+
+        Returns:
+            Number of archived orders per orders partition
+        """
+        cutoff = add_months(date.today().replace(day=1), -self.retention_months)
+        archived: Dict[str, int] = {}
+
+        async with self.engine.connect() as conn:
+            partitions = await list_partitions(conn, "orders")
+
+        for name, month in partitions:
+            if add_months(month, 1) > cutoff:
+                break
+            archived[name] = await self.archive_partition(name, month, cutoff)
+
+        await self.drop_empty_partitions(cutoff)
+        return archived
+
+    async def archive_partition(self, partition: str, month: date, cutoff: date) -> int:
+        """Archive the closed orders of one orders partition."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(
+            self.archive_dir, f"{partition}-{datetime.utcnow():%Y%m%dT%H%M%S}.jsonl.gz"
+        )
+        statuses = [status.upper() for status in settings.ARCHIVE_CLOSED_STATUSES]
+        total = 0
+        after = 0
+
+        while True:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(
+                    text(CLOSED_ORDERS_SQL.format(partition=partition)),
+                    {
+                        "after": after,
+                        "cutoff": cutoff,
+                        "closed_statuses": statuses,
+                        "limit": self.chunk_size,
+                    },
+                )
+                order_ids = list(result.scalars().all())
+                if not order_ids:
+                    break
+
+                lines = await self._export(conn, order_ids)
+                await asyncio.to_thread(self._append, path, lines)
+
+                # Delete only once the chunk is on disk; a crash re-exports it
+                for table, column in (
+                    ("fulfilment_items", "order_id"),
+                    ("shipments", "order_id"),
+                    ("orders", "id"),
+                ):
+                    await conn.execute(
+                        text(f"DELETE FROM {table} WHERE {column} = ANY(:ids)"),
+                        {"ids": order_ids},
+                    )
+
+            total += len(order_ids)
+            after = order_ids[-1]
+
+        if total:
+            logger.info(f"Archived {total} orders from {partition} to {path}")
+        return total
+
+    async def _export(self, conn: AsyncConnection, order_ids: List[int]) -> List[str]:
+        """Serialize orders with their shipments as JSON lines."""
+        orders = await conn.execute(
+            text("SELECT * FROM orders WHERE id = ANY(:ids) ORDER BY id"), {"ids": order_ids}
+        )
+        shipments = await conn.execute(
+            text("SELECT * FROM shipments WHERE order_id = ANY(:ids)"), {"ids": order_ids}
+        )
+
+        by_order: Dict[int, List[Dict[str, Any]]] = {}
+        for row in shipments.mappings():
+            by_order.setdefault(row["order_id"], []).append(dict(row))
+
+        lines = []
+        for row in orders.mappings():
+            record = dict(row)
+            record["shipments"] = by_order.get(row["id"], [])
+            lines.append(json.dumps(record, default=str, separators=(",", ":")))
+        return lines
+
+    @staticmethod
+    def _append(path: str, lines: List[str]) -> None:
+        """Append lines to a gzip file (each call adds a gzip member)."""
+        with gzip.open(path, "at", encoding="utf-8") as fh:
+            for line in lines:
+                fh.write(line + "\n")
+
+    async def drop_empty_partitions(self, cutoff: date) -> None:
+        """Detach and drop partitions past the retention window that are empty."""
+        async with self.engine.begin() as conn:
+            for table in PARTITIONED_TABLES:
+                for name, month in await list_partitions(conn, table):
+                    if add_months(month, 1) > cutoff:
+                        break
+                    result = await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})"))
+                    if result.scalar():
+                        continue
+                    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                    logger.info(f"Dropped empty partition {name}")
@@ -1,15 +1,35 @@
 """Authentication service."""
 
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Any, Union
+from typing import Optional, Any, Tuple, Union
 from jose import jwt
+from loguru import logger
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
 from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.utils.cache import TTLCache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+# Verified tokens keyed by SHA-256 of the token: (subject, exp timestamp)
+_token_cache: TTLCache[Tuple[str, float]] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
+# Hash compared against when the user does not exist, so unknown emails
+# cost as much as wrong passwords
+_dummy_hash: Optional[str] = None
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -26,6 +46,34 @@ def create_access_token(
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> Optional[str]:
+    """
+    Verify a JWT access token and return its subject.
+    
+    Successfully verified tokens are cached until they expire, so repeated
+    requests with the same token skip signature verification.
+    
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        subject, expires_at = cached
+        if expires_at > time.time():
+            return subject
+        _token_cache.pop(key)
+    
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    if payload.get("sub") is None:
+        return None
+    subject = str(payload["sub"])
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        _token_cache.set(key, (subject, expires_at), ttl=expires_at - time.time())
+    return subject
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -34,3 +82,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """
+    Check credentials against the local user store.
+    
+    bcrypt runs in the thread pool so a burst of logins does not block the
+    event loop.
+    
+    Returns:
+        The active user, or ``None`` if the credentials are invalid
+    """
+    global _dummy_hash
+    
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    
+    if user is None or not user.is_active:
+        if _dummy_hash is None:
+            _dummy_hash = await run_in_threadpool(get_password_hash, "dummy-password")
+        await run_in_threadpool(verify_password, password, _dummy_hash)
+        return None
+    
+    if not await run_in_threadpool(verify_password, password, user.hashed_password):
+        return None
+    return user
+
+
+async def ensure_first_user() -> None:
+    """Create the configured initial user if it does not exist yet."""
+    if not settings.FIRST_USER_EMAIL or not settings.FIRST_USER_PASSWORD:
+        return
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.id).where(User.email == settings.FIRST_USER_EMAIL))
+        if result.scalar_one_or_none() is not None:
+            return
+        
+        hashed_password = await run_in_threadpool(get_password_hash, settings.FIRST_USER_PASSWORD)
+        db.add(User(email=settings.FIRST_USER_EMAIL, hashed_password=hashed_password))
+        try:
+            await db.commit()
+            logger.info(f"Created initial user {settings.FIRST_USER_EMAIL}")
+        except IntegrityError:
+            # Another worker created it concurrently
+            await db.rollback()
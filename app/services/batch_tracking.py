@@ -0,0 +1,244 @@
+"""Batch tracking: many AWBs per request, stale ones fetched in multi-AWB chunks."""
+
+import asyncio
+import contextvars
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from loguru import logger
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.accounts import ShiprocketAccountRegistry, account_registry
+from app.services.analytics import record_status_change
+from app.services.live_tracking import tracking_broker, tracking_event
+from app.services.shiprocket import BULK, priority_lane
+from app.services.status_buffer import STATUS_TRANSITION, status_buffer, status_params
+from app.services.tracking import normalize_status
+from app.utils import metrics
+
+BATCH_TRACKED = metrics.counter(
+    "tracking_batch_awbs_total",
+    "AWBs answered by batch tracking, by source",
+    ("source",),
+)
+
+# A fetched update waiting to be written: (AWB, status, history, observed at)
+Update = Tuple[str, Optional[str], Any, datetime]
+
+
+def tracking_line(
+    awb_code: str,
+    source: str,
+    current_status: Optional[str] = None,
+    tracking_history: Any = None,
+    tracked_at: Optional[datetime] = None,
+    error: Optional[str] = None,
+) -> bytes:
+    """One NDJSON line of the batch tracking response."""
+    BATCH_TRACKED.inc(source=source)
+    line = {
+        "awb_code": awb_code,
+        "source": source,
+        "current_status": current_status,
+        "tracking_history": tracking_history or [],
+        "tracked_at": tracked_at.isoformat() if tracked_at else None,
+    }
+    if error:
+        line["error"] = error
+    return orjson.dumps(line) + b"\n"
+
+
+def chunked(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BatchTracker:
+    """
+    Track many AWBs at once.
+
+    AWBs whose shipment was tracked within the freshness window are
+    answered from the database right away. The others are grouped by
+    merchant account and fetched from Shiprocket in chunks of
+    ``chunk_size`` AWBs per request, at most ``concurrency`` requests at a
+    time, in the bulk priority lane; each result is streamed as soon as its
+    chunk returns. The fetched updates are then written in one transaction
+    and the status transitions they made are counted in analytics and
+    published to live tracking.
+
+    Fetching and writing run in a task of their own, so a client that
+    disconnects mid-stream does not lose the updates already fetched.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.TRACKING_BATCH_CHUNK_SIZE
+        self.concurrency = concurrency or settings.TRACKING_BATCH_CONCURRENCY
+        self._in_flight: set = set()
+
+    async def stream(
+        self,
+        rows: Sequence[Tuple[Shipment, Order]],
+        awb_codes: List[str],
+        max_age: timedelta,
+        accounts: Optional[ShiprocketAccountRegistry] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield one NDJSON line per AWB: cached ones first, fetched ones as they arrive.
+
+        ``rows`` are the stored shipments (with their orders) of the AWBs
+        that exist locally; AWBs without one are fetched from the default
+        account and not stored.
+        """
+        known = {
+            shipment.awb_code: (shipment, order)
+            for shipment, order in rows
+            if shipment.awb_code is not None
+        }
+        cutoff = datetime.utcnow() - max_age
+        stale: Dict[Optional[str], List[str]] = defaultdict(list)
+
+        for awb_code in awb_codes:
+            shipment, order = known.get(awb_code, (None, None))
+            if (
+                shipment is not None
+                and shipment.current_status is not None
+                and shipment.last_tracked_at is not None
+                and shipment.last_tracked_at >= cutoff
+            ):
+                yield tracking_line(
+                    awb_code, "cache", shipment.current_status,
+                    shipment.tracking_history, shipment.last_tracked_at,
+                )
+            else:
+                stale[order.tenant_id if order else None].append(awb_code)
+
+        if not stale:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        # Outlives the request if the client disconnects, so it gets none of
+        # the request's context (deadline, statement stats, profiler)
+        task = asyncio.get_running_loop().create_task(
+            self._fetch_all(stale, known, accounts or account_registry, queue),
+            context=contextvars.Context(),
+        )
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+        while (line := await queue.get()) is not None:
+            yield line
+
+    async def _fetch_all(
+        self,
+        stale: Dict[Optional[str], List[str]],
+        known: Dict[str, Tuple[Shipment, Order]],
+        accounts: ShiprocketAccountRegistry,
+        queue: asyncio.Queue,
+    ) -> None:
+        """Fetch every stale AWB, stream the results, then store them; ``None`` ends the stream."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        updates: List[Update] = []
+
+        async def fetch(tenant_id: Optional[str], chunk: List[str]) -> None:
+            async with semaphore:
+                try:
+                    service = await accounts.get(tenant_id)
+                    results = await service.track_shipments(chunk)
+                except Exception as e:
+                    logger.error(f"Batch tracking of {len(chunk)} AWBs failed: {e}")
+                    for awb_code in chunk:
+                        queue.put_nowait(tracking_line(awb_code, "error", error="Tracking failed"))
+                    return
+            updates.extend(self._stream_results(chunk, results, known, queue))
+
+        try:
+            with priority_lane(BULK):
+                await asyncio.gather(*(
+                    fetch(tenant_id, chunk)
+                    for tenant_id, awbs in stale.items()
+                    for chunk in chunked(awbs, self.chunk_size)
+                ))
+            if updates:
+                await self.store(updates, known)
+        except Exception as e:
+            logger.error(f"Storing {len(updates)} batch tracking updates failed: {e}")
+        finally:
+            queue.put_nowait(None)
+
+    @staticmethod
+    def _stream_results(
+        chunk: List[str],
+        results: Dict[str, Dict[str, Any]],
+        known: Dict[str, Tuple[Shipment, Order]],
+        queue: asyncio.Queue,
+    ) -> List[Update]:
+        """Stream one chunk's results and return the updates of stored shipments."""
+        observed_at = datetime.utcnow()
+        updates: List[Update] = []
+        for awb_code in chunk:
+            tracking_data = (results.get(awb_code) or {}).get("tracking_data") or {}
+            current_status = normalize_status(tracking_data.get("shipment_status"))
+            tracking_history = tracking_data.get("shipment_track") or []
+            if current_status is None:
+                queue.put_nowait(tracking_line(
+                    awb_code, "error", error=tracking_data.get("error") or "No tracking data"
+                ))
+                continue
+            if awb_code in known:
+                updates.append((awb_code, current_status, tracking_history, observed_at))
+            queue.put_nowait(tracking_line(
+                awb_code, "shiprocket", current_status, tracking_history, observed_at
+            ))
+        return updates
+
+    async def store(self, updates: List[Update], known: Dict[str, Tuple[Shipment, Order]]) -> None:
+        """
+        Write fetched updates in one transaction, then publish transitions.
+
+        Each row is updated on its own so its previous status comes back
+        from the database: analytics count only the transitions this write
+        actually made, not ones a concurrent tracker already stored, and
+        rows a newer write has superseded are left alone.
+        """
+        transitions = []
+        async with self.session_factory() as db:
+            for awb_code, current_status, tracking_history, observed_at in updates:
+                shipment, order = known[awb_code]
+                result = await db.execute(
+                    STATUS_TRANSITION,
+                    status_params(shipment, current_status, tracking_history, observed_at),
+                )
+                row = result.one_or_none()
+                if row is None or row.previous_status == current_status:
+                    continue
+                await record_status_change(
+                    db, shipment, order, row.previous_status, current_status, observed_at
+                )
+                transitions.append((awb_code, current_status, observed_at))
+            await db.commit()
+
+        for awb_code, _, _, _ in updates:
+            status_buffer.discard(known[awb_code][0].id)
+        for awb_code, current_status, observed_at in transitions:
+            await tracking_broker.publish(
+                awb_code, tracking_event(awb_code, current_status, observed_at)
+            )
+
+    async def drain(self) -> None:
+        """Wait for in-flight fetches and writes, e.g. on shutdown."""
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+
+# Shared per-worker tracker so shutdown can wait for its writes
+batch_tracker = BatchTracker()
@@ -0,0 +1,394 @@
+"""Batched order fulfilment pipeline (order -> AWB -> label -> pickup)."""
+
+import asyncio
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from loguru import logger
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.fulfilment import FulfilmentItem
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.accounts import ShiprocketAccountRegistry, account_registry
+from app.services.analytics import record_awb_assigned
+from app.services.pickup import PickupScheduler, pickup_scheduler
+from app.services.shiprocket import BULK, priority_lane
+from app.utils.batching import KeyedMicroBatcher, MicroBatcher
+
+STAGES = ("create_order", "assign_awb", "generate_label", "schedule_pickup", "done")
+
+# (item id, local shipment id, Shiprocket shipment id, tenant id, pickup location)
+BatchEntry = Tuple[int, int, int, Optional[str], str]
+
+
+class FulfilmentError(Exception):
+    """Raised when an upstream response does not allow an order to advance."""
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over an item whose lease expired."""
+
+
+class FulfilmentPipeline:
+    """
+    Staged, concurrent fulfilment workflow.
+
+    Every order advances through the stages on its own: order creation and
+    AWB assignment run per order under a shared concurrency limit, while
+    label generation and pickup scheduling are micro-batched across all
+    orders of the same merchant that reach those stages at about the same
+    time. The next stage of
+    each item is committed after every transition, so an interrupted item is
+    picked up again by ``resume_stalled``. A resumed item that has not
+    recorded its upstream order yet first looks it up by its channel order
+    ID, since the interrupted attempt may have created it.
+
+    Claimed items are leased to the pipeline's ``owner``, which renews the
+    lease while they are in flight, including while they wait for a slot or
+    a batch; only items whose lease has expired are resumed.
+    """
+
+    def __init__(
+        self,
+        accounts: Optional[ShiprocketAccountRegistry] = None,
+        pickups: Optional[PickupScheduler] = None,
+        session_factory=AsyncSessionLocal,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_delay: Optional[float] = None,
+    ):
+        self.accounts = accounts or account_registry
+        self.pickups = pickups or pickup_scheduler
+        self.session_factory = session_factory
+        self.owner = f"{socket.gethostname()[:40]}-{uuid.uuid4().hex[:12]}"
+        self._lost: Set[int] = set()
+        self._semaphore = asyncio.Semaphore(concurrency or settings.FULFILMENT_CONCURRENCY)
+        self._label_batcher: KeyedMicroBatcher[Optional[str], BatchEntry, str] = KeyedMicroBatcher(
+            self._generate_labels,
+            max_size=batch_size or settings.FULFILMENT_BATCH_SIZE,
+            max_delay=batch_delay or settings.FULFILMENT_BATCH_DELAY_SECONDS,
+        )
+        self._pickup_batcher: MicroBatcher[BatchEntry, None] = MicroBatcher(
+            self._schedule_pickups,
+            max_size=batch_size or settings.FULFILMENT_BATCH_SIZE,
+            max_delay=batch_delay or settings.FULFILMENT_BATCH_DELAY_SECONDS,
+        )
+
+    async def run(self, item_ids: List[int]) -> None:
+        """Claim pending items and drive each of them to completion."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(FulfilmentItem)
+                .where(FulfilmentItem.id.in_(item_ids), FulfilmentItem.status == "pending")
+                .values(status="in_progress", owner=self.owner, claimed_at=datetime.utcnow())
+                .returning(FulfilmentItem.id)
+            )
+            claimed = list(result.scalars().all())
+            await db.commit()
+
+        await self._advance_all(claimed, resumed=False)
+
+    async def resume_stalled(self) -> int:
+        """
+        Resume items whose worker is gone.
+
+        An item in flight is resumed once its lease has not been renewed for
+        ``FULFILMENT_STALE_AFTER_SECONDS``; items never claimed are resumed
+        after that long without an update. Items are claimed atomically, so
+        several workers can call this at the same time without processing an
+        item twice.
+
+        Returns:
+            Number of resumed items
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.FULFILMENT_STALE_AFTER_SECONDS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(FulfilmentItem)
+                .where(
+                    FulfilmentItem.status.in_(["pending", "in_progress"]),
+                    or_(
+                        FulfilmentItem.claimed_at < cutoff,
+                        and_(
+                            FulfilmentItem.claimed_at.is_(None),
+                            FulfilmentItem.updated_at < cutoff,
+                        ),
+                    ),
+                )
+                .values(status="in_progress", owner=self.owner, claimed_at=now)
+                .returning(FulfilmentItem.id)
+            )
+            claimed = list(result.scalars().all())
+            await db.commit()
+
+        if claimed:
+            logger.info(f"Resuming {len(claimed)} stalled fulfilment items")
+            await self._advance_all(claimed, resumed=True)
+        return len(claimed)
+
+    async def _advance_all(self, item_ids: List[int], resumed: bool) -> None:
+        """Load claimed items and advance them concurrently."""
+        if not item_ids:
+            return
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(FulfilmentItem)
+                .where(FulfilmentItem.id.in_(item_ids))
+                .options(
+                    selectinload(FulfilmentItem.batch),
+                    selectinload(FulfilmentItem.order),
+                    selectinload(FulfilmentItem.shipment),
+                )
+            )
+            items = result.scalars().all()
+
+        heartbeat = asyncio.create_task(self._renew_leases(item_ids))
+        try:
+            # Batch work must not starve interactive upstream calls
+            with priority_lane(BULK):
+                await asyncio.gather(*(self._advance(item, resumed) for item in items))
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            self._lost.difference_update(item_ids)
+
+    async def _renew_leases(self, item_ids: List[int]) -> None:
+        """
+        Renew the lease on claimed items until cancelled.
+
+        Items whose lease another worker has taken over are recorded in
+        ``_lost``, so that they are not advanced any further here.
+        """
+        interval = settings.FULFILMENT_STALE_AFTER_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self.session_factory() as db:
+                    result = await db.execute(
+                        update(FulfilmentItem)
+                        .where(FulfilmentItem.id.in_(item_ids), FulfilmentItem.owner == self.owner)
+                        .values(claimed_at=datetime.utcnow())
+                        .returning(FulfilmentItem.id)
+                    )
+                    renewed = set(result.scalars().all())
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Renewing fulfilment leases failed: {e}")
+                continue
+            self._lost.update(set(item_ids) - renewed)
+
+    def _check_lease(self, item_id: int) -> None:
+        if item_id in self._lost:
+            raise LeaseLost(f"Fulfilment item {item_id} was taken over by another worker")
+
+    async def _advance(self, item: FulfilmentItem, resumed: bool) -> None:
+        """Run the remaining stages of one item, recording any failure."""
+        stage = item.stage
+        shipment_pk = item.shipment_id
+        shiprocket_shipment_id = item.shipment.shiprocket_shipment_id if item.shipment else None
+        tenant_id = item.order.tenant_id
+        pickup_location = item.order.pickup_location
+
+        try:
+            if stage == "create_order":
+                async with self._semaphore:
+                    self._check_lease(item.id)
+                    shipment_pk, shiprocket_shipment_id = await self._create_order(item, resumed)
+                stage = "assign_awb"
+
+            if shipment_pk is None or shiprocket_shipment_id is None:
+                raise FulfilmentError(f"No shipment recorded before {stage}")
+
+            if stage == "assign_awb":
+                async with self._semaphore:
+                    self._check_lease(item.id)
+                    await self._assign_awb(item, shipment_pk, shiprocket_shipment_id)
+                stage = "generate_label"
+
+            if stage == "generate_label":
+                self._check_lease(item.id)
+                await self._label_batcher.submit(
+                    tenant_id,
+                    (item.id, shipment_pk, shiprocket_shipment_id, tenant_id, pickup_location)
+                )
+                stage = "schedule_pickup"
+
+            if stage == "schedule_pickup":
+                self._check_lease(item.id)
+                await self._pickup_batcher.submit(
+                    (item.id, shipment_pk, shiprocket_shipment_id, tenant_id, pickup_location)
+                )
+
+        except LeaseLost as e:
+            logger.warning(f"{e}; stopped at {stage}")
+        except Exception as e:
+            logger.error(f"Fulfilment item {item.id} failed at {stage}: {e}")
+            await self._mark_failed(item.id, str(e))
+
+    async def _create_order(self, item: FulfilmentItem, resumed: bool) -> Tuple[int, int]:
+        """Submit the order upstream, unless a resumed item finds it there, and record it."""
+        service = await self.accounts.get(item.order.tenant_id)
+        response = await service.find_order(item.payload["order_id"]) if resumed else None
+        if response is None:
+            response = await service.create_order(item.payload)
+        else:
+            logger.info(f"Fulfilment item {item.id} reuses upstream order {response['order_id']}")
+
+        shiprocket_shipment_id = response.get("shipment_id")
+        if not shiprocket_shipment_id:
+            raise FulfilmentError("Shiprocket did not return a shipment_id")
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Order)
+                .where(Order.id == item.order_id)
+                .values(shiprocket_order_id=response.get("order_id"), status="submitted")
+            )
+            shipment = Shipment(
+                order_id=item.order_id,
+                shiprocket_shipment_id=shiprocket_shipment_id,
+                status="created"
+            )
+            db.add(shipment)
+            await db.flush()
+            await db.execute(
+                update(FulfilmentItem)
+                .where(FulfilmentItem.id == item.id)
+                .values(shipment_id=shipment.id, stage="assign_awb")
+            )
+            await db.commit()
+
+        return shipment.id, shiprocket_shipment_id
+
+    async def _assign_awb(
+        self,
+        item: FulfilmentItem,
+        shipment_pk: int,
+        shiprocket_shipment_id: int,
+    ) -> None:
+        """Assign an AWB to one shipment."""
+        service = await self.accounts.get(item.order.tenant_id)
+        response = await service.assign_awb(shiprocket_shipment_id, item.batch.courier_id)
+        data = response.get("response", {}).get("data", {})
+        if not data.get("awb_code"):
+            raise FulfilmentError("Shiprocket did not return an awb_code")
+
+        async with self.session_factory() as db:
+            # Locked, so a retried or concurrent assignment is counted once
+            previous_awb = await db.scalar(
+                select(Shipment.awb_code).where(Shipment.id == shipment_pk).with_for_update()
+            )
+            await db.execute(
+                update(Shipment)
+                .where(Shipment.id == shipment_pk)
+                .values(
+                    awb_code=data.get("awb_code"),
+                    courier_id=data.get("courier_company_id"),
+                    courier_name=data.get("courier_name"),
+                    status="awb_assigned",
+                )
+            )
+            await record_awb_assigned(db, data.get("courier_name"), item.order, previous_awb)
+            await db.execute(
+                update(FulfilmentItem)
+                .where(FulfilmentItem.id == item.id)
+                .values(stage="generate_label")
+            )
+            await db.commit()
+
+    async def _generate_labels(
+        self, tenant_id: Optional[str], entries: List[BatchEntry]
+    ) -> List[str]:
+        """Generate one label document for a micro-batch of one merchant's shipments."""
+        service = await self.accounts.get(tenant_id)
+        # Batches are flushed in a context of their own, outside _advance_all's lane
+        with priority_lane(BULK):
+            response = await service.generate_label([entry[2] for entry in entries])
+        label_url = response.get("label_url")
+        if not label_url:
+            raise FulfilmentError("Shiprocket did not return a label_url")
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Shipment)
+                .where(Shipment.id.in_([entry[1] for entry in entries]))
+                .values(label_url=label_url, status="label_generated")
+            )
+            await db.execute(
+                update(FulfilmentItem)
+                .where(FulfilmentItem.id.in_([entry[0] for entry in entries]))
+                .values(stage="schedule_pickup")
+            )
+            await db.commit()
+
+        return [label_url] * len(entries)
+
+    async def _schedule_pickups(
+        self, entries: List[BatchEntry]
+    ) -> List[Optional[BaseException]]:
+        """
+        Schedule pickup for a micro-batch of shipments, one request per location.
+
+        A location whose request fails fails only its own entries; the
+        others are recorded as scheduled.
+        """
+        locations: Dict[Tuple[Optional[str], str], List[int]] = defaultdict(list)
+        for entry in entries:
+            locations[(entry[3], entry[4])].append(entry[2])
+        with priority_lane(BULK):
+            responses = await asyncio.gather(
+                *(
+                    self.pickups.schedule(tenant_id, location, ids)
+                    for (tenant_id, location), ids in locations.items()
+                ),
+                return_exceptions=True,
+            )
+        errors: Dict[Tuple[Optional[str], str], BaseException] = {
+            key: response
+            for key, response in zip(locations, responses)
+            if isinstance(response, BaseException)
+        }
+        scheduled = [entry for entry in entries if (entry[3], entry[4]) not in errors]
+
+        if scheduled:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(Shipment)
+                    .where(Shipment.id.in_([entry[1] for entry in scheduled]))
+                    .values(pickup_scheduled=True, status="pickup_scheduled")
+                )
+                await db.execute(
+                    update(FulfilmentItem)
+                    .where(FulfilmentItem.id.in_([entry[0] for entry in scheduled]))
+                    .values(stage="done", status="completed")
+                )
+                await db.commit()
+
+        return [errors.get((entry[3], entry[4])) for entry in entries]
+
+    async def _mark_failed(self, item_id: int, error: str) -> None:
+        """Record a failed item; its stage is left at the one that failed."""
+        async with self.session_factory() as db:
+            await db.execute(
+                update(FulfilmentItem)
+                .where(FulfilmentItem.id == item_id)
+                .values(status="failed", error=error[:2000])
+            )
+            await db.commit()
+
+
+# Shared per-worker pipeline so micro-batches span concurrent submissions
+pipeline = FulfilmentPipeline()
+
+
+async def run_fulfilment(item_ids: List[int]) -> None:
+    """Background task entry point for a freshly submitted batch."""
+    await pipeline.run(item_ids)
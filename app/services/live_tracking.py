@@ -0,0 +1,200 @@
+"""Live tracking updates fanned out through Redis pub/sub."""
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+from loguru import logger
+from redis import asyncio as aioredis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+CHANNEL_PREFIX = "tracking:"
+
+
+def channel_for(awb_code: str) -> str:
+    """Redis channel carrying updates for one AWB."""
+    return f"{CHANNEL_PREFIX}{awb_code}"
+
+
+def tracking_event(
+    awb_code: str, status: Optional[str], at: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Payload published for a tracking status change."""
+    return {
+        "awb_code": awb_code,
+        "status": status,
+        "updated_at": (at or datetime.utcnow()).isoformat(),
+    }
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an update as a server-sent event."""
+    return f"event: tracking\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class Subscription:
+    """
+    Updates for a set of AWBs delivered to one client.
+
+    The queue is small: a slow client only needs the latest statuses, so
+    when it is full the oldest update is dropped.
+    """
+
+    def __init__(self, awb_codes: Iterable[str], maxsize: Optional[int] = None):
+        self.awb_codes = frozenset(awb_codes)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize or settings.TRACKING_STREAM_QUEUE_SIZE)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next update, or ``None`` if none arrived within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TrackingBroker:
+    """
+    Per-worker fan-out of tracking updates.
+
+    Every worker holds one Redis connection for publishing and one pub/sub
+    connection subscribed to the channels of the AWBs its clients watch; a
+    single reader task dispatches messages to the local subscriptions. A
+    worker therefore pays one Redis subscription per watched AWB, not per
+    client, and an idle client costs only its ``Subscription``. Updates
+    published by any worker reach subscribers on every worker.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self._redis: Optional[aioredis.Redis] = None
+        self._pubsub: Optional[PubSub] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = asyncio.Lock()
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url, socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS
+            )
+        return self._redis
+
+    async def publish(self, awb_code: str, event: Dict[str, Any]) -> None:
+        """Publish an update; failures are logged, never raised to the caller."""
+        try:
+            await self.redis.publish(channel_for(awb_code), json.dumps(event, default=str))
+        except RedisError as e:
+            logger.warning(f"Could not publish tracking update for {awb_code}: {e}")
+
+    async def subscribe(self, awb_codes: Iterable[str]) -> Subscription:
+        """
+        Start receiving updates for ``awb_codes``.
+
+        Raises:
+            RedisError: If the channels could not be subscribed
+        """
+        subscription = Subscription(awb_codes)
+        async with self._lock:
+            new_channels = [
+                channel_for(awb_code) for awb_code in subscription.awb_codes
+                if not self._subscribers.get(awb_code)
+            ]
+            if new_channels:
+                if self._pubsub is None:
+                    self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(*new_channels)
+
+            for awb_code in subscription.awb_codes:
+                self._subscribers[awb_code].add(subscription)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop a subscription, releasing channels nobody else watches."""
+        async with self._lock:
+            idle_channels = []
+            for awb_code in subscription.awb_codes:
+                subscribers = self._subscribers.get(awb_code)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[awb_code]
+                    idle_channels.append(channel_for(awb_code))
+
+            if idle_channels and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*idle_channels)
+                except RedisError as e:
+                    logger.warning(f"Could not unsubscribe from tracking channels: {e}")
+
+    def dispatch(self, channel: str, data: Any) -> None:
+        """Deliver one pub/sub message to the local subscribers of its AWB."""
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        subscribers = self._subscribers.get(channel[len(CHANNEL_PREFIX):])
+        if not subscribers:
+            return
+        try:
+            event = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed tracking update on {channel}")
+            return
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    async def _read(self) -> None:
+        """Dispatch messages until no channel is watched, reconnecting on errors."""
+        while self._subscribers and self._pubsub is not None:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except (RedisError, OSError) as e:
+                logger.warning(f"Tracking pub/sub connection lost: {e}")
+                await asyncio.sleep(1)
+                await self._resubscribe()
+                continue
+            if message and message["type"] == "message":
+                self.dispatch(message["channel"], message["data"])
+
+    async def _resubscribe(self) -> None:
+        """Open a fresh pub/sub connection for every watched AWB."""
+        async with self._lock:
+            old, self._pubsub = self._pubsub, self.redis.pubsub(ignore_subscribe_messages=True)
+            if old is not None:
+                try:
+                    await old.aclose()
+                except RedisError:
+                    pass
+            channels = [channel_for(awb_code) for awb_code in self._subscribers]
+            if channels:
+                try:
+                    await self._pubsub.subscribe(*channels)
+                except RedisError as e:
+                    logger.warning(f"Tracking pub/sub resubscribe failed: {e}")
+
+    async def aclose(self) -> None:
+        """Stop the reader and close the Redis connections."""
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+tracking_broker = TrackingBroker()
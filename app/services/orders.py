@@ -0,0 +1,30 @@
+"""Order persistence helpers."""
+
+from datetime import datetime
+from app.models.order import Order
+from app.schemas.order import OrderCreate
+
+
+def build_order(order_data: OrderCreate, status: str = "created") -> Order:
+    """Build an ``Order`` row from a validated create payload."""
+    return Order(
+        order_id=order_data.order_id,
+        tenant_id=order_data.tenant_id,
+        order_date=datetime.strptime(order_data.order_date, "%Y-%m-%d"),
+        pickup_location=order_data.pickup_location,
+        billing_customer_name=order_data.billing_customer_name,
+        billing_city=order_data.billing_city,
+        billing_pincode=order_data.billing_pincode,
+        billing_state=order_data.billing_state,
+        billing_country=order_data.billing_country,
+        billing_phone=order_data.billing_phone,
+        billing_email=order_data.billing_email,
+        billing_address=order_data.billing_address,
+        order_items=[item.model_dump() for item in order_data.order_items],
+        payment_method=order_data.payment_method,
+        weight=order_data.weight,
+        length=order_data.length,
+        breadth=order_data.breadth,
+        height=order_data.height,
+        status=status
+    )
@@ -0,0 +1,98 @@
+"""Coalescing pickup scheduler."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.services.accounts import ShiprocketAccountRegistry, account_registry
+from app.utils.batching import KeyedMicroBatcher
+
+# (tenant id, pickup location name)
+PickupKey = Tuple[Optional[str], str]
+
+
+class PickupScheduler:
+    """
+    Coalesce pickup requests per merchant and pickup location.
+
+    Requests for the same tenant and pickup location are buffered until
+    ``max_size`` requests are waiting or ``max_delay`` seconds have passed,
+    then sent to Shiprocket as a single ``/courier/generate/pickup`` call.
+    Every caller receives the upstream response of the call its shipments
+    were part of. When Shiprocket rejects a coalesced call, each caller's
+    shipments are retried on their own, so one rejected shipment fails
+    only the request it came from.
+    """
+
+    def __init__(
+        self,
+        accounts: Optional[ShiprocketAccountRegistry] = None,
+        max_size: Optional[int] = None,
+        max_delay: Optional[float] = None,
+    ):
+        self.accounts = accounts or account_registry
+        self._batcher: KeyedMicroBatcher[PickupKey, List[int], Dict[str, Any]] = KeyedMicroBatcher(
+            self._flush,
+            max_size=max_size or settings.PICKUP_COALESCE_MAX_REQUESTS,
+            max_delay=max_delay or settings.PICKUP_COALESCE_WINDOW_SECONDS,
+        )
+
+    async def schedule(
+        self,
+        tenant_id: Optional[str],
+        pickup_location: str,
+        shipment_ids: List[int],
+    ) -> Dict[str, Any]:
+        """
+        Schedule pickup for shipments sharing a pickup location.
+        
+        Args:
+            tenant_id: Merchant owning the shipments (None: default account)
+            pickup_location: Pickup location name of the shipments
+            shipment_ids: List of Shiprocket shipment IDs
+            
+        Returns:
+            Pickup scheduling response of the coalesced upstream call
+        """
+        return await self._batcher.submit((tenant_id, pickup_location), shipment_ids)
+
+    async def _flush(
+        self, key: PickupKey, groups: List[List[int]]
+    ) -> Sequence[Union[Dict[str, Any], BaseException]]:
+        """Send one upstream pickup request for all buffered groups."""
+        tenant_id, pickup_location = key
+        shipment_ids = list(dict.fromkeys(sid for group in groups for sid in group))
+        logger.info(
+            f"Scheduling pickup at {pickup_location} for {len(shipment_ids)} shipments "
+            f"from {len(groups)} requests"
+        )
+        service = await self.accounts.get(tenant_id)
+        try:
+            response = await service.schedule_pickup(shipment_ids)
+        except httpx.HTTPStatusError as e:
+            if len(groups) == 1 or e.response.status_code >= 500:
+                raise
+            logger.warning(
+                f"Coalesced pickup at {pickup_location} rejected ({e.response.status_code}), "
+                f"retrying its {len(groups)} requests separately"
+            )
+            results: List[Union[Dict[str, Any], BaseException]] = await asyncio.gather(
+                *(service.schedule_pickup(group) for group in groups), return_exceptions=True
+            )
+            return results
+        return [response] * len(groups)
+
+    async def drain(self) -> None:
+        """Flush all buffered requests, e.g. on shutdown."""
+        await self._batcher.drain()
+
+    def __len__(self) -> int:
+        """Pickup locations with requests waiting or in flight."""
+        return len(self._batcher)
+
+
+# Shared per-worker scheduler so concurrent callers coalesce
+pickup_scheduler = PickupScheduler()
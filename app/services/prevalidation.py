@@ -0,0 +1,207 @@
+"""Local checks of orders against cached account data, before calling Shiprocket."""
+
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.schemas.order import OrderCreate
+from app.services.accounts import ShiprocketAccountRegistry, UnknownAccountError
+from app.services.rates import weight_slab
+from app.services.shiprocket import ShiprocketService, shiprocket_service
+from app.services.warmup import warmup_state
+from app.utils import metrics
+
+PREVALIDATION_REJECTIONS = metrics.counter(
+    "order_prevalidation_rejections_total",
+    "Orders rejected locally before reaching Shiprocket",
+    ("reason",),
+)
+
+# (account, pickup PIN code, delivery PIN code, weight slab in grams)
+Lane = Tuple[str, str, str, int]
+
+
+class PickupLocationCache:
+    """
+    Pickup location names and PIN codes per merchant account.
+
+    An account's locations are fetched on first use and again once they
+    are ``refresh_seconds`` old, one fetch at a time per account. When a
+    fetch fails the previous list (or none) is kept for ``retry_seconds``.
+    """
+
+    def __init__(
+        self, refresh_seconds: Optional[float] = None, retry_seconds: Optional[float] = None
+    ):
+        self.refresh_seconds = refresh_seconds or settings.PICKUP_LOCATIONS_REFRESH_SECONDS
+        self.retry_seconds = retry_seconds or settings.PICKUP_LOCATIONS_RETRY_SECONDS
+        # tenant id -> (expires at, {location name: PIN code})
+        self._entries: Dict[Optional[str], Tuple[float, Optional[Dict[str, str]]]] = {}
+        self._locks: Dict[Optional[str], asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get(
+        self, tenant_id: Optional[str], service: ShiprocketService
+    ) -> Optional[Dict[str, str]]:
+        """Locations of the tenant's account, or None when they could not be fetched yet."""
+        entry = self._entries.get(tenant_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        async with self._locks[tenant_id]:
+            entry = self._entries.get(tenant_id)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            try:
+                addresses = await service.get_pickup_locations()
+                locations = {
+                    str(address["pickup_location"]): str(address.get("pin_code") or "")
+                    for address in addresses
+                    if address.get("pickup_location")
+                }
+                self._entries[tenant_id] = (time.monotonic() + self.refresh_seconds, locations)
+            except Exception as e:
+                logger.warning(
+                    f"Could not refresh pickup locations of account {tenant_id or 'default'}: {e}"
+                )
+                stale = entry[1] if entry is not None else None
+                self._entries[tenant_id] = (time.monotonic() + self.retry_seconds, stale)
+            return self._entries[tenant_id][1]
+
+    def invalidate(self, tenant_id: Optional[str]) -> None:
+        """Refetch on next use, e.g. after a location was added."""
+        self._entries.pop(tenant_id, None)
+
+
+class UnserviceableLanes:
+    """
+    Lanes for which a prepaid serviceability check recently found no courier.
+
+    Kept per weight slab (see ``app.services.rates.weight_slab``), since
+    couriers serve a lane up to a weight limit. LRU, with expiry.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.UNSERVICEABLE_LANE_TTL_SECONDS
+        self.max_size = max_size or settings.UNSERVICEABLE_LANE_CACHE_SIZE
+        self._lanes: "OrderedDict[Lane, float]" = OrderedDict()
+
+    def add(self, lane: Lane) -> None:
+        self._lanes[lane] = time.monotonic() + self.ttl_seconds
+        self._lanes.move_to_end(lane)
+        while len(self._lanes) > self.max_size:
+            self._lanes.popitem(last=False)
+
+    def discard(self, lane: Lane) -> None:
+        self._lanes.pop(lane, None)
+
+    def __contains__(self, lane: Lane) -> bool:
+        expires = self._lanes.get(lane)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._lanes[lane]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+
+class OrderPrevalidator:
+    """
+    Reject orders Shiprocket would refuse, without calling it.
+
+    Checks that the pickup location exists on the account and that the
+    lane from its PIN code to the delivery PIN code was not recently found
+    unserviceable at the order's weight slab. Static checks (PIN code
+    format, dimensions, weight) are done by ``OrderCreate`` itself.
+    Anything the caches cannot tell is passed on to Shiprocket: when the
+    locations are unknown, the order is not rejected.
+    """
+
+    def __init__(
+        self,
+        locations: Optional[PickupLocationCache] = None,
+        lanes: Optional[UnserviceableLanes] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.locations = locations or PickupLocationCache()
+        self.lanes = lanes or UnserviceableLanes()
+        self.enabled = settings.ORDER_PREVALIDATION_ENABLED if enabled is None else enabled
+
+    async def problems(self, order_data: OrderCreate, service: ShiprocketService) -> List[str]:
+        """Reasons to reject the order, as ``field: message`` strings; empty if it may be sent."""
+        if not self.enabled:
+            return []
+
+        locations = await self.locations.get(order_data.tenant_id, service)
+        if not locations:
+            return []
+
+        pickup_pincode = locations.get(order_data.pickup_location)
+        if pickup_pincode is None:
+            PREVALIDATION_REJECTIONS.inc(reason="pickup_location")
+            return [
+                f"pickup_location: Unknown pickup location '{order_data.pickup_location}'"
+                f" (known: {', '.join(sorted(locations))})"
+            ]
+
+        delivery_pincode = order_data.delivery_pincode
+        slab = weight_slab(order_data.weight)
+        if (order_data.tenant_id or "", pickup_pincode, delivery_pincode, slab) in self.lanes:
+            PREVALIDATION_REJECTIONS.inc(reason="unserviceable")
+            return [f"pincode: No courier serves {pickup_pincode} to {delivery_pincode}"]
+
+        return []
+
+    async def split(
+        self,
+        orders: List[Tuple[int, OrderCreate]],
+        accounts: ShiprocketAccountRegistry,
+    ) -> Tuple[List[Tuple[int, OrderCreate]], List[Dict[str, Any]]]:
+        """Separate sheet rows that pass from per-row errors, in the upload error format."""
+        valid, errors = [], []
+        for row_number, order_data in orders:
+            try:
+                found = await self.problems(order_data, await accounts.get(order_data.tenant_id))
+            except UnknownAccountError as e:
+                found = [f"tenant_id: {e}"]
+            if found:
+                errors.append({"row": row_number, "order_id": order_data.order_id, "errors": found})
+            else:
+                valid.append((row_number, order_data))
+        return valid, errors
+
+    def record_serviceability(
+        self,
+        tenant_id: Optional[str],
+        pickup_postcode: str,
+        delivery_postcode: str,
+        weight: float,
+        cod: int,
+        couriers: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Learn from a serviceability response.
+
+        A prepaid check with no courier marks the lane unserviceable at the
+        weight's slab; any courier clears it.
+        """
+        lane = (tenant_id or "", pickup_postcode, delivery_postcode, weight_slab(weight))
+        if couriers:
+            self.lanes.discard(lane)
+        elif not cod:
+            self.lanes.add(lane)
+
+
+# Shared per-worker caches
+order_prevalidator = OrderPrevalidator()
+
+
+@warmup_state.register
+async def warm_pickup_locations() -> None:
+    """Load the default account's pickup locations before the first order."""
+    await order_prevalidator.locations.get(None, shiprocket_service)
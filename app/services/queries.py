@@ -0,0 +1,126 @@
+"""Filtered list queries for orders and shipments."""
+
+from typing import Any, Dict, List, Optional, Sequence, Type
+from pydantic import BaseModel
+from sqlalchemy import Date, Integer, Select, cast, column, distinct, func, or_, select, true
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.schemas.order import OrderFilters, OrderResponse
+from app.schemas.shipment import ShipmentFilters, ShipmentResponse
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def projection(schema: Type[BaseModel], model: Any) -> List[Any]:
+    """The model columns behind each field of a response schema."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+# Only what the list responses return: the order_items and tracking_history
+# JSON columns are never read for a page of results
+ORDER_LIST_COLUMNS = projection(OrderResponse, Order)
+SHIPMENT_LIST_COLUMNS = projection(ShipmentResponse, Shipment)
+
+
+async def fetch_rows(db: AsyncSession, query: Select) -> List[Dict[str, Any]]:
+    """
+    Run a column projection and return plain dicts.
+
+    No ORM objects are built, so nothing goes through the identity map, and
+    the dicts can be encoded to JSON directly.
+    """
+    result = await db.execute(query)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def filter_orders(query: Select, filters: OrderFilters) -> Select:
+    """Apply the order list filters to any query selecting from ``orders``."""
+    if filters.status:
+        query = query.where(Order.status == filters.status)
+    if filters.tenant_id:
+        query = query.where(Order.tenant_id == filters.tenant_id)
+    if filters.created_from:
+        query = query.where(Order.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.where(Order.created_at < filters.created_to)
+    if filters.billing_pincode:
+        query = query.where(Order.billing_pincode == filters.billing_pincode)
+    if filters.payment_method:
+        query = query.where(Order.payment_method == filters.payment_method)
+    if filters.q:
+        pattern = f"%{escape_like(filters.q)}%"
+        query = query.where(
+            or_(
+                Order.billing_customer_name.ilike(pattern),
+                Order.billing_phone.like(pattern),
+            )
+        )
+    if filters.sku:
+        query = query.where(Order.order_items.contains([{"sku": filters.sku}]))
+
+    return query
+
+
+def order_list_query(filters: OrderFilters, columns: Optional[Sequence[Any]] = None) -> Select:
+    """
+    Build the filtered orders query, newest first.
+
+    Selects ``Order`` entities, or only ``columns`` when given. Every filter
+    is backed by an index declared on ``Order``; the query plan test in
+    ``tests/test_query_plans.py`` keeps it that way.
+    """
+    query = filter_orders(select(*columns) if columns else select(Order), filters)
+    return query.order_by(Order.created_at.desc())
+
+
+def sku_units_query(sku: str, filters: OrderFilters) -> Select:
+    """
+    Orders and units of ``sku`` per day, oldest day first.
+
+    The containment filter narrows the orders through the ``order_items``
+    GIN index; only their items are then unnested and summed.
+    """
+    item = func.jsonb_array_elements(Order.order_items).table_valued(
+        column("value", JSONB)
+    ).alias("item")
+    day = cast(Order.created_at, Date).label("day")
+
+    query = (
+        select(
+            day,
+            func.count(distinct(Order.id)).label("orders"),
+            func.sum(item.c.value["units"].astext.cast(Integer)).label("units"),
+        )
+        .select_from(Order)
+        .join(item, true())
+        .where(item.c.value["sku"].astext == sku)
+    )
+    query = filter_orders(query, filters.model_copy(update={"sku": sku}))
+    return query.group_by(day).order_by(day)
+
+
+def shipment_list_query(
+    filters: ShipmentFilters, columns: Optional[Sequence[Any]] = None
+) -> Select:
+    """Build the filtered shipments query, newest first (entities or ``columns``)."""
+    query = select(*columns) if columns else select(Shipment)
+
+    if filters.status:
+        query = query.where(Shipment.status == filters.status)
+    if filters.created_from:
+        query = query.where(Shipment.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.where(Shipment.created_at < filters.created_to)
+    if filters.courier_name:
+        query = query.where(Shipment.courier_name == filters.courier_name)
+    if filters.awb_prefix:
+        query = query.where(Shipment.awb_code.like(f"{escape_like(filters.awb_prefix)}%"))
+
+    return query.order_by(Shipment.created_at.desc())
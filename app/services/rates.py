@@ -0,0 +1,259 @@
+"""Courier rate history: quotes from serviceability responses, downsampled over time."""
+
+import math
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.rates import Courier, CourierRateQuote
+
+LATEST_QUOTE_SQL = """
+    SELECT q.observed_at, u.courier_id, c.name AS courier_name, u.rate, u.eta
+    FROM (
+        SELECT * FROM courier_rate_quotes
+        WHERE account = :account AND pickup_postcode = :pickup AND delivery_postcode = :delivery
+          AND weight_slab = :slab AND cod = :cod AND observed_at >= :since
+        ORDER BY observed_at DESC
+        LIMIT 1
+    ) q
+    CROSS JOIN unnest(q.courier_ids, q.rates, q.etas) AS u(courier_id, rate, eta)
+    LEFT JOIN couriers c ON c.id = u.courier_id
+    ORDER BY u.rate
+"""
+
+# Moves raw quotes older than the cutoff into the daily summary atomically
+DOWNSAMPLE_SQL = """
+    WITH moved AS (
+        DELETE FROM courier_rate_quotes WHERE observed_at < :cutoff
+        RETURNING observed_at, account, pickup_postcode, delivery_postcode, weight_slab, cod,
+                  courier_ids, rates, etas
+    )
+    INSERT INTO courier_rate_daily AS d
+        (day, account, lane, weight_slab, cod, courier_id,
+         samples, rate_min, rate_max, rate_sum, eta_sum)
+    SELECT moved.observed_at::date, moved.account,
+           moved.pickup_postcode || '>' || left(moved.delivery_postcode, 3),
+           moved.weight_slab, moved.cod, u.courier_id,
+           count(*), min(u.rate), max(u.rate), sum(u.rate), sum(u.eta)
+    FROM moved
+    CROSS JOIN unnest(moved.courier_ids, moved.rates, moved.etas) AS u(courier_id, rate, eta)
+    GROUP BY 1, 2, 3, 4, 5, 6
+    ON CONFLICT (day, account, lane, weight_slab, cod, courier_id) DO UPDATE SET
+        samples = d.samples + EXCLUDED.samples,
+        rate_min = least(d.rate_min, EXCLUDED.rate_min),
+        rate_max = greatest(d.rate_max, EXCLUDED.rate_max),
+        rate_sum = d.rate_sum + EXCLUDED.rate_sum,
+        eta_sum = d.eta_sum + EXCLUDED.eta_sum
+"""
+
+# Daily summaries plus raw quotes not yet downsampled
+RATE_TREND_SQL = """
+    SELECT s.day, s.courier_id, c.name AS courier_name,
+           sum(s.samples) AS samples,
+           min(s.rate_min) AS rate_min,
+           max(s.rate_max) AS rate_max,
+           sum(s.rate_sum) / sum(s.samples) AS rate_avg,
+           sum(s.eta_sum) / sum(s.samples) AS eta_avg
+    FROM (
+        SELECT day, courier_id, samples, rate_min, rate_max, rate_sum, eta_sum
+        FROM courier_rate_daily
+        WHERE account = :account AND lane = :lane AND weight_slab = :slab AND cod = :cod
+          AND day BETWEEN :start AND :end
+        UNION ALL
+        SELECT q.observed_at::date, u.courier_id, 1, u.rate, u.rate, u.rate, u.eta
+        FROM courier_rate_quotes q
+        CROSS JOIN unnest(q.courier_ids, q.rates, q.etas) AS u(courier_id, rate, eta)
+        WHERE q.account = :account AND q.pickup_postcode = :pickup
+          AND left(q.delivery_postcode, 3) = :district AND q.weight_slab = :slab
+          AND q.cod = :cod AND q.observed_at >= :start_at AND q.observed_at < :end_at
+    ) s
+    LEFT JOIN couriers c ON c.id = s.courier_id
+    WHERE CAST(:courier_id AS integer) IS NULL OR s.courier_id = :courier_id
+    GROUP BY s.day, s.courier_id, c.name
+    ORDER BY s.day, rate_avg
+"""
+
+
+def weight_slab(weight: float) -> int:
+    """Weight in grams rounded up to the billing slab."""
+    slab = settings.RATE_WEIGHT_SLAB_GRAMS
+    return max(1, math.ceil(round(weight * 1000) / slab)) * slab
+
+
+def rate_lane(pickup_postcode: str, delivery_postcode: str) -> str:
+    """Lane of the daily summaries: pickup pincode to the delivery sorting district."""
+    return f"{pickup_postcode}>{delivery_postcode[:3]}"
+
+
+def account_key(tenant_id: Optional[str]) -> str:
+    """Account column value: the tenant id, or "" for the default account."""
+    return tenant_id or ""
+
+
+def parse_quotes(couriers: List[Dict[str, Any]]) -> List[Tuple[int, str, float, int]]:
+    """``(courier id, name, rate, ETA days)`` of every well-formed courier entry."""
+    quotes = []
+    for courier in couriers:
+        try:
+            quotes.append((
+                int(courier["courier_company_id"]),
+                str(courier.get("courier_name") or ""),
+                float(courier["rate"]),
+                int(float(courier.get("estimated_delivery_days") or 0)),
+            ))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return quotes
+
+
+class RateHistory:
+    """
+    Keep every serviceability quote and answer from recent ones.
+
+    Quotes are stored raw (one array-backed row per response) for
+    ``RATE_RAW_RETENTION_DAYS`` and then folded into per-day summaries by
+    ``downsample``, so history grows with lanes and days, not with traffic.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._known_couriers: Dict[int, str] = {}
+
+    async def record(
+        self,
+        pickup_postcode: str,
+        delivery_postcode: str,
+        weight: float,
+        cod: int,
+        couriers: List[Dict[str, Any]],
+        tenant_id: Optional[str] = None,
+        observed_at: Optional[datetime] = None,
+    ) -> None:
+        """Store one serviceability response; errors are logged, never raised."""
+        quotes = parse_quotes(couriers)
+        if not quotes:
+            return
+
+        try:
+            async with self.session_factory() as db:
+                db.add(CourierRateQuote(
+                    observed_at=observed_at or datetime.utcnow(),
+                    account=account_key(tenant_id),
+                    pickup_postcode=pickup_postcode,
+                    delivery_postcode=delivery_postcode,
+                    weight_slab=weight_slab(weight),
+                    cod=bool(cod),
+                    courier_ids=[quote[0] for quote in quotes],
+                    rates=[quote[2] for quote in quotes],
+                    etas=[quote[3] for quote in quotes],
+                ))
+
+                new_names = {
+                    courier_id: name for courier_id, name, _, _ in quotes
+                    if name and self._known_couriers.get(courier_id) != name
+                }
+                if new_names:
+                    stmt = insert(Courier).values(
+                        [{"id": courier_id, "name": name} for courier_id, name in new_names.items()]
+                    )
+                    await db.execute(stmt.on_conflict_do_update(
+                        index_elements=[Courier.id], set_={"name": stmt.excluded.name}
+                    ))
+
+                await db.commit()
+            self._known_couriers.update(new_names)
+        except Exception as e:
+            logger.error(f"Could not record rate quote {pickup_postcode}>{delivery_postcode}: {e}")
+
+    async def latest(
+        self,
+        db: AsyncSession,
+        pickup_postcode: str,
+        delivery_postcode: str,
+        weight: float,
+        cod: int,
+        tenant_id: Optional[str] = None,
+        max_age: Optional[timedelta] = None,
+    ) -> Tuple[Optional[datetime], List[Dict[str, Any]]]:
+        """
+        Couriers of the newest quote for a route, cheapest first.
+
+        Returns ``(None, [])`` when no quote is younger than ``max_age``.
+        """
+        max_age = max_age or timedelta(seconds=settings.RATE_QUOTE_MAX_AGE_SECONDS)
+        result = await db.execute(
+            text(LATEST_QUOTE_SQL),
+            {
+                "account": account_key(tenant_id),
+                "pickup": pickup_postcode,
+                "delivery": delivery_postcode,
+                "slab": weight_slab(weight),
+                "cod": bool(cod),
+                "since": datetime.utcnow() - max_age,
+            },
+        )
+        rows = result.mappings().all()
+        if not rows:
+            return None, []
+
+        couriers = [
+            {
+                "courier_company_id": row["courier_id"],
+                "courier_name": row["courier_name"] or str(row["courier_id"]),
+                "rate": row["rate"],
+                "estimated_delivery_days": row["eta"],
+                "cod": cod,
+            }
+            for row in rows
+        ]
+        return rows[0]["observed_at"], couriers
+
+    async def trend(
+        self,
+        db: AsyncSession,
+        pickup_postcode: str,
+        delivery_postcode: str,
+        weight: float,
+        cod: int,
+        start: date,
+        end: date,
+        tenant_id: Optional[str] = None,
+        courier_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Daily rate and ETA per courier on a lane, from summaries and recent quotes."""
+        result = await db.execute(
+            text(RATE_TREND_SQL),
+            {
+                "account": account_key(tenant_id),
+                "lane": rate_lane(pickup_postcode, delivery_postcode),
+                "pickup": pickup_postcode,
+                "district": delivery_postcode[:3],
+                "slab": weight_slab(weight),
+                "cod": bool(cod),
+                "start": start,
+                "end": end,
+                "start_at": datetime.combine(start, datetime.min.time()),
+                "end_at": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                "courier_id": courier_id,
+            },
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def downsample(self, retention: Optional[timedelta] = None) -> int:
+        """Fold raw quotes past the retention into daily summaries; returns summary rows written."""
+        retention = retention or timedelta(days=settings.RATE_RAW_RETENTION_DAYS)
+        cutoff = datetime.combine(date.today() - retention, datetime.min.time())
+        async with self.session_factory() as db:
+            result = await db.execute(text(DOWNSAMPLE_SQL), {"cutoff": cutoff})
+            await db.commit()
+        rows: int = result.rowcount
+        logger.info(f"Downsampled rate quotes before {cutoff:%Y-%m-%d} into {rows} daily rows")
+        return rows
+
+
+rate_history = RateHistory()
@@ -1,34 +1,252 @@
 """Shiprocket API service."""
 
-from typing import Optional, Dict, Any, List
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Dict, Any, List
 import httpx
 from loguru import logger
 from app.config import settings
+from app.utils import deadline, metrics, profiling
+from app.utils.concurrency import AdaptiveLimit, PriorityLimiter, QueueDeadlineExceeded
+from app.utils.hedging import Hedger
+
+# Priority lanes sharing an account's upstream concurrency
+INTERACTIVE = "interactive"
+BULK = "bulk"
+BACKGROUND = "background"
+
+_lane: ContextVar[str] = ContextVar("shiprocket_lane", default=INTERACTIVE)
+
+QUEUE_SECONDS = metrics.histogram(
+    "shiprocket_queue_seconds",
+    "Time Shiprocket requests waited for a concurrency slot",
+    ["lane"],
+)
+QUEUE_REJECTED = metrics.counter(
+    "shiprocket_queue_rejected_total",
+    "Shiprocket requests that gave up waiting for a concurrency slot",
+    ["lane"],
+)
+CONCURRENCY_LIMIT = metrics.gauge(
+    "shiprocket_concurrency_limit",
+    "Current in-flight request limit per Shiprocket account",
+    ["account"],
+)
+HEDGED_REQUESTS = metrics.counter(
+    "shiprocket_hedged_requests_total",
+    "Hedge requests sent for slow idempotent Shiprocket reads, by whether the hedge won",
+    ["endpoint", "won"],
+)
+
+# Upstream responses meaning "slow down" rather than "bad request"
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+
+@contextmanager
+def priority_lane(lane: str) -> Iterator[None]:
+    """
+    Send Shiprocket requests made in this block (and tasks it spawns) through ``lane``.
+
+    Requests default to the interactive lane; batch and sweep jobs should
+    run under ``BULK`` or ``BACKGROUND`` so they cannot starve user traffic.
+    """
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
 
 
 class ShiprocketService:
-    """Service for interacting with Shiprocket API."""
+    """
+    Service for interacting with Shiprocket API.
+
+    An instance owns a keep-alive ``httpx.AsyncClient``, caches the bearer
+    token and caps the number of in-flight requests for its account, so it
+    is meant to be shared (see ``get_shiprocket_service`` and
+    ``app.services.accounts``) rather than created per request.
+
+    The in-flight cap is shared by weighted priority lanes (see
+    ``priority_lane``); a request that cannot get a slot within its lane's
+    deadline fails with ``httpx.PoolTimeout``. ``max_concurrency`` (the
+    account's budget, at most the connection pool) is the ceiling; unless
+    adaptive concurrency is disabled, the cap starts there and moves below
+    it with the observed upstream latency and overload responses (see
+    ``app.utils.concurrency.AdaptiveLimit``).
+    """
 
-    def __init__(self):
-        self.base_url = settings.SHIPROCKET_BASE_URL
-        self.email = settings.SHIPROCKET_EMAIL
-        self.password = settings.SHIPROCKET_PASSWORD
+    def __init__(
+        self,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        name: str = "default",
+    ):
+        self.name = name
+        self.base_url = base_url or settings.SHIPROCKET_BASE_URL
+        self.email = email or settings.SHIPROCKET_EMAIL
+        self.password = password or settings.SHIPROCKET_PASSWORD
         self._token: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._auth_lock = asyncio.Lock()
+        self._max_connections = max_connections or settings.SHIPROCKET_MAX_CONNECTIONS
+        # The account's budget is a ceiling: adaptation only moves below it
+        self.max_concurrency = min(
+            max_concurrency or settings.SHIPROCKET_MAX_CONCURRENCY, self._max_connections
+        )
+        self._limiter = PriorityLimiter(
+            self.max_concurrency,
+            weights=settings.SHIPROCKET_LANE_WEIGHTS,
+            deadlines=settings.SHIPROCKET_LANE_DEADLINES,
+        )
+        self._adaptive: Optional[AdaptiveLimit] = None
+        if settings.SHIPROCKET_ADAPTIVE_CONCURRENCY:
+            self._adaptive = AdaptiveLimit(
+                self._limiter,
+                min_limit=settings.SHIPROCKET_MIN_CONCURRENCY,
+                max_limit=self.max_concurrency,
+                tolerance=settings.SHIPROCKET_LATENCY_TOLERANCE,
+                window=settings.SHIPROCKET_LATENCY_WINDOW_SECONDS,
+                on_change=lambda limit: CONCURRENCY_LIMIT.set(limit, account=self.name),
+            )
+        CONCURRENCY_LIMIT.set(self._limiter.limit, account=self.name)
+        self._hedgers: Dict[str, Hedger] = {}
+        self.in_flight = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client with a keep-alive connection pool."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=settings.SHIPROCKET_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=min(
+                        self._max_connections, settings.SHIPROCKET_MAX_KEEPALIVE_CONNECTIONS
+                    ),
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        CONCURRENCY_LIMIT.remove(account=self.name)
 
     async def _get_headers(self) -> Dict[str, str]:
         """Get headers with authentication token."""
         if not self._token:
-            await self.authenticate()
-        
+            async with self._auth_lock:
+                if not self._token:
+                    await self.authenticate()
+
         return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self._token}"
         }
 
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request within this account's concurrency budget for the current lane."""
+        lane = _lane.get()
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            async with self._limiter.acquire(lane, timeout=deadline.remaining()):
+                queued = time.monotonic() - started
+                QUEUE_SECONDS.observe(queued, lane=lane)
+                sent = time.perf_counter()
+                try:
+                    return await self._timed_send(method, url, **kwargs)
+                finally:
+                    profiling.record(
+                        "shiprocket",
+                        f"{method} {url.replace(self.base_url, '', 1)}",
+                        sent,
+                        queue_ms=round(queued * 1000, 3),
+                        lane=lane,
+                    )
+        except QueueDeadlineExceeded as e:
+            QUEUE_REJECTED.inc(lane=lane)
+            raise httpx.PoolTimeout(str(e)) from e
+        except deadline.DeadlineExceeded as e:
+            raise httpx.PoolTimeout(str(e)) from e
+        finally:
+            self.in_flight -= 1
+
+    async def _get_hedged(self, endpoint: str, url: str, **kwargs) -> httpx.Response:
+        """
+        GET an idempotent resource, hedging slow calls when enabled.
+
+        Latency percentiles and the hedge budget are kept per ``endpoint``,
+        since tracking and serviceability have different latency profiles.
+        """
+        if not settings.SHIPROCKET_HEDGING_ENABLED:
+            return await self._request("GET", url, **kwargs)
+
+        hedger = self._hedgers.get(endpoint)
+        if hedger is None:
+            hedger = self._hedgers[endpoint] = Hedger(
+                percentile=settings.SHIPROCKET_HEDGE_PERCENTILE,
+                budget_ratio=settings.SHIPROCKET_HEDGE_BUDGET_RATIO,
+                on_hedge=lambda won: HEDGED_REQUESTS.inc(endpoint=endpoint, won=str(won).lower()),
+            )
+        return await hedger.run(lambda: self._request("GET", url, **kwargs))
+
+    async def _timed_send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request and feed its latency to the adaptive limit."""
+        if self._adaptive is None:
+            return await self._send(method, url, **kwargs)
+
+        started = time.monotonic()
+        try:
+            response = await self._send(method, url, **kwargs)
+        except httpx.TimeoutException:
+            left = deadline.remaining()
+            if left is None or left > 0:
+                # Not a drop when the request's own deadline cut the call short
+                self._adaptive.on_sample(time.monotonic() - started, dropped=True)
+            raise
+        except httpx.HTTPStatusError as e:
+            self._adaptive.on_sample(
+                time.monotonic() - started,
+                dropped=e.response.status_code in OVERLOAD_STATUS_CODES,
+            )
+            raise
+        self._adaptive.on_sample(time.monotonic() - started)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send an authenticated request, re-authenticating once on 401.
+
+        The timeout is shortened to what is left of the request deadline.
+        """
+        headers = await self._get_headers()
+        kwargs["timeout"] = deadline.budget(settings.SHIPROCKET_TIMEOUT_SECONDS)
+        response = await self.client.request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 401:
+            stale_token = headers["Authorization"]
+            async with self._auth_lock:
+                if f"Bearer {self._token}" == stale_token:
+                    await self.authenticate()
+            headers = await self._get_headers()
+            kwargs["timeout"] = deadline.budget(settings.SHIPROCKET_TIMEOUT_SECONDS)
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+
+        response.raise_for_status()
+        return response
+
     async def authenticate(self) -> str:
         """
         Authenticate with Shiprocket API.
-        
+
         Returns:
             str: Bearer token
         """
@@ -37,18 +255,53 @@ class ShiprocketService:
             "email": self.email,
             "password": self.password
         }
-        
-        async with httpx.AsyncClient() as client:
+
+        try:
+            response = await self.client.post(url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            self._token = data.get("token")
+            logger.info("Successfully authenticated with Shiprocket")
+            return self._token
+        except httpx.HTTPError as e:
+            logger.error(f"Authentication failed: {e}")
+            raise
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Fetch a token and open keep-alive connections ahead of traffic.
+
+        Args:
+            connections: Number of upstream connections to pre-establish
+        """
+        await self._get_headers()
+
+        async def touch() -> None:
             try:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                self._token = data.get("token")
-                logger.info("Successfully authenticated with Shiprocket")
-                return self._token
-            except httpx.HTTPError as e:
-                logger.error(f"Authentication failed: {e}")
-                raise
+                await self.client.head(self.base_url)
+            except httpx.HTTPError:
+                pass
+
+        # Concurrent requests force the pool to open separate connections
+        await asyncio.gather(*(touch() for _ in range(max(connections - 1, 0))))
+
+    async def get_pickup_locations(self) -> List[Dict[str, Any]]:
+        """
+        Pickup locations registered on the account.
+
+        Returns:
+            Addresses with their ``pickup_location`` name and ``pin_code``
+        """
+        url = f"{self.base_url}/settings/company/pickup"
+
+        try:
+            response = await self._request("GET", url)
+            data = response.json()
+            addresses: List[Dict[str, Any]] = data.get("data", {}).get("shipping_address", [])
+            return addresses
+        except httpx.HTTPError as e:
+            logger.error(f"Fetching pickup locations failed: {e}")
+            raise
 
     async def check_serviceability(
         self,
@@ -59,13 +312,13 @@ class ShiprocketService:
     ) -> List[Dict[str, Any]]:
         """
         Check courier serviceability.
-        
+
         Args:
             pickup_postcode: Pickup PIN code
             delivery_postcode: Delivery PIN code
             weight: Package weight in kg
             cod: Cash on delivery (0 or 1)
-            
+
         Returns:
             List of available couriers
         """
@@ -76,142 +329,187 @@ class ShiprocketService:
             "weight": weight,
             "cod": cod
         }
-        
-        headers = await self._get_headers()
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("data", {}).get("available_courier_companies", [])
-            except httpx.HTTPError as e:
-                logger.error(f"Serviceability check failed: {e}")
-                raise
+
+        try:
+            response = await self._get_hedged("serviceability", url, params=params)
+            data = response.json()
+            return data.get("data", {}).get("available_courier_companies", [])
+        except httpx.HTTPError as e:
+            logger.error(f"Serviceability check failed: {e}")
+            raise
 
     async def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create order in Shiprocket.
-        
+
         Args:
             order_data: Order payload
-            
+
         Returns:
             Order response with order_id and shipment_id
         """
         url = f"{self.base_url}/orders/create/adhoc"
-        headers = await self._get_headers()
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=order_data, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Order created successfully: {data}")
-                return data
-            except httpx.HTTPError as e:
-                logger.error(f"Order creation failed: {e}")
-                raise
+
+        try:
+            response = await self._request("POST", url, json=order_data)
+            data = response.json()
+            logger.info(
+                f"Order created: order_id={data.get('order_id')} "
+                f"shipment_id={data.get('shipment_id')}"
+            )
+            return data
+        except httpx.HTTPError as e:
+            logger.error(f"Order creation failed: {e}")
+            raise
+
+    async def find_order(self, channel_order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an order by the channel (merchant) order ID it was created with.
+
+        Args:
+            channel_order_id: The ``order_id`` sent to ``create_order``
+
+        Returns:
+            ``order_id`` and ``shipment_id`` as returned by ``create_order``,
+            or None if no such order exists
+        """
+        url = f"{self.base_url}/orders"
+
+        try:
+            response = await self._request("GET", url, params={"search": channel_order_id})
+            for order in response.json().get("data") or []:
+                if str(order.get("channel_order_id")) == str(channel_order_id):
+                    shipments = order.get("shipments") or [{}]
+                    return {"order_id": order.get("id"), "shipment_id": shipments[0].get("id")}
+            return None
+        except httpx.HTTPError as e:
+            logger.error(f"Order lookup failed: {e}")
+            raise
 
     async def assign_awb(self, shipment_id: int, courier_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Assign AWB to shipment.
-        
+
         Args:
             shipment_id: Shiprocket shipment ID
             courier_id: Optional specific courier ID
-            
+
         Returns:
             AWB assignment response
         """
         url = f"{self.base_url}/courier/assign/awb"
-        headers = await self._get_headers()
         payload = {"shipment_id": shipment_id}
-        
+
         if courier_id:
             payload["courier_id"] = courier_id
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"AWB assigned: {data}")
-                return data
-            except httpx.HTTPError as e:
-                logger.error(f"AWB assignment failed: {e}")
-                raise
+
+        try:
+            response = await self._request("POST", url, json=payload)
+            data = response.json()
+            awb = data.get("response", {}).get("data", {})
+            logger.info(f"AWB {awb.get('awb_code')} assigned to shipment {shipment_id}")
+            return data
+        except httpx.HTTPError as e:
+            logger.error(f"AWB assignment failed: {e}")
+            raise
 
     async def generate_label(self, shipment_ids: List[int]) -> Dict[str, Any]:
         """
         Generate shipping label.
-        
+
         Args:
             shipment_ids: List of shipment IDs
-            
+
         Returns:
             Label generation response with URL
         """
         url = f"{self.base_url}/courier/generate/label"
-        headers = await self._get_headers()
         payload = {"shipment_id": shipment_ids}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Label generated: {data}")
-                return data
-            except httpx.HTTPError as e:
-                logger.error(f"Label generation failed: {e}")
-                raise
+
+        try:
+            response = await self._request("POST", url, json=payload)
+            data = response.json()
+            logger.info(f"Label generated for {len(shipment_ids)} shipments")
+            return data
+        except httpx.HTTPError as e:
+            logger.error(f"Label generation failed: {e}")
+            raise
 
     async def schedule_pickup(self, shipment_ids: List[int]) -> Dict[str, Any]:
         """
         Schedule pickup for shipments.
-        
+
         Args:
             shipment_ids: List of shipment IDs
-            
+
         Returns:
             Pickup scheduling response
         """
         url = f"{self.base_url}/courier/generate/pickup"
-        headers = await self._get_headers()
         payload = {"shipment_id": shipment_ids}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Pickup scheduled: {data}")
-                return data
-            except httpx.HTTPError as e:
-                logger.error(f"Pickup scheduling failed: {e}")
-                raise
+
+        try:
+            response = await self._request("POST", url, json=payload)
+            data = response.json()
+            logger.info(f"Pickup scheduled for {len(shipment_ids)} shipments")
+            return data
+        except httpx.HTTPError as e:
+            logger.error(f"Pickup scheduling failed: {e}")
+            raise
 
     async def track_shipment(self, awb_code: str) -> Dict[str, Any]:
         """
         Track shipment by AWB code.
-        
+
         Args:
             awb_code: AWB tracking code
-            
+
         Returns:
             Tracking information
         """
         url = f"{self.base_url}/courier/track/awb/{awb_code}"
-        headers = await self._get_headers()
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Tracking info retrieved for {awb_code}")
-                return data
-            except httpx.HTTPError as e:
-                logger.error(f"Tracking failed: {e}")
-                raise
+
+        try:
+            response = await self._get_hedged("track", url)
+            data = response.json()
+            logger.info(f"Tracking info retrieved for {awb_code}")
+            return data
+        except httpx.HTTPError as e:
+            logger.error(f"Tracking failed: {e}")
+            raise
+
+    async def track_shipments(self, awb_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Track several shipments in one request.
+
+        Args:
+            awb_codes: AWB tracking codes (Shiprocket accepts up to 50 per call)
+
+        Returns:
+            Tracking information per AWB code, shaped like ``track_shipment``'s;
+            AWBs Shiprocket does not know may be missing
+        """
+        url = f"{self.base_url}/courier/track/awbs"
+        payload = {"awbs": awb_codes}
+
+        try:
+            response = await self._request("POST", url, json=payload)
+            data = response.json()
+            if isinstance(data, list):
+                # Some accounts get a list of single-AWB objects instead
+                data = {awb: info for item in data for awb, info in item.items()}
+            results: Dict[str, Dict[str, Any]] = data
+            logger.info(f"Tracking info retrieved for {len(results)} of {len(awb_codes)} AWBs")
+            return results
+        except httpx.HTTPError as e:
+            logger.error(f"Batch tracking failed: {e}")
+            raise
+
+
+# Shared per-worker instance: one token and one connection pool per process
+shiprocket_service = ShiprocketService()
+
+
+def get_shiprocket_service() -> ShiprocketService:
+    """Dependency returning the shared Shiprocket service."""
+    return shiprocket_service
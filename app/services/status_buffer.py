@@ -0,0 +1,200 @@
+"""Write-behind buffer for shipment tracking updates."""
+
+import asyncio
+import contextvars
+from datetime import datetime
+from typing import Any, Dict, List, Optional, cast
+from loguru import logger
+from sqlalchemy import Table, bindparam, select, update
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.shipment import Shipment
+from app.utils import metrics
+
+BUFFER_PENDING = metrics.gauge(
+    "shipment_status_buffer_pending",
+    "Shipment tracking updates waiting to be written",
+)
+BUFFER_FLUSHED = metrics.counter(
+    "shipment_status_buffer_rows_total",
+    "Shipment rows written by the status buffer",
+)
+BUFFER_FAILURES = metrics.counter(
+    "shipment_status_buffer_failures_total",
+    "Status buffer flushes that failed and were retried",
+)
+
+# One statement for the whole batch, executed with a list of parameter sets
+# (a single pipelined executemany on asyncpg). ``created_at`` lets Postgres
+# prune to the shipment's partition, and the ``updated_at`` guard keeps a
+# late flush from overwriting a newer write made by another path or worker.
+_shipments = cast(Table, Shipment.__table__)
+_STATUS_VALUES: Dict[str, Any] = dict(
+    current_status=bindparam("b_current_status"),
+    tracking_history=bindparam("b_tracking_history"),
+    last_tracked_at=bindparam("b_observed_at"),
+    updated_at=bindparam("b_observed_at"),
+)
+_TARGET = (
+    _shipments.c.id == bindparam("b_id"),
+    _shipments.c.created_at == bindparam("b_created_at"),
+    _shipments.c.updated_at <= bindparam("b_observed_at"),
+)
+STATUS_UPDATE = update(_shipments).where(*_TARGET).values(**_STATUS_VALUES)
+
+# The same write for one shipment, returning the status it replaced (no row
+# when the guard skipped it). The row is locked before its previous status
+# is read, so of two concurrent writers of a transition only the first sees
+# the old status; callers count analytics from ``previous_status``.
+_previous = (
+    select(_shipments.c.id, _shipments.c.created_at, _shipments.c.current_status)
+    .where(*_TARGET)
+    .with_for_update()
+    .subquery("previous")
+)
+STATUS_TRANSITION = (
+    update(_shipments)
+    .where(_shipments.c.id == _previous.c.id, _shipments.c.created_at == _previous.c.created_at)
+    .values(**_STATUS_VALUES)
+    .returning(_previous.c.current_status.label("previous_status"))
+)
+
+
+def status_params(
+    shipment: Shipment,
+    current_status: Optional[str],
+    tracking_history: Any,
+    observed_at: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Parameter set of ``STATUS_UPDATE`` or ``STATUS_TRANSITION`` for one shipment."""
+    return {
+        "b_id": shipment.id,
+        "b_created_at": shipment.created_at,
+        "b_current_status": current_status,
+        "b_tracking_history": tracking_history,
+        "b_observed_at": observed_at or datetime.utcnow(),
+    }
+
+
+class ShipmentStatusBuffer:
+    """
+    Coalesce tracking updates per shipment and write them in bulk.
+
+    Only the latest update per shipment is kept. Buffered updates are
+    written as one statement once ``max_pending`` shipments are waiting or
+    ``flush_interval`` seconds after the first one arrived, in a single
+    transaction. A failed flush is put back (unless superseded) and retried
+    after the next interval; ``drain`` writes everything on shutdown.
+
+    Updates that must be visible at once (status transitions, which feed
+    analytics and live tracking) bypass the buffer: the caller writes them
+    itself and calls ``discard`` so an older buffered update cannot follow.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_pending: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_pending = max_pending or settings.SHIPMENT_WRITE_BEHIND_MAX_PENDING
+        self.flush_interval = flush_interval or settings.SHIPMENT_WRITE_BEHIND_FLUSH_SECONDS
+        self.enabled = settings.SHIPMENT_WRITE_BEHIND_ENABLED if enabled is None else enabled
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(
+        self,
+        shipment: Shipment,
+        current_status: Optional[str],
+        tracking_history: Any,
+        observed_at: Optional[datetime] = None,
+    ) -> None:
+        """Buffer the latest tracking state of ``shipment``; returns immediately."""
+        self._pending[shipment.id] = status_params(
+            shipment, current_status, tracking_history, observed_at
+        )
+        BUFFER_PENDING.set(len(self._pending))
+
+        if len(self._pending) >= self.max_pending:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush, context=contextvars.Context()
+            )
+
+    def discard(self, shipment_id: int) -> None:
+        """Drop a buffered update that a direct write has superseded."""
+        self._pending.pop(shipment_id, None)
+        BUFFER_PENDING.set(len(self._pending))
+
+    def _schedule_flush(self) -> None:
+        """Detach the buffered updates and write them in their own task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = list(self._pending.values()), {}
+        BUFFER_PENDING.set(0)
+        if not batch:
+            return
+
+        # A flush writes for many requests: it must not inherit the deadline,
+        # statement counters or profiler of the one that happened to trigger it
+        task = asyncio.get_running_loop().create_task(
+            self._run(batch), context=contextvars.Context()
+        )
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await self.write(batch)
+        except Exception as e:
+            BUFFER_FAILURES.inc()
+            logger.error(f"Writing {len(batch)} buffered shipment updates failed: {e}")
+            self._requeue(batch)
+
+    async def write(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch of parameter sets in one transaction."""
+        async with self.session_factory() as db:
+            await db.execute(STATUS_UPDATE, batch)
+            await db.commit()
+        BUFFER_FLUSHED.inc(len(batch))
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        """Put a failed batch back, keeping any newer update that arrived since."""
+        for params in batch:
+            self._pending.setdefault(params["b_id"], params)
+        BUFFER_PENDING.set(len(self._pending))
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush, context=contextvars.Context()
+            )
+
+    async def drain(self) -> None:
+        """Write everything buffered and wait for in-flight flushes, e.g. on shutdown."""
+        self._schedule_flush()
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._pending:
+            # A flush failed; one last direct attempt before giving up
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = list(self._pending.values()), {}
+            try:
+                await self.write(batch)
+            except Exception as e:
+                logger.error(f"Dropping {len(batch)} shipment updates at shutdown: {e}")
+
+
+# Shared per-worker buffer so updates for the same shipment coalesce
+status_buffer = ShipmentStatusBuffer()
@@ -0,0 +1,34 @@
+"""Shipment tracking status helpers."""
+
+from typing import Any, Optional
+
+# Shiprocket numeric ``shipment_status`` codes returned by the tracking API
+STATUS_CODES = {
+    6: "SHIPPED",
+    7: "DELIVERED",
+    8: "CANCELED",
+    9: "RTO INITIATED",
+    10: "RTO DELIVERED",
+}
+
+FINAL_STATUSES = {"DELIVERED", "CANCELED", "CANCELLED", "RTO DELIVERED", "LOST", "DESTROYED"}
+
+
+def normalize_status(value: Any) -> Optional[str]:
+    """Return an upper-case status name for a numeric code or status string."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        code = int(value)
+        return STATUS_CODES.get(code, str(code))
+    return str(value).strip().upper()
+
+
+def is_delivered(status: Optional[str]) -> bool:
+    """Whether a normalized status means delivered to the customer."""
+    return status == "DELIVERED"
+
+
+def is_rto(status: Optional[str]) -> bool:
+    """Whether a normalized status means return to origin."""
+    return status is not None and status.startswith("RTO")
@@ -0,0 +1,363 @@
+"""Streaming import of order sheets (CSV or XLSX) into the fulfilment pipeline."""
+
+import asyncio
+import csv
+import os
+import tempfile
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
+from fastapi import UploadFile
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.fulfilment import FulfilmentBatch, FulfilmentItem
+from app.models.order import Order
+from app.models.upload import UploadJob
+from app.schemas.order import OrderCreate
+from app.services.accounts import ShiprocketAccountRegistry, account_registry
+from app.services.fulfilment import FulfilmentPipeline, pipeline as fulfilment_pipeline
+from app.services.orders import build_order
+from app.services.prevalidation import OrderPrevalidator, order_prevalidator
+
+try:
+    import openpyxl
+except ImportError:  # XLSX support is optional
+    openpyxl = None
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+# Columns with this prefix describe one order item; an order spans all
+# consecutive rows that share its order_id, one item per row
+ITEM_PREFIX = "item_"
+
+# (sheet row of the order's first line, raw order, number of sheet rows)
+RawOrder = Tuple[int, Dict[str, Any], int]
+
+
+class UploadError(Exception):
+    """Raised when an uploaded file cannot be read as an order sheet."""
+
+
+def file_extension(filename: Optional[str]) -> str:
+    """Lower-cased extension, validated against the supported formats."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise UploadError(f"Unsupported file type '{extension}', expected CSV or XLSX")
+    if extension == ".xlsx" and openpyxl is None:
+        raise UploadError("XLSX uploads need openpyxl installed; upload a CSV instead")
+    return extension
+
+
+async def save_upload(file: UploadFile) -> str:
+    """
+    Copy an upload to a temporary file in fixed-size chunks.
+
+    Raises:
+        UploadError: If the file exceeds ``UPLOAD_MAX_BYTES``
+    """
+    extension = file_extension(file.filename)
+    fd, path = tempfile.mkstemp(suffix=extension, dir=settings.UPLOAD_DIR or None)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise UploadError(f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _clean(value: Any) -> Any:
+    """Empty cells become missing values; text is stripped."""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def iter_csv(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(sheet row, cells)`` for every data row of a CSV file."""
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        if not reader.fieldnames:
+            raise UploadError("The file has no header row")
+        for row_number, row in enumerate(reader, start=2):
+            yield row_number, {key.strip(): _clean(value) for key, value in row.items() if key}
+
+
+def _cell_text(value: Any) -> Any:
+    """
+    Render a spreadsheet cell the way it would appear in a CSV export.
+
+    Phone numbers and pincodes are often stored as numbers and dates as
+    dates; validation then treats every cell like CSV text.
+    """
+    if value is None or isinstance(value, str):
+        return _clean(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(sheet row, cells)`` for the first worksheet of an XLSX file."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise UploadError("The file has no header row")
+        columns = [str(name).strip() if name is not None else None for name in header]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_number, {
+                column: _cell_text(value) for column, value in zip(columns, values) if column
+            }
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream the rows of a saved upload, whatever its format."""
+    if file_extension(path) == ".xlsx":
+        return iter_xlsx(path)
+    return iter_csv(path)
+
+
+def iter_orders(
+    rows: Iterator[Tuple[int, Dict[str, Any]]],
+) -> Generator[RawOrder, None, None]:
+    """
+    Group consecutive rows with the same ``order_id`` into raw orders.
+
+    Order-level columns are taken from the first row; every row contributes
+    one entry to ``order_items`` from its ``item_*`` columns.
+    """
+    for _, group in groupby(rows, key=lambda row: row[1].get("order_id")):
+        first_row, order, count = 0, {}, 0
+        items: List[Dict[str, Any]] = []
+        for row_number, cells in group:
+            if not count:
+                first_row = row_number
+                order = {
+                    key: value for key, value in cells.items()
+                    if not key.startswith(ITEM_PREFIX) and value is not None
+                }
+            item = {
+                key[len(ITEM_PREFIX):]: value for key, value in cells.items()
+                if key.startswith(ITEM_PREFIX) and value is not None
+            }
+            if item:
+                items.append(item)
+            count += 1
+        order["order_items"] = items
+        yield first_row, order, count
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+
+def read_chunk(
+    orders: Iterator[RawOrder],
+    size: int,
+    tenant_id: Optional[str] = None,
+) -> Tuple[List[Tuple[int, OrderCreate]], List[Dict[str, Any]], int]:
+    """
+    Pull and validate up to ``size`` orders. Blocking; run it in a thread.
+
+    Returns:
+        Valid orders with their sheet row, per-row errors, and the number
+        of sheet rows consumed
+    """
+    valid: List[Tuple[int, OrderCreate]] = []
+    errors: List[Dict[str, Any]] = []
+    rows = 0
+    for row_number, raw, count in orders:
+        rows += count
+        if tenant_id and not raw.get("tenant_id"):
+            raw["tenant_id"] = tenant_id
+        try:
+            valid.append((row_number, OrderCreate(**raw)))
+        except ValidationError as e:
+            errors.append(
+                {"row": row_number, "order_id": raw.get("order_id"), "errors": _format_errors(e)}
+            )
+        if len(valid) + len(errors) >= size:
+            break
+    return valid, errors, rows
+
+
+class OrderUploadProcessor:
+    """
+    Import an order sheet in chunks and feed it to the fulfilment pipeline.
+
+    The file is read as a stream and each chunk of ``chunk_size`` orders is
+    parsed and validated in a worker thread, checked against the cached
+    pickup locations and unserviceable lanes, stored as one fulfilment
+    batch, and handed to the pipeline. At most ``max_pending`` chunks wait
+    on the pipeline at a time, which bounds memory whatever the file size
+    and applies back-pressure from the upstream to the reader. Progress is
+    written to the job row after every chunk.
+
+    If a pipeline run fails, the job fails with its error and the runs
+    still pending are cancelled; their items are left for
+    ``FulfilmentPipeline.resume_stalled``.
+    """
+
+    def __init__(
+        self,
+        pipeline: Optional[FulfilmentPipeline] = None,
+        session_factory=AsyncSessionLocal,
+        chunk_size: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        max_errors: Optional[int] = None,
+        prevalidator: Optional[OrderPrevalidator] = None,
+        accounts: Optional[ShiprocketAccountRegistry] = None,
+    ):
+        self.pipeline = pipeline or fulfilment_pipeline
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        self.max_pending = max_pending or settings.UPLOAD_MAX_PENDING_CHUNKS
+        self.max_errors = max_errors or settings.UPLOAD_MAX_REPORTED_ERRORS
+        self.prevalidator = prevalidator or order_prevalidator
+        self.accounts = accounts or account_registry
+
+    async def run(
+        self,
+        job_id: int,
+        path: str,
+        tenant_id: Optional[str] = None,
+        courier_id: Optional[int] = None,
+    ) -> None:
+        """Process a saved upload; the file is removed afterwards."""
+        orders: Optional[Generator[RawOrder, None, None]] = None
+        pending: set = set()
+        errors: List[Dict[str, Any]] = []
+
+        try:
+            await self._update(job_id, status="processing")
+            orders = iter_orders(iter_rows(path))
+            while True:
+                valid, chunk_errors, rows = await asyncio.to_thread(
+                    read_chunk, orders, self.chunk_size, tenant_id
+                )
+                if not rows:
+                    break
+
+                valid, rejected = await self.prevalidator.split(valid, self.accounts)
+                chunk_errors.extend(rejected)
+                item_ids, duplicates = await self._store(job_id, valid, courier_id)
+                chunk_errors.extend(duplicates)
+                errors.extend(chunk_errors[: self.max_errors - len(errors)])
+                await self._update(
+                    job_id,
+                    rows_processed=UploadJob.rows_processed + rows,
+                    orders_accepted=UploadJob.orders_accepted + len(item_ids),
+                    orders_rejected=UploadJob.orders_rejected + len(chunk_errors),
+                    errors=list(errors),
+                )
+
+                if item_ids:
+                    pending.add(asyncio.create_task(self.pipeline.run(item_ids)))
+                if len(pending) >= self.max_pending:
+                    pending = await self._wait(pending, asyncio.FIRST_COMPLETED)
+
+            while pending:
+                pending = await self._wait(pending, asyncio.FIRST_EXCEPTION)
+            await self._update(job_id, status="completed", completed_at=datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Upload job {job_id} failed: {e}")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await self._update(
+                job_id, status="failed", error=str(e), completed_at=datetime.utcnow()
+            )
+        finally:
+            if orders is not None:
+                orders.close()
+            os.remove(path)
+
+    @staticmethod
+    async def _wait(pending: set, return_when: str) -> set:
+        """Wait for pipeline runs; re-raise the error of a failed one, else return those left."""
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            task.result()
+        return pending
+
+    async def _store(
+        self,
+        job_id: int,
+        valid: List[Tuple[int, OrderCreate]],
+        courier_id: Optional[int],
+    ) -> Tuple[List[int], List[Dict[str, Any]]]:
+        """Insert new orders of a chunk as one fulfilment batch; report duplicates."""
+        if not valid:
+            return [], []
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Order.order_id).where(
+                    Order.order_id.in_([order.order_id for _, order in valid])
+                )
+            )
+            seen = set(result.scalars().all())
+
+            batch = FulfilmentBatch(courier_id=courier_id, upload_job_id=job_id, items=[])
+            duplicates = []
+            for row_number, order_data in valid:
+                if order_data.order_id in seen:
+                    duplicates.append({
+                        "row": row_number,
+                        "order_id": order_data.order_id,
+                        "errors": ["order_id: Order ID already exists"],
+                    })
+                    continue
+                seen.add(order_data.order_id)
+                batch.items.append(
+                    FulfilmentItem(
+                        order=build_order(order_data),
+                        payload=order_data.to_shiprocket_payload(),
+                    )
+                )
+
+            if not batch.items:
+                return [], duplicates
+
+            db.add(batch)
+            await db.commit()
+            return [item.id for item in batch.items], duplicates
+
+    async def _update(self, job_id: int, **values: Any) -> None:
+        async with self.session_factory() as db:
+            await db.execute(update(UploadJob).where(UploadJob.id == job_id).values(**values))
+            await db.commit()
+
+
+processor = OrderUploadProcessor()
+
+
+async def process_upload(
+    job_id: int,
+    path: str,
+    tenant_id: Optional[str] = None,
+    courier_id: Optional[int] = None,
+) -> None:
+    """Background task entry point for a saved upload."""
+    await processor.run(job_id, path, tenant_id=tenant_id, courier_id=courier_id)
@@ -0,0 +1,71 @@
+"""Startup warmup and readiness tracking."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+from loguru import logger
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.session import engine
+from app.services.shiprocket import shiprocket_service
+
+WarmupHook = Callable[[], Awaitable[None]]
+
+
+class WarmupState:
+    """Tracks whether this worker has finished warming up."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.monotonic()
+        self.duration_ms: Optional[float] = None
+        self.errors: List[str] = []
+        self._hooks: List[WarmupHook] = []
+
+    def register(self, hook: WarmupHook) -> WarmupHook:
+        """Register a coroutine to run during warmup (e.g. cache loading)."""
+        self._hooks.append(hook)
+        return hook
+
+    async def run(self) -> None:
+        """
+        Warm the worker up and mark it ready.
+
+        The database pool is required: warmup retries until it can be filled.
+        Upstream warmup and registered hooks are best effort, since the same
+        work happens lazily on the first request anyway.
+        """
+        while True:
+            try:
+                await warm_db_pool(settings.WARMUP_DB_CONNECTIONS)
+                break
+            except Exception as e:
+                logger.warning(f"Database warmup failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+        steps = [self._warm_upstream(), *(hook() for hook in self._hooks)]
+        for result in await asyncio.gather(*steps, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.errors.append(str(result))
+                logger.warning(f"Warmup step failed: {result}")
+
+        self.duration_ms = (time.monotonic() - self.started_at) * 1000
+        self.ready = True
+        logger.info(f"Warmup completed in {self.duration_ms:.0f} ms")
+
+    async def _warm_upstream(self) -> None:
+        """Fetch the Shiprocket token and open keep-alive connections."""
+        await shiprocket_service.warm_up(settings.WARMUP_UPSTREAM_CONNECTIONS)
+
+
+async def warm_db_pool(connections: int) -> None:
+    """Open ``connections`` pooled connections concurrently and return them to the pool."""
+    async def checkout() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(checkout() for _ in range(connections)))
+
+
+warmup_state = WarmupState()
@@ -0,0 +1,145 @@
+"""Micro-batching helpers for coalescing upstream calls."""
+
+import asyncio
+import contextvars
+import functools
+from typing import (
+    Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar, Union
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesce individually submitted items into batched calls.
+
+    Items are buffered until ``max_size`` items are waiting or ``max_delay``
+    seconds have passed since the first one arrived, then ``flush`` is called
+    once with the whole batch. ``flush`` must return one result per item, in
+    order; each submitter receives its own result (or the batch exception).
+    A result that is an exception is raised to its submitter only, so a
+    flush can fail some items of a batch and not others.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[Sequence[Union[R, BaseException]]]],
+        max_size: int = 50,
+        max_delay: float = 0.5,
+    ):
+        self._flush = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+
+    async def submit(self, item: T) -> R:
+        """Add an item to the current batch and wait for its result."""
+        future: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay, self._schedule_flush, context=contextvars.Context()
+            )
+
+        return await future
+
+    def _schedule_flush(self) -> None:
+        """Detach the pending batch and flush it in its own task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Run in an empty context: the batch serves every submitter, not just
+        # the one whose request variables (deadline, priority lane) are current
+        task = asyncio.get_running_loop().create_task(
+            self._run(batch), context=contextvars.Context()
+        )
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        """Execute one flush and resolve the futures of its submitters."""
+        items = [item for item, _ in batch]
+        try:
+            results = await self._flush(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @property
+    def idle(self) -> bool:
+        """Whether nothing is buffered or in flight."""
+        return not self._pending and all(task.done() for task in self._in_flight)
+
+    async def drain(self) -> None:
+        """Flush anything still buffered and wait for in-flight batches."""
+        self._schedule_flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+
+K = TypeVar("K")
+
+
+class KeyedMicroBatcher(Generic[K, T, R]):
+    """
+    Micro-batcher that keeps a separate buffer per key.
+
+    Items submitted under the same key are coalesced into one ``flush(key,
+    items)`` call; items under different keys never share a batch. A key's
+    buffer is dropped once its last submitter has its result, so keys seen
+    once do not accumulate.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[K, List[T]], Awaitable[Sequence[Union[R, BaseException]]]],
+        max_size: int = 50,
+        max_delay: float = 0.5,
+    ):
+        self._flush = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._batchers: Dict[K, MicroBatcher[T, R]] = {}
+
+    async def submit(self, key: K, item: T) -> R:
+        """Add an item to the current batch for ``key`` and wait for its result."""
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(
+                functools.partial(self._flush, key), self.max_size, self.max_delay
+            )
+            self._batchers[key] = batcher
+        try:
+            return await batcher.submit(item)
+        finally:
+            if batcher.idle and self._batchers.get(key) is batcher:
+                del self._batchers[key]
+
+    def __len__(self) -> int:
+        return len(self._batchers)
+
+    async def drain(self) -> None:
+        """Flush every key's buffer and wait for in-flight batches."""
+        await asyncio.gather(*(batcher.drain() for batcher in self._batchers.values()))
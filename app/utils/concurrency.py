@@ -0,0 +1,232 @@
+"""Concurrency limiting with weighted priority lanes and adaptive limits."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Mapping, Optional
+
+
+class QueueDeadlineExceeded(Exception):
+    """Raised when a caller waited longer than its lane's queue deadline."""
+
+    def __init__(self, lane: str, waited: float):
+        super().__init__(f"Waited {waited:.2f}s for a slot in lane '{lane}'")
+        self.lane = lane
+        self.waited = waited
+
+
+class PriorityLimiter:
+    """
+    Concurrency limit shared by several weighted lanes.
+
+    While the limit is not reached every caller proceeds immediately. Once
+    it is, waiters queue per lane and freed slots are handed out by stride
+    scheduling: each grant advances the lane's virtual time by
+    ``1 / weight`` and the backlogged lane with the lowest virtual time goes
+    next. A lane with weight 8 therefore gets 8 slots for every slot of a
+    weight 1 lane while both are backlogged, and an idle lane cannot bank
+    credit. Waiters give up with ``QueueDeadlineExceeded`` after their
+    lane's deadline.
+
+    The limit can be changed at runtime with ``set_limit``.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        weights: Mapping[str, float],
+        deadlines: Optional[Mapping[str, Optional[float]]] = None,
+    ):
+        if not weights:
+            raise ValueError("At least one lane is required")
+        self._limit = max(1, int(limit))
+        self.weights = dict(weights)
+        self.deadlines = dict(deadlines or {})
+        self.active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in self.weights}
+        self._pass: Dict[str, float] = {lane: 0.0 for lane in self.weights}
+        self._vtime = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        """Change the limit; waiters are admitted right away if it grew."""
+        self._limit = max(1, int(limit))
+        self._wake()
+
+    def queued(self, lane: Optional[str] = None) -> int:
+        """Number of waiters in ``lane``, or in all lanes."""
+        lanes = [lane] if lane else self._waiters
+        return sum(1 for name in lanes for fut in self._waiters[name] if not fut.done())
+
+    @asynccontextmanager
+    async def acquire(self, lane: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold one slot in ``lane`` for the duration of the block.
+
+        ``timeout`` bounds the queue wait, tighter than the lane deadline.
+        """
+        await self.wait_for_slot(lane, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def wait_for_slot(self, lane: str, timeout: Optional[float] = None) -> None:
+        """Take a slot in ``lane``; pair with ``release`` when ``acquire`` does not fit."""
+        if lane not in self._waiters:
+            raise ValueError(f"Unknown lane '{lane}'")
+
+        if self.active < self._limit and not self.queued():
+            self._grant(lane)
+        else:
+            deadline = self.deadlines.get(lane)
+            if timeout is not None:
+                deadline = timeout if deadline is None else min(deadline, timeout)
+            await self._wait(lane, deadline)
+
+    def release(self) -> None:
+        """Give back a slot taken with ``wait_for_slot``."""
+        self.active -= 1
+        self._wake()
+
+    async def _wait(self, lane: str, timeout: Optional[float]) -> None:
+        """Queue in ``lane`` until a slot is handed over or the deadline passes."""
+        queue = self._waiters[lane]
+        if not any(not fut.done() for fut in queue):
+            # Coming back from idle: start at the current virtual time
+            self._pass[lane] = max(self._pass[lane], self._vtime)
+
+        fut = asyncio.get_running_loop().create_future()
+        queue.append(fut)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over just as we gave up: pass it on
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise QueueDeadlineExceeded(lane, time.monotonic() - started) from None
+            raise
+
+    def _grant(self, lane: str) -> None:
+        self.active += 1
+        self._vtime = self._pass[lane]
+        self._pass[lane] += 1 / self.weights[lane]
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, lowest virtual time first."""
+        while self.active < self._limit:
+            lane = None
+            for name, queue in self._waiters.items():
+                while queue and queue[0].done():
+                    queue.popleft()
+                if queue and (lane is None or self._pass[name] < self._pass[lane]):
+                    lane = name
+            if lane is None:
+                return
+            self._grant(lane)
+            self._waiters[lane].popleft().set_result(None)
+
+
+class AdaptiveLimit:
+    """
+    AIMD controller for a ``PriorityLimiter``'s limit, driven by latency.
+
+    Every completed call reports its latency. The limit grows additively
+    (about +1 per limit's worth of healthy samples, i.e. per round trip)
+    while the limiter is actually used, and is cut multiplicatively when a
+    call is dropped (timeout, 429, overload) or when smoothed latency
+    exceeds ``tolerance`` times the baseline. The baseline is the minimum
+    latency over the last one to two windows of ``window`` seconds, so it
+    follows permanent changes in upstream speed; the window should span a
+    few increase/cut cycles so that it always contains uncongested calls.
+
+    After a cut, samples are ignored for one round trip, since calls that
+    started before the cut still report the old congestion, and smoothing
+    starts afresh.
+    """
+
+    def __init__(
+        self,
+        limiter: PriorityLimiter,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 2.0,
+        latency_backoff: float = 0.5,
+        drop_backoff: float = 0.5,
+        smoothing: float = 0.1,
+        window: float = 60.0,
+        on_change: Optional[Callable[[int], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limiter = limiter
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.tolerance = tolerance
+        self.latency_backoff = latency_backoff
+        self.drop_backoff = drop_backoff
+        self.smoothing = smoothing
+        self.window = window
+        self.on_change = on_change
+        self.clock = clock
+        self._estimate = float(min(max(limiter.limit, self.min_limit), self.max_limit))
+        self._smoothed: Optional[float] = None
+        self._window_min = math.inf
+        self._previous_min = math.inf
+        self._window_started = clock()
+        self._hold_until = 0.0
+        self._apply()
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """No-load latency estimate, once any sample has been seen."""
+        baseline = min(self._window_min, self._previous_min)
+        return None if math.isinf(baseline) else baseline
+
+    def on_sample(self, latency: float, dropped: bool = False) -> None:
+        """Record one completed call and adjust the limit."""
+        if self.clock() < self._hold_until:
+            return
+
+        if dropped:
+            self._decrease(self.drop_backoff, latency)
+        else:
+            self._track_baseline(latency)
+            if self._smoothed is None:
+                self._smoothed = latency
+            else:
+                self._smoothed += self.smoothing * (latency - self._smoothed)
+
+            baseline = min(self._window_min, self._previous_min)
+            if self._smoothed > baseline * self.tolerance:
+                self._decrease(self.latency_backoff, self._smoothed)
+            elif self.limiter.active * 2 >= self.limiter.limit:
+                # Only probe upwards while the current limit is being used
+                self._estimate += 1 / self._estimate
+        self._apply()
+
+    def _track_baseline(self, latency: float) -> None:
+        now = self.clock()
+        if now - self._window_started >= self.window:
+            self._previous_min, self._window_min = self._window_min, math.inf
+            self._window_started = now
+        self._window_min = min(self._window_min, latency)
+
+    def _decrease(self, ratio: float, round_trip: float) -> None:
+        self._estimate *= ratio
+        self._smoothed = None
+        self._hold_until = self.clock() + round_trip
+
+    def _apply(self) -> None:
+        self._estimate = min(max(self._estimate, self.min_limit), self.max_limit)
+        limit = int(self._estimate)
+        if limit != self.limiter.limit:
+            self.limiter.set_limit(limit)
+        if self.on_change is not None:
+            self.on_change(self.limiter.limit)
@@ -0,0 +1,50 @@
+"""Per-request deadlines carried in a context variable."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work would start after the request's deadline."""
+
+
+@contextmanager
+def deadline_after(seconds: float) -> Iterator[None]:
+    """Run the block (and tasks it spawns) with a deadline ``seconds`` from now."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def clear() -> None:
+    """Drop the deadline for the rest of the current context (e.g. background work)."""
+    _deadline.set(None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or ``None`` without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def budget(default: float) -> float:
+    """
+    Timeout to use for the next operation: ``default``, capped by the deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
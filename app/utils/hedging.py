@@ -0,0 +1,145 @@
+"""Request hedging for idempotent calls with a long latency tail."""
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """
+    The most recent ``size`` latencies, for percentile estimates.
+
+    Percentiles are recomputed after every ``size / 20`` new samples rather
+    than on every call, which keeps lookups cheap on the request path.
+    """
+
+    def __init__(self, size: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._refresh_every = max(1, size // 20)
+        self._added = 0
+        self._cache: Dict[float, float] = {}
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._added += 1
+        if self._added >= self._refresh_every:
+            self._added = 0
+            self._cache.clear()
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency below which ``fraction`` of recent samples fall."""
+        if not self._samples:
+            return None
+        if fraction not in self._cache:
+            ordered = sorted(self._samples)
+            self._cache[fraction] = ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+        return self._cache[fraction]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """
+    Token bucket capping hedges at ``ratio`` of primary requests.
+
+    Every primary request earns ``ratio`` of a token and every hedge spends
+    one, so over time at most ``ratio`` extra load is sent upstream. Up to
+    ``burst`` tokens can be saved for a burst of slow calls.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+
+    def earn(self) -> None:
+        self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_spend(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class Hedger:
+    """
+    Send a second copy of a slow call and take whichever finishes first.
+
+    The hedge goes out once the first attempt has run longer than the
+    ``percentile`` of recent latencies, provided at least ``min_samples``
+    latencies are known and the budget allows it. Only use this for
+    idempotent calls: both attempts may reach the upstream.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget_ratio: float = 0.05,
+        min_samples: int = 20,
+        window: int = 1000,
+        on_hedge: Optional[Callable[[bool], None]] = None,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow(window)
+        self.budget = HedgeBudget(budget_ratio)
+        self.on_hedge = on_hedge
+
+    def delay(self) -> Optional[float]:
+        """Time after which the current call gets hedged, if hedging is warm."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``call``, hedging it if it is slow.
+
+        Errors of an attempt are only raised when no attempt succeeded.
+        ``on_hedge(won)`` is called for every hedge sent, with whether the
+        hedge finished first.
+        """
+        self.budget.earn()
+        loop = asyncio.get_running_loop()
+        delay = self.delay()
+        started = hedge_started = loop.time()
+        primary = asyncio.ensure_future(call())
+        attempts = [primary]
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self.budget.try_spend():
+                    hedge_started = loop.time()
+                    attempts.append(asyncio.ensure_future(call()))
+
+            if len(attempts) == 1:
+                result = await primary
+                self.latencies.add(loop.time() - started)
+                return result
+
+            hedge = attempts[1]
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is not None:
+                        error = error or attempt.exception()
+                        continue
+                    won = attempt is hedge
+                    self.latencies.add(loop.time() - (hedge_started if won else started))
+                    if self.on_hedge is not None:
+                        self.on_hedge(won)
+                    return attempt.result()
+            # Every attempt failed
+            assert error is not None
+            raise error
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
@@ -0,0 +1,240 @@
+"""On-demand profiling of single requests."""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+# Frames of these modules are cut from sampled stacks: they are the same in
+# every sample and only make the flame graph deeper
+_ELIDED_PREFIXES = ("asyncio.", "uvicorn.", "anyio.")
+
+_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Samples and timings of one profiled request.
+
+    ``stacks`` counts collapsed stacks (``root;...;leaf``) seen while the
+    request's task was running; samples taken while it was suspended are
+    counted as ``waiting`` and explained by the recorded ``calls`` to
+    Postgres and Shiprocket.
+    """
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.status_code: Optional[int] = None
+        self.stacks: Counter = Counter()
+        self.waiting = 0
+        self.calls: List[Dict[str, Any]] = []
+
+    def add_call(self, kind: str, label: str, seconds: float, **extra: Any) -> None:
+        self.calls.append({"kind": kind, "label": label, "ms": round(seconds * 1000, 3), **extra})
+
+    def folded(self) -> str:
+        """Collapsed stacks, as read by flamegraph.pl, speedscope or inferno."""
+        root = f"{self.method} {self.route or self.path}"
+        lines = [f"{root};{stack} {count}" for stack, count in self.stacks.most_common()]
+        if self.waiting:
+            lines.append(f"{root};[waiting on I/O] {self.waiting}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for call in self.calls:
+            total = totals.setdefault(call["kind"], {"count": 0, "ms": 0.0})
+            total["count"] += 1
+            total["ms"] = round(total["ms"] + call["ms"], 3)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "sample_interval_ms": self.interval * 1000,
+            "samples": sum(self.stacks.values()),
+            "waiting_samples": self.waiting,
+            "totals": totals,
+            "calls": self.calls,
+        }
+
+
+def current() -> Optional[RequestProfile]:
+    """Profile of the running request, or None when it is not being profiled."""
+    return _profile.get()
+
+
+def record(kind: str, label: str, started: float, **extra: Any) -> None:
+    """Record a ``kind`` call (``db``, ``shiprocket``) that began at ``started`` (perf_counter)."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.add_call(kind, label, time.perf_counter() - started, **extra)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{code.co_qualname}:{frame.f_lineno}"
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample the event loop thread's stack every ``interval`` seconds.
+
+    The loop runs many requests interleaved, so a sample counts towards the
+    profile only when the profiled request's task is the one running.
+    """
+
+    def __init__(
+        self, profile: RequestProfile, task: asyncio.Task, loop: asyncio.AbstractEventLoop
+    ):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.task = task
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.profile.interval):
+            if asyncio.current_task(self.loop) is not self.task:
+                self.profile.waiting += 1
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                name = _frame_name(frame)
+                if not name.startswith(_ELIDED_PREFIXES):
+                    names.append(name)
+                frame = frame.f_back
+            if names:
+                self.profile.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class profile_request:
+    """Context manager profiling the current task as one request."""
+
+    def __init__(self, method: str, path: str, interval: Optional[float] = None):
+        self.profile = RequestProfile(
+            method, path, interval or settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        )
+        self._sampler: Optional[StackSampler] = None
+
+    def __enter__(self) -> RequestProfile:
+        self._token = _profile.set(self.profile)
+        self._started = time.perf_counter()
+        task = asyncio.current_task()
+        if task is not None:
+            # Outside a task there is nothing to sample; calls are still recorded
+            self._sampler = StackSampler(self.profile, task, asyncio.get_running_loop())
+            self._sampler.start()
+        return self.profile
+
+    def __exit__(self, *exc_info) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.profile.duration = time.perf_counter() - self._started
+        _profile.reset(self._token)
+
+
+def sign_token(expires_at: int, secret: Optional[str] = None) -> str:
+    """``X-Profile`` header value valid until ``expires_at`` (Unix time)."""
+    key = (secret or settings.PROFILING_SECRET or settings.SECRET_KEY).encode()
+    signature = hmac.new(key, str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_token(token: str, secret: Optional[str] = None) -> bool:
+    """Whether ``token`` was made by ``sign_token`` and has not expired."""
+    expires_at, _, _ = token.partition(".")
+    try:
+        expiry = int(expires_at)
+    except ValueError:
+        return False
+    if expiry < time.time():
+        return False
+    return hmac.compare_digest(token, sign_token(expiry, secret))
+
+
+class ProfileStore:
+    """Profiles on local disk: ``<id>.folded`` and ``<id>.json``, newest ``keep`` retained."""
+
+    def __init__(self, directory: Optional[str] = None, keep: Optional[int] = None):
+        self.directory = directory or settings.PROFILING_DIR
+        self.keep = keep or settings.PROFILING_MAX_PROFILES
+
+    def save(self, profile: RequestProfile) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{profile.id}.folded"), "w") as f:
+            f.write(profile.folded())
+        with open(os.path.join(self.directory, f"{profile.id}.json"), "w") as f:
+            json.dump(profile.summary(), f, indent=2)
+        self._prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries without the call list, newest first."""
+        profiles = []
+        for profile_id in self._ids():
+            summary = self.summary(profile_id)
+            if summary is not None:
+                summary.pop("calls", None)
+                profiles.append(summary)
+        return profiles
+
+    def summary(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(profile_id, "json")
+        if path is None:
+            return None
+        with open(path) as f:
+            summary: Dict[str, Any] = json.load(f)
+        return summary
+
+    def path(self, profile_id: str, extension: str) -> Optional[str]:
+        """File of a stored profile; None for unknown or malformed ids."""
+        if not profile_id.replace("-", "").isalnum():
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{extension}")
+        return path if os.path.exists(path) else None
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = [
+            name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")
+        ]
+        return sorted(names, reverse=True)
+
+    def _prune(self) -> None:
+        for profile_id in self._ids()[self.keep:]:
+            for extension in ("json", "folded"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{profile_id}.{extension}"))
+                except FileNotFoundError:
+                    pass
+
+
+profile_store = ProfileStore()
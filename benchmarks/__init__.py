@@ -0,0 +1 @@
+"""Benchmarks; run against a scratch database, never production."""
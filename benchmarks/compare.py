@@ -0,0 +1,65 @@
+"""
+Compare two ``benchmarks.load`` reports.
+
+Prints throughput, p95 latency and statements per request of every
+scenario side by side, and exits with status 1 when a scenario regressed:
+throughput or p95 worse by more than ``--threshold``, or more statements
+per request. Usage::
+
+    python -m benchmarks.compare BASE.json HEAD.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def regressions(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions of ``head`` against ``base``."""
+    found = []
+    for name, new in head["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            continue
+        if new["rps"] < old["rps"] * (1 - threshold):
+            found.append(f"{name}: {old['rps']} -> {new['rps']} rps")
+        if new["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            found.append(f"{name}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        if new["db_queries_max"] > old["db_queries_max"]:
+            found.append(
+                f"{name}: {old['db_queries_max']} -> {new['db_queries_max']} queries per request"
+            )
+        if new["errors"] > old["errors"]:
+            found.append(f"{name}: {old['errors']} -> {new['errors']} errors")
+    return found
+
+
+def main(base_path: str, head_path: str, threshold: float) -> int:
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    print(f"{'scenario':<28} {'rps':>17} {'p95 ms':>19} {'queries':>9}")
+    for name, new in head["scenarios"].items():
+        old = base["scenarios"].get(name, {})
+        print(
+            f"{name:<28} {old.get('rps', '-'):>8} {new['rps']:>8}"
+            f" {old.get('p95_ms', '-'):>9} {new['p95_ms']:>9}"
+            f" {old.get('db_queries_max', '-'):>4} {new['db_queries_max']:>4}"
+        )
+
+    found = regressions(base, head, threshold)
+    for regression in found:
+        print(f"REGRESSION {regression}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    sys.exit(main(args.base, args.head, args.threshold))
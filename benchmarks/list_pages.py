@@ -0,0 +1,161 @@
+"""
+Latency and memory of one list page: ORM entities vs column projection.
+
+Seeds ``--rows`` orders (each with a shipment carrying a tracking history)
+inside a transaction that is rolled back, then serves the same page both
+ways and reports the median latency and peak Python allocations per 1,000
+rows. Usage::
+
+    python -m benchmarks.list_pages --rows 1000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.schemas.order import OrderFilters, OrderResponse
+from app.schemas.shipment import ShipmentFilters, ShipmentResponse
+from app.services.queries import (
+    ORDER_LIST_COLUMNS,
+    SHIPMENT_LIST_COLUMNS,
+    fetch_rows,
+    order_list_query,
+    shipment_list_query,
+)
+
+
+def seed(count: int) -> List[Order]:
+    """Orders shaped like production ones: a few items, a tracking history."""
+    now = datetime.utcnow()
+    orders = []
+    for i in range(count):
+        created = now - timedelta(seconds=i)
+        orders.append(Order(
+            order_id=f"BENCH-{i}",
+            order_date=created,
+            pickup_location="Primary",
+            billing_customer_name=f"Customer {i}",
+            billing_city="Bangalore",
+            billing_pincode="560001",
+            billing_state="Karnataka",
+            billing_country="India",
+            billing_phone=f"98{i:08d}",
+            order_items=[
+                {"name": f"Item {n}", "sku": f"SKU-{i}-{n}", "units": 1, "selling_price": 499.0}
+                for n in range(5)
+            ],
+            payment_method="Prepaid",
+            weight=0.5,
+            created_at=created,
+            shipments=[Shipment(
+                awb_code=f"BENCH{i:010d}",
+                courier_name="Delhivery",
+                status="IN TRANSIT",
+                tracking_history=[
+                    {"status": "In Transit", "location": "Hub", "date": created.isoformat()}
+                    for _ in range(20)
+                ],
+                created_at=created,
+            )],
+        ))
+    return orders
+
+
+def orm_page(schema) -> Callable[[AsyncSession, object], Awaitable[bytes]]:
+    """Entities validated by ``response_model``, as FastAPI serves them."""
+    adapter = TypeAdapter(List[schema])
+
+    async def serve(db: AsyncSession, query) -> bytes:
+        entities = (await db.execute(query)).scalars().all()
+        validated = adapter.validate_python(entities, from_attributes=True)
+        body = json.dumps(adapter.dump_python(validated, mode="json")).encode()
+        db.expunge_all()
+        return body
+
+    return serve
+
+
+async def projection_page(db: AsyncSession, query) -> bytes:
+    return orjson.dumps(await fetch_rows(db, query))
+
+
+async def measure(
+    db: AsyncSession, serve, query, rows: int, repeat: int
+) -> Dict[str, float]:
+    await serve(db, query)  # warm caches and prepared statements
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await serve(db, query)
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    body = await serve(db, query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_thousand = 1000 / rows
+    return {
+        "median_ms": round(statistics.median(latencies) * 1000 * per_thousand, 2),
+        "peak_kib": round(peak / 1024 * per_thousand, 1),
+        "body_kib": round(len(body) / 1024 * per_thousand, 1),
+    }
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine(settings.database_url_async)
+    cases = {
+        "orders": (
+            order_list_query(OrderFilters()).limit(rows),
+            order_list_query(OrderFilters(), ORDER_LIST_COLUMNS).limit(rows),
+            orm_page(OrderResponse),
+        ),
+        "shipments": (
+            shipment_list_query(ShipmentFilters()).limit(rows),
+            shipment_list_query(ShipmentFilters(), SHIPMENT_LIST_COLUMNS).limit(rows),
+            orm_page(ShipmentResponse),
+        ),
+    }
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            db = AsyncSession(bind=conn, expire_on_commit=False)
+            db.add_all(seed(rows))
+            await db.flush()
+            db.expunge_all()
+
+            print(f"per 1,000 rows, page of {rows}, median of {repeat}")
+            for name, (entity_query, column_query, orm_serve) in cases.items():
+                for label, serve, query in (
+                    ("orm", orm_serve, entity_query),
+                    ("projection", projection_page, column_query),
+                ):
+                    result = await measure(db, serve, query, rows, repeat)
+                    print(
+                        f"{name:<10} {label:<11} {result['median_ms']:>8} ms"
+                        f" {result['peak_kib']:>10} KiB peak {result['body_kib']:>8} KiB body"
+                    )
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,312 @@
+"""
+Throughput, latency and query counts of every API endpoint.
+
+Serves the Shiprocket simulator on a local port, points the service at it,
+and drives the app in process at a fixed concurrency: first it creates
+``--orders`` orders and assigns their AWBs through the API, then it sends
+``--requests`` requests to each read and write scenario. For each scenario
+it reports requests per second, latency percentiles, status codes and the
+statements per request (from the ``Server-Timing`` header) as one JSON
+document, so runs on two commits can be compared with
+``python -m benchmarks.compare``::
+
+    python -m benchmarks.load --concurrency 16 --requests 500 --output HEAD.json
+
+Uploads, fulfilment batches and the tracking stream run in the background
+or stay open, so they are not part of the suite. Orders and shipments
+created by the run are deleted at the end, but analytics counters and rate
+quotes are not: point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.auth import create_access_token
+from app.services.shiprocket import shiprocket_service
+from benchmarks.simulator import Latency, ShiprocketSimulator, SimulatorConfig, SimulatorServer
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# (method, path, JSON body) of the i-th request of a scenario
+RequestFactory = Callable[[int], Tuple[str, str, Optional[Dict[str, Any]]]]
+
+
+def order_payload(order_id: str, index: int) -> Dict[str, Any]:
+    return {
+        "order_id": order_id,
+        "order_date": date.today().isoformat(),
+        "pickup_location": "Primary",
+        "billing_customer_name": f"Load Test {index}",
+        "billing_city": "Bangalore",
+        "billing_pincode": "560001",
+        "billing_state": "Karnataka",
+        "billing_country": "India",
+        "billing_phone": f"98{index:08d}",
+        "order_items": [
+            {"name": "Load Item", "sku": f"LOAD-SKU-{index % 20}", "units": 1, "selling_price": 499}
+        ],
+        "payment_method": "Prepaid",
+        "weight": 0.5,
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(
+    client: AsyncClient, make_request: RequestFactory, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Send ``requests`` requests from ``concurrency`` workers and summarize them."""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    queries: List[int] = []
+    indexes = iter(range(requests))
+
+    async def worker() -> None:
+        for i in indexes:
+            method, path, body = make_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            match = QUERIES.search(response.headers.get("server-timing", ""))
+            queries.append(int(match.group(1)) if match else 0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "db_queries_mean": round(statistics.mean(queries), 2),
+        "db_queries_max": max(queries),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def created_rows(prefix: str) -> Tuple[List[str], List[int], List[str]]:
+    """Order ids, Shiprocket shipment ids and AWB codes created by this run."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Order.order_id, Shipment.shiprocket_shipment_id, Shipment.awb_code)
+            .join(Shipment, Shipment.order_id == Order.id)
+            .where(Order.order_id.startswith(prefix))
+            .order_by(Order.id)
+        )
+        rows = result.all()
+    return (
+        [row[0] for row in rows],
+        [row[1] for row in rows if row[1] is not None],
+        [row[2] for row in rows if row[2] is not None],
+    )
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        order_ids = select(Order.id).where(Order.order_id.startswith(prefix))
+        await db.execute(delete(Shipment).where(Shipment.order_id.in_(order_ids)))
+        await db.execute(delete(Order).where(Order.order_id.startswith(prefix)))
+        await db.commit()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def isolate_settings() -> None:
+    """
+    Switch off what would make runs depend on the rest of the deployment.
+
+    Leadership, admission limits and profiling are disabled so the suite
+    measures the request path alone; call before ``running_app``.
+    """
+    settings.JOBS_ENABLED = False
+    settings.ADMISSION_ENABLED = False
+    settings.PROFILING_ENABLED = False
+
+
+@asynccontextmanager
+async def running_app(simulator: ShiprocketSimulator) -> AsyncIterator[AsyncClient]:
+    """A client of the app, started with its lifespan, whose Shiprocket is ``simulator``."""
+    # Imported here so that isolate_settings applies to the app's middleware
+    from app.main import app
+
+    with SimulatorServer(simulator) as server:
+        shiprocket_service.base_url = server.url
+        headers = {"Authorization": f"Bearer {create_access_token('load@benchmark')}"}
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(
+                transport=ASGITransport(app=app),
+                base_url="http://bench",
+                headers=headers,
+                timeout=None,
+            ) as client:
+                yield client
+
+
+async def seed(
+    client: AsyncClient, prefix: str, orders: int, concurrency: int, results: Dict[str, Any]
+) -> Tuple[List[str], List[int], List[str]]:
+    """Create orders and assign AWBs through the API, recording both scenarios in ``results``."""
+    api = settings.API_V1_PREFIX
+    results["orders.create"] = await drive(
+        client,
+        lambda i: ("POST", f"{api}/orders/", order_payload(f"{prefix}{i}", i)),
+        orders, concurrency,
+    )
+    order_ids, shipment_ids, _ = await created_rows(prefix)
+    if not shipment_ids:
+        raise RuntimeError(f"No orders were created: {results['orders.create']}")
+
+    results["shipments.assign_awb"] = await drive(
+        client,
+        lambda i: ("POST", f"{api}/shipments/assign-awb", {"shipment_id": shipment_ids[i]}),
+        len(shipment_ids), concurrency,
+    )
+    _, _, awb_codes = await created_rows(prefix)
+    if not awb_codes:
+        raise RuntimeError(f"No AWBs were assigned: {results['shipments.assign_awb']}")
+    return order_ids, shipment_ids, awb_codes
+
+
+def scenarios(
+    order_ids: List[str], shipment_ids: List[int], awb_codes: List[str]
+) -> Dict[str, RequestFactory]:
+    """Repeatable requests to every endpoint, over the seeded orders and shipments."""
+    api = settings.API_V1_PREFIX
+    route = "pickup_postcode=560001&delivery_postcode=110045&weight=0.5"
+    start = date.today() - timedelta(days=30)
+
+    def pick(values: List[Any], i: int) -> Any:
+        return values[i % len(values)]
+
+    def batch(i: int) -> Dict[str, Any]:
+        return {"shipment_id": [pick(shipment_ids, i * 10 + n) for n in range(10)]}
+
+    return {
+        "orders.get": lambda i: ("GET", f"{api}/orders/{pick(order_ids, i)}", None),
+        "orders.list": lambda i: ("GET", f"{api}/orders/?limit=50", None),
+        "orders.sku_units": lambda i: ("GET", f"{api}/orders/skus/LOAD-SKU-{i % 20}/units", None),
+        "shipments.list": lambda i: ("GET", f"{api}/shipments/?limit=50", None),
+        "shipments.serviceability": lambda i: (
+            "GET", f"{api}/shipments/serviceability?{route}", None
+        ),
+        "shipments.quote": lambda i: ("GET", f"{api}/shipments/quote?{route}", None),
+        "shipments.track": lambda i: ("GET", f"{api}/shipments/track/{pick(awb_codes, i)}", None),
+        "shipments.track_batch": lambda i: (
+            "POST", f"{api}/shipments/track",
+            {"awb_codes": [pick(awb_codes, i * 50 + n) for n in range(50)], "max_age_seconds": 0},
+        ),
+        "shipments.generate_label": lambda i: (
+            "POST", f"{api}/shipments/generate-label", batch(i)
+        ),
+        "shipments.schedule_pickup": lambda i: (
+            "POST", f"{api}/shipments/schedule-pickup", batch(i)
+        ),
+        "analytics.couriers": lambda i: ("GET", f"{api}/analytics/couriers", None),
+        "analytics.rates": lambda i: ("GET", f"{api}/analytics/rates?{route}&start={start}", None),
+    }
+
+
+def new_prefix() -> str:
+    """Order id prefix of one run, used to find and delete its rows."""
+    return f"LOAD-{uuid.uuid4().hex[:8]}-"
+
+
+async def run(
+    orders: int, requests: int, concurrency: int, config: SimulatorConfig
+) -> Dict[str, Any]:
+    prefix = new_prefix()
+    simulator = ShiprocketSimulator(config)
+    results: Dict[str, Any] = {}
+
+    async with running_app(simulator) as client:
+        try:
+            ids = await seed(client, prefix, orders, concurrency, results)
+            for name, make_request in scenarios(*ids).items():
+                results[name] = await drive(client, make_request, requests, concurrency)
+        finally:
+            await cleanup(prefix)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "orders": orders,
+            "requests": requests,
+            "concurrency": concurrency,
+            "simulator": config.describe(),
+            "upstream_requests": {
+                f"{name} {status}": count
+                for (name, status), count in sorted(simulator.requests.items())
+            },
+        },
+        "scenarios": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--median-ms", type=float, default=50.0, help="simulated Shiprocket latency"
+    )
+    parser.add_argument("--p99-ms", type=float, default=400.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    isolate_settings()
+
+    report = asyncio.run(run(
+        args.orders,
+        args.requests,
+        args.concurrency,
+        SimulatorConfig(
+            latency=Latency(args.median_ms, args.p99_ms),
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            seed=args.seed,
+        ),
+    ))
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
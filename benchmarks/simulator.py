@@ -0,0 +1,376 @@
+"""
+Local Shiprocket simulator.
+
+An ASGI app implementing the Shiprocket endpoints this service calls
+(auth, pickup locations, serviceability, order creation and lookup, AWB assignment,
+labels, pickups and tracking) with configurable latency, error rate and rate limit. Point the
+service at it with ``SHIPROCKET_BASE_URL``::
+
+    python -m benchmarks.simulator --port 9000 --median-ms 150 --p99-ms 1200 \\
+        --error-rate 0.01 --rate-limit 50
+    SHIPROCKET_BASE_URL=http://localhost:9000 uvicorn app.main:app
+
+State (orders, shipments, AWBs) lives in memory. Each AWB moves one step
+along its tracking statuses every ``track_steps`` tracking calls.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+TOKEN = "simulator-token"
+
+COURIERS = [
+    {"courier_company_id": 1, "courier_name": "Delhivery Surface", "base_rate": 48.0, "days": 5},
+    {"courier_company_id": 2, "courier_name": "Xpressbees", "base_rate": 52.0, "days": 4},
+    {"courier_company_id": 3, "courier_name": "Blue Dart", "base_rate": 95.0, "days": 2},
+    {"courier_company_id": 4, "courier_name": "Ekart", "base_rate": 45.0, "days": 6},
+]
+
+PICKUP_LOCATIONS = [
+    {"id": 1, "pickup_location": "Primary", "pin_code": 560001, "city": "Bangalore", "status": 2},
+    {
+        "id": 2, "pickup_location": "Warehouse Delhi", "pin_code": 110037, "city": "New Delhi",
+        "status": 2,
+    },
+]
+
+TRACKING_STATUSES = [
+    "PICKUP SCHEDULED", "PICKED UP", "IN TRANSIT", "OUT FOR DELIVERY", "DELIVERED",
+]
+
+
+class Latency:
+    """
+    Lognormal response time given by its median and 99th percentile, in ms.
+
+    Upstream latencies are long tailed; a lognormal with a realistic p99
+    exercises timeouts, hedging and the adaptive limit the way production
+    does. ``p99_ms`` equal to the median (the default) means a fixed delay.
+    """
+
+    def __init__(self, median_ms: float = 0.0, p99_ms: Optional[float] = None):
+        self.median_ms = median_ms
+        self.p99_ms = max(p99_ms or median_ms, median_ms)
+        # z of the 99th percentile of the standard normal distribution
+        self.sigma = math.log(self.p99_ms / median_ms) / 2.326 if median_ms > 0 else 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """One delay in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+    def __repr__(self) -> str:
+        return f"<Latency(median_ms={self.median_ms}, p99_ms={self.p99_ms})>"
+
+
+class SimulatorConfig:
+    """
+    Latency (``endpoint_latency`` by endpoint name, else ``latency``), error
+    rate and rate limit.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Latency] = None,
+        endpoint_latency: Optional[Dict[str, Latency]] = None,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        track_steps: int = 3,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency or Latency()
+        self.endpoint_latency = endpoint_latency or {}
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.track_steps = max(1, track_steps)
+        self.seed = seed
+
+    def latency_for(self, endpoint: str) -> Latency:
+        return self.endpoint_latency.get(endpoint, self.latency)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "median_ms": self.latency.median_ms,
+            "p99_ms": self.latency.p99_ms,
+            "endpoint_latency": {
+                name: [latency.median_ms, latency.p99_ms]
+                for name, latency in self.endpoint_latency.items()
+            },
+            "error_rate": self.error_rate,
+            "rate_limit": self.rate_limit,
+            "track_steps": self.track_steps,
+            "seed": self.seed,
+        }
+
+
+class TokenBucket:
+    """Requests per second with a burst of one second's worth."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+Handler = Callable[[Request], Awaitable[Dict[str, Any]]]
+
+
+class ShiprocketSimulator:
+    """The simulator app; ``requests`` counts responses per endpoint and status."""
+
+    def __init__(self, config: Optional[SimulatorConfig] = None):
+        self.config = config or SimulatorConfig()
+        self.rng = random.Random(self.config.seed)
+        self.bucket = TokenBucket(self.config.rate_limit) if self.config.rate_limit else None
+        self.requests: Counter = Counter()
+        self._next_id = 100_000
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.shipments: Dict[int, Dict[str, Any]] = {}
+        self.awbs: Dict[str, int] = {}
+
+        routes = [
+            ("/", "root", self.root, ["GET", "HEAD"]),
+            ("/auth/login", "auth", self.login, ["POST"]),
+            ("/settings/company/pickup", "pickup_locations", self.pickup_locations, ["GET"]),
+            ("/courier/serviceability", "serviceability", self.serviceability, ["GET"]),
+            ("/orders", "orders", self.list_orders, ["GET"]),
+            ("/orders/create/adhoc", "create_order", self.create_order, ["POST"]),
+            ("/courier/assign/awb", "assign_awb", self.assign_awb, ["POST"]),
+            ("/courier/generate/label", "generate_label", self.generate_label, ["POST"]),
+            ("/courier/generate/pickup", "schedule_pickup", self.schedule_pickup, ["POST"]),
+            ("/courier/track/awb/{awb_code}", "track", self.track, ["GET"]),
+            ("/courier/track/awbs", "track_many", self.track_many, ["POST"]),
+        ]
+        self.app = Starlette(routes=[
+            Route(path, self._endpoint(name, handler), methods=methods)
+            for path, name, handler, methods in routes
+        ])
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.app(scope, receive, send)
+
+    def _endpoint(self, name: str, handler: Handler) -> Callable[[Request], Awaitable[Response]]:
+        async def endpoint(request: Request) -> Response:
+            response = await self._respond(name, handler, request)
+            self.requests[(name, response.status_code)] += 1
+            return response
+
+        return endpoint
+
+    async def _respond(self, name: str, handler: Handler, request: Request) -> Response:
+        if self.bucket is not None and not self.bucket.take():
+            return JSONResponse({"message": "Too Many Attempts."}, status_code=429)
+        authorized = request.headers.get("authorization") == f"Bearer {TOKEN}"
+        if name not in ("root", "auth") and not authorized:
+            return JSONResponse({"message": "Token has expired"}, status_code=401)
+
+        await asyncio.sleep(self.config.latency_for(name).sample(self.rng))
+        if name != "root" and self.rng.random() < self.config.error_rate:
+            status_code = self.rng.choice([500, 502, 503])
+            return JSONResponse({"message": "Simulated upstream error"}, status_code=status_code)
+        return JSONResponse(await handler(request))
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def root(self, request: Request) -> Dict[str, Any]:
+        return {}
+
+    async def login(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        return {"token": TOKEN, "email": body.get("email")}
+
+    async def pickup_locations(self, request: Request) -> Dict[str, Any]:
+        return {"data": {"shipping_address": PICKUP_LOCATIONS}}
+
+    async def serviceability(self, request: Request) -> Dict[str, Any]:
+        params = request.query_params
+        weight = float(params.get("weight", 0.5))
+        slabs = max(1, math.ceil(weight / 0.5))
+        # Prices vary by lane so rate history sees distinct routes
+        lane_factor = 1 + (int(params.get("delivery_postcode", "0")[:3] or 0) % 7) / 20
+        couriers = [
+            {
+                "courier_company_id": courier["courier_company_id"],
+                "courier_name": courier["courier_name"],
+                "rate": round(courier["base_rate"] * slabs * lane_factor, 2),
+                "estimated_delivery_days": str(courier["days"]),
+                "cod": int(params.get("cod", 0)),
+            }
+            for courier in COURIERS
+        ]
+        return {"status": 200, "data": {"available_courier_companies": couriers}}
+
+    async def create_order(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        order_id, shipment_id = self._new_id(), self._new_id()
+        self.orders[order_id] = {
+            "channel_order_id": body.get("order_id"), "shipment_id": shipment_id
+        }
+        self.shipments[shipment_id] = {"order_id": order_id, "awb_code": None, "tracked": 0}
+        return {
+            "order_id": order_id,
+            "shipment_id": shipment_id,
+            "status": "NEW",
+            "status_code": 1,
+            "awb_code": "",
+            "courier_company_id": "",
+            "courier_name": "",
+        }
+
+    async def list_orders(self, request: Request) -> Dict[str, Any]:
+        search = request.query_params.get("search")
+        return {"data": [
+            {
+                "id": order_id,
+                "channel_order_id": order["channel_order_id"],
+                "shipments": [{"id": order["shipment_id"]}],
+            }
+            for order_id, order in self.orders.items()
+            if search is None or str(order["channel_order_id"]) == search
+        ]}
+
+    async def assign_awb(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        shipment_id = int(body["shipment_id"])
+        shipment = self.shipments.setdefault(
+            shipment_id, {"order_id": None, "awb_code": None, "tracked": 0}
+        )
+        courier = next(
+            (c for c in COURIERS if c["courier_company_id"] == body.get("courier_id")),
+            COURIERS[shipment_id % len(COURIERS)],
+        )
+        if shipment["awb_code"] is None:
+            shipment["awb_code"] = f"SIM{shipment_id:012d}"
+            self.awbs[shipment["awb_code"]] = shipment_id
+        return {
+            "awb_assign_status": 1,
+            "response": {"data": {
+                "awb_code": shipment["awb_code"],
+                "courier_company_id": courier["courier_company_id"],
+                "courier_name": courier["courier_name"],
+                "shipment_id": shipment_id,
+                "order_id": shipment["order_id"],
+            }},
+        }
+
+    async def generate_label(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        ids = body.get("shipment_id") or []
+        return {
+            "label_created": 1,
+            "label_url": f"https://simulator.local/labels/{'-'.join(map(str, ids[:3]))}.pdf",
+            "response": "Label has been created and uploaded successfully!",
+            "not_created": [],
+        }
+
+    async def schedule_pickup(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        return {
+            "pickup_status": 1,
+            "response": {
+                "pickup_scheduled_date": f"{datetime.utcnow():%Y-%m-%d} 12:00:00",
+                "pickup_token_number": f"SIM-{self._new_id()}",
+                "status": 3,
+                "data": f"Pickup is scheduled for {len(body.get('shipment_id') or [])} shipments",
+            },
+        }
+
+    async def track(self, request: Request) -> Dict[str, Any]:
+        return self._tracking(request.path_params["awb_code"])
+
+    async def track_many(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        return {awb_code: self._tracking(awb_code) for awb_code in body.get("awbs") or []}
+
+    def _tracking(self, awb_code: str) -> Dict[str, Any]:
+        shipment_id = self.awbs.get(awb_code)
+        if shipment_id is None:
+            return {"tracking_data": {
+                "track_status": 0, "shipment_status": None, "shipment_track": [],
+                "error": f"Aahh! There is no activities found in our DB for AWB {awb_code}",
+            }}
+
+        shipment = self.shipments[shipment_id]
+        shipment["tracked"] += 1
+        step = min(shipment["tracked"] // self.config.track_steps, len(TRACKING_STATUSES) - 1)
+        history: List[Dict[str, Any]] = [
+            {"date": f"{datetime.utcnow():%Y-%m-%d %H:%M:%S}", "status": status, "location": "Hub"}
+            for status in TRACKING_STATUSES[:step + 1]
+        ]
+        return {"tracking_data": {
+            "track_status": 1,
+            "shipment_status": TRACKING_STATUSES[step],
+            "shipment_track": history,
+        }}
+
+
+class SimulatorServer:
+    """The simulator on an ephemeral localhost port, served from its own thread and loop."""
+
+    def __init__(self, simulator: ShiprocketSimulator):
+        self.simulator = simulator
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.url = "http://127.0.0.1:%d" % self.socket.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(simulator, log_level="warning"))
+        self.thread = threading.Thread(
+            target=self.server.run, kwargs={"sockets": [self.socket]}, daemon=True
+        )
+
+    def __enter__(self) -> "SimulatorServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--median-ms", type=float, default=100.0)
+    parser.add_argument("--p99-ms", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second")
+    parser.add_argument("--track-steps", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = ShiprocketSimulator(SimulatorConfig(
+        latency=Latency(args.median_ms, args.p99_ms),
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        track_steps=args.track_steps,
+        seed=args.seed,
+    ))
+    uvicorn.run(simulator, host=args.host, port=args.port, log_level="warning")
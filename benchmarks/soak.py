@@ -0,0 +1,240 @@
+"""
+Soak test: hours of mixed traffic, failing on memory, descriptor or pool growth.
+
+Runs the app in process against the Shiprocket simulator like
+``benchmarks.load``, cycling through every scenario at a fixed concurrency
+for ``--minutes``. After a warmup it takes a baseline, then samples
+periodically (after a full garbage collection): RSS, memory traced by
+``tracemalloc``, open file descriptors and sockets, DB pool state, asyncio
+tasks and cached Shiprocket accounts. Growth of the final, idle sample over
+the baseline beyond the thresholds fails the run (exit status 1), and the
+report lists the allocation sites that grew most::
+
+    python -m benchmarks.soak --minutes 360 --sample-minutes 5 --output soak.json
+
+Like the load suite it deletes the orders it created but not analytics
+rows; point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.session import engine
+from app.services.accounts import account_registry
+from benchmarks.load import (
+    cleanup,
+    drive,
+    git_commit,
+    isolate_settings,
+    new_prefix,
+    running_app,
+    scenarios,
+    seed,
+)
+from benchmarks.simulator import Latency, ShiprocketSimulator, SimulatorConfig
+
+# Metrics compared between the baseline and the final sample, with the
+# command line option holding the allowed growth
+THRESHOLDS = {
+    "rss_mb": "max_rss_growth_mb",
+    "traced_mb": "max_traced_growth_mb",
+    "fds": "max_fd_growth",
+    "sockets": "max_socket_growth",
+    "tasks": "max_task_growth",
+}
+
+
+def rss_bytes() -> int:
+    """Current resident set size; the peak where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def descriptor_counts() -> Tuple[Optional[int], Optional[int]]:
+    """Open file descriptors and how many of them are sockets (Linux only)."""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None, None
+    sockets = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                sockets += 1
+        except OSError:
+            continue
+    return len(fds), sockets
+
+
+def take_sample(started: float, requests: int, errors: int) -> Dict[str, Any]:
+    gc.collect()
+    fds, sockets = descriptor_counts()
+    pool = engine.pool
+    return {
+        "elapsed_s": round(time.monotonic() - started, 1),
+        "requests": requests,
+        "errors": errors,
+        "rss_mb": round(rss_bytes() / 2**20, 1),
+        "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 2),
+        "fds": fds,
+        "sockets": sockets,
+        "tasks": len(asyncio.all_tasks()),
+        "pool_size": pool.size(),
+        "pool_checked_out": pool.checkedout(),
+        "pool_overflow": pool.overflow(),
+        "shiprocket_accounts": len(account_registry),
+    }
+
+
+def snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+
+
+def top_allocations(
+    baseline: tracemalloc.Snapshot, final: tracemalloc.Snapshot, limit: int
+) -> List[Dict[str, Any]]:
+    """Allocation sites that grew most between two snapshots."""
+    return [
+        {
+            "site": str(stat.traceback[0]),
+            "growth_kib": round(stat.size_diff / 1024, 1),
+            "size_kib": round(stat.size / 1024, 1),
+            "count_growth": stat.count_diff,
+        }
+        for stat in final.compare_to(baseline, "lineno")[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+def evaluate(
+    baseline: Dict[str, Any], final: Dict[str, Any], limits: Dict[str, float]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Growth of every tracked metric, and the ones over their limit."""
+    growth, failures = {}, []
+    for metric, option in THRESHOLDS.items():
+        if baseline.get(metric) is None or final.get(metric) is None:
+            continue
+        growth[metric] = round(final[metric] - baseline[metric], 2)
+        if growth[metric] > limits[option]:
+            failures.append(f"{metric} grew by {growth[metric]} (limit {limits[option]})")
+    if final.get("pool_checked_out"):
+        failures.append(f"{final['pool_checked_out']} DB connections still checked out when idle")
+    return growth, failures
+
+
+async def soak(args: argparse.Namespace) -> Dict[str, Any]:
+    config = SimulatorConfig(
+        latency=Latency(args.median_ms, args.p99_ms),
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    limits = {option: getattr(args, option) for option in THRESHOLDS.values()}
+    prefix = new_prefix()
+    samples: List[Dict[str, Any]] = []
+    requests = errors = 0
+
+    async with running_app(ShiprocketSimulator(config)) as client:
+        try:
+            factories = list(scenarios(*await seed(client, prefix, args.orders, args.concurrency, {})).values())
+
+            def mixed(i: int):
+                return factories[i % len(factories)](i // len(factories))
+
+            started = time.monotonic()
+            warmup_until = started + args.warmup_minutes * 60
+            end = warmup_until + args.minutes * 60
+            next_sample = warmup_until
+            baseline_snapshot = None
+
+            while time.monotonic() < end:
+                result = await drive(client, mixed, args.round_requests, args.concurrency)
+                requests += result["requests"]
+                errors += result["errors"]
+                if time.monotonic() < next_sample:
+                    continue
+
+                samples.append(take_sample(started, requests, errors))
+                if baseline_snapshot is None:
+                    baseline_snapshot = snapshot()
+                next_sample += args.sample_minutes * 60
+                print(json.dumps(samples[-1]), file=sys.stderr)
+
+            # Let write-behind flushes and background tasks finish before the idle sample
+            await asyncio.sleep(args.settle_seconds)
+            final = take_sample(started, requests, errors)
+            final_snapshot = snapshot()
+        finally:
+            await cleanup(prefix)
+
+    baseline = samples[0] if samples else final
+    growth, failures = evaluate(baseline, final, limits)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "minutes": args.minutes,
+            "warmup_minutes": args.warmup_minutes,
+            "concurrency": args.concurrency,
+            "simulator": config.describe(),
+            "thresholds": limits,
+        },
+        "baseline": baseline,
+        "final": final,
+        "growth": growth,
+        "failures": failures,
+        "top_allocations": top_allocations(baseline_snapshot or final_snapshot, final_snapshot, args.top),
+        "samples": samples,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=float, default=240, help="after the warmup")
+    parser.add_argument("--warmup-minutes", type=float, default=5)
+    parser.add_argument("--sample-minutes", type=float, default=5)
+    parser.add_argument("--settle-seconds", type=float, default=5)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--round-requests", type=int, default=200)
+    parser.add_argument("--median-ms", type=float, default=50.0)
+    parser.add_argument("--p99-ms", type=float, default=400.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=10, help="tracemalloc traceback depth")
+    parser.add_argument("--top", type=int, default=20, help="allocation sites to report")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50)
+    parser.add_argument("--max-traced-growth-mb", type=float, default=20)
+    parser.add_argument("--max-fd-growth", type=float, default=10)
+    parser.add_argument("--max-socket-growth", type=float, default=10)
+    parser.add_argument("--max-task-growth", type=float, default=10)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    isolate_settings()
+    tracemalloc.start(args.frames)
+    report = asyncio.run(soak(args))
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+    for failure in report["failures"]:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if report["failures"] else 0)
@@ -0,0 +1,187 @@
+"""Tests for admission control and request deadlines."""
+
+import asyncio
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from sqlalchemy.exc import DBAPIError
+
+from app.api.deps import timeout_error
+from app.api.v1.endpoints import shipments
+from app.config import settings
+from app.db.session import apply_request_deadline
+from app.main import timeout_exception_handler
+from app.middleware.admission import AdmissionControlMiddleware
+from app.services.accounts import get_account_registry
+from app.services.shiprocket import INTERACTIVE, ShiprocketService
+from app.utils import deadline
+
+
+def make_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/budget")
+    async def budget():
+        return {"remaining": deadline.remaining()}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        route_limits={"/slow": [1, 1]},
+        default_concurrency=10,
+        default_queue=10,
+        exempt_paths=["/health"],
+        default_timeout=30.0,
+        max_timeout=30.0,
+    )
+    return app
+
+
+async def test_sheds_requests_beyond_queue():
+    """With one slot and one queue place, a third concurrent request gets a 503."""
+    release = asyncio.Event()
+    app = make_app(release)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = asyncio.create_task(ac.get("/slow"))
+        second = asyncio.create_task(ac.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        shed = await ac.get("/slow")
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"]
+
+        # Other routes and exempt paths are unaffected
+        assert (await ac.get("/budget")).status_code == 200
+        assert (await ac.get("/health")).status_code == 200
+
+        release.set()
+        assert (await first).status_code == 200
+        assert (await second).status_code == 200
+
+
+async def test_queued_request_gives_up_at_its_deadline():
+    """A request still queued when its deadline passes is shed, not served late."""
+    release = asyncio.Event()
+    app = make_app(release)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = asyncio.create_task(ac.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        response = await ac.get("/slow", headers={"X-Request-Timeout": "0.1"})
+        assert response.status_code == 503
+
+        release.set()
+        assert (await first).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [("5", 5.0), ("120", 30.0), ("garbage", 30.0), (None, 30.0)],
+)
+async def test_deadline_header_reaches_handlers(header, expected):
+    app = make_app(asyncio.Event())
+    headers = {"X-Request-Timeout": header} if header else {}
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/budget", headers=headers)
+
+    remaining = response.json()["remaining"]
+    assert expected - 1 < remaining <= expected
+
+
+def test_budget_is_capped_by_deadline():
+    assert deadline.budget(30.0) == 30.0
+    with deadline.deadline_after(2.0):
+        assert deadline.budget(30.0) <= 2.0
+    with deadline.deadline_after(-1.0):
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.budget(30.0)
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def exec_driver_sql(self, statement, parameters=None, execution_options=None):
+        self.statements.append((statement, execution_options))
+
+
+def test_statement_timeout_is_only_set_when_tighter_than_the_default(monkeypatch):
+    """Transactions skip the SET unless the deadline is closer than the connection's timeout."""
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 30_000)
+    conn = RecordingConnection()
+
+    apply_request_deadline(None, None, conn)
+    with deadline.deadline_after(55.0):
+        apply_request_deadline(None, None, conn)
+    assert conn.statements == []
+
+    with deadline.deadline_after(2.0):
+        apply_request_deadline(None, None, conn)
+    [(statement, options)] = conn.statements
+    assert statement.startswith("SET LOCAL statement_timeout = 1")
+    assert options == {"instrument": False}
+
+    with deadline.deadline_after(-1.0):
+        with pytest.raises(deadline.DeadlineExceeded):
+            apply_request_deadline(None, None, conn)
+
+
+async def test_timeouts_are_answered_with_503_or_504():
+    """Running out of time is reported as such, not as a generic server error."""
+    class QueryCanceled(Exception):
+        sqlstate = "57014"
+
+    app = FastAPI()
+
+    @app.get("/late")
+    async def late():
+        raise deadline.DeadlineExceeded("Request deadline exceeded")
+
+    @app.get("/cancelled")
+    async def cancelled():
+        try:
+            raise DBAPIError("SELECT pg_sleep(60)", {}, QueryCanceled())
+        except Exception as e:
+            raise timeout_error(e) or HTTPException(status_code=500, detail=str(e))
+
+    app.add_exception_handler(deadline.DeadlineExceeded, timeout_exception_handler)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        assert (await ac.get("/late")).status_code == 503
+        assert (await ac.get("/cancelled")).status_code == 504
+    assert timeout_error(ValueError("other")) is None
+
+
+async def test_shiprocket_call_out_of_time_is_answered_with_503():
+    """A Shiprocket call still waiting for a slot at the deadline is a 503, not a 500."""
+    service = ShiprocketService(name="deadline")
+
+    class Registry:
+        async def get(self, tenant_id=None):
+            return service
+
+    app = FastAPI()
+    app.include_router(shipments.router)
+    app.dependency_overrides[get_account_registry] = Registry
+    params = {"pickup_postcode": "560001", "delivery_postcode": "110001", "weight": 0.5}
+
+    # Every slot is taken, so the call queues until its deadline
+    for _ in range(service._limiter.limit):
+        await service._limiter.wait_for_slot(INTERACTIVE)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        with deadline.deadline_after(0.05):
+            response = await ac.get("/serviceability", params=params)
+    await service.aclose()
+
+    assert response.status_code == 503
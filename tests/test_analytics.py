@@ -0,0 +1,62 @@
+"""Test analytics and tracking helpers."""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.analytics import CourierDailyStats
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.analytics import (
+    get_courier_performance,
+    percentile,
+    record_awb_assigned,
+    record_status_change,
+)
+from app.services.tracking import is_rto, normalize_status
+
+
+def test_normalize_status():
+    """Numeric codes and strings map to the same status names."""
+    assert normalize_status(7) == "DELIVERED"
+    assert normalize_status("7") == "DELIVERED"
+    assert normalize_status("Delivered ") == "DELIVERED"
+    assert normalize_status(None) is None
+    assert is_rto(normalize_status(10))
+
+
+def test_percentile_from_histogram():
+    """Percentiles are read from the cumulative bucket counts."""
+    histogram = {1: 10, 2: 50, 3: 30, 7: 10}
+    
+    assert percentile(histogram, 0.5) == 2
+    assert percentile(histogram, 0.9) == 3
+    assert percentile(histogram, 1.0) == 7
+    assert percentile({}, 0.5) is None
+
+
+async def test_status_changes_are_counted_once(db_session):
+    """Repeated, reassigned and post-final updates do not count a shipment twice."""
+    at = datetime(2026, 3, 10)
+    order = Order(pickup_location="Primary", billing_pincode="560034")
+    shipment = Shipment(courier_name="Idem", created_at=datetime(2026, 3, 1))
+    
+    await record_awb_assigned(db_session, "Idem", order)
+    await record_awb_assigned(db_session, "Idem", order, previous_awb="AWB1")
+    for previous, current in [
+        (None, "IN TRANSIT"),
+        ("IN TRANSIT", "DELIVERED"),
+        ("DELIVERED", "DELIVERED"),
+        ("DELIVERED", "RTO INITIATED"),
+    ]:
+        await record_status_change(db_session, shipment, order, previous, current, at)
+    await db_session.commit()
+    
+    rows = await get_courier_performance(db_session, at.date(), at.date(), courier_name="Idem")
+    day_rows = await db_session.scalars(
+        select(CourierDailyStats).where(CourierDailyStats.courier_name == "Idem")
+    )
+    
+    assert [(row["delivered"], row["rto"]) for row in rows] == [(1, 0)]
+    assert rows[0]["p50_delivery_days"] == 9
+    assert sum(row.shipments for row in day_rows.all()) == 1
@@ -1,7 +1,20 @@
 """Test API endpoints."""
 
+from datetime import datetime
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+
+from app import main as main_module
+from app.api.deps import get_current_user
+from app.api.v1.endpoints import shipments as shipments_module
+from app.main import app as main_app
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.shiprocket import shiprocket_service
+from app.services.warmup import WarmupState
+from benchmarks.simulator import ShiprocketSimulator, SimulatorServer
 
 
 @pytest.mark.asyncio
@@ -48,7 +61,75 @@ async def test_create_order(client: AsyncClient):
         "weight": 0.5
     }
     
-    # Note: This will fail without valid Shiprocket credentials
-    # In production, mock the Shiprocket service
-    response = await client.post("/api/v1/orders/", json=order_data)
-    # assert response.status_code == 201
+    # Shiprocket is played by the local simulator
+    main_app.dependency_overrides[get_current_user] = lambda: "test@example.com"
+    with SimulatorServer(ShiprocketSimulator()) as server:
+        base_url, shiprocket_service.base_url = shiprocket_service.base_url, server.url
+        try:
+            response = await client.post("/api/v1/orders/", json=order_data)
+        finally:
+            shiprocket_service.base_url = base_url
+            await shiprocket_service.aclose()
+    
+    assert response.status_code == 201
+    assert response.json()["status"] == "submitted"
+
+
+@pytest.mark.asyncio
+async def test_readiness_check(monkeypatch):
+    """Test readiness endpoint before and after warmup."""
+    state = WarmupState()
+    monkeypatch.setattr(main_module, "warmup_state", state)
+    
+    async with AsyncClient(app=main_app, base_url="http://test") as client:
+        warming = await client.get("/ready")
+        state.ready, state.duration_ms = True, 1234.4
+        ready = await client.get("/ready")
+    
+    assert warming.status_code == 503
+    assert warming.json() == {"status": "warming_up"}
+    assert ready.status_code == 200
+    assert ready.json() == {"status": "ready", "warmup_ms": 1234}
+
+
+class RejectingPickups:
+    """Pickup scheduler that rejects one pickup location."""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+
+    async def schedule(self, tenant_id, pickup_location, shipment_ids):
+        if pickup_location == self.rejected:
+            raise RuntimeError(f"pickup at {pickup_location} rejected")
+        return {"pickup_status": 1}
+
+
+@pytest.mark.asyncio
+async def test_schedule_pickup_reports_each_location(client: AsyncClient, db_session, monkeypatch):
+    """A rejected location is reported and left unscheduled; the others are marked."""
+    for index, location in enumerate(["Primary", "Warehouse Delhi"]):
+        order = Order(
+            order_id=f"PICK00{index}", order_date=datetime(2026, 2, 7), pickup_location=location,
+            billing_customer_name="Test User", billing_city="Bangalore", billing_pincode="560001",
+            billing_state="Karnataka", billing_country="India", billing_phone="9999999999",
+            order_items=[], payment_method="Prepaid", weight=0.5,
+        )
+        db_session.add(order)
+        await db_session.flush()
+        db_session.add(Shipment(order_id=order.id, shiprocket_shipment_id=9100 + index))
+    await db_session.commit()
+    
+    main_app.dependency_overrides[get_current_user] = lambda: "test@example.com"
+    monkeypatch.setattr(shipments_module, "pickup_scheduler", RejectingPickups("Warehouse Delhi"))
+    response = await client.post(
+        "/api/v1/shipments/schedule-pickup", json={"shipment_id": [9100, 9101]}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["response"] == {"Primary": {"pickup_status": 1}}
+    assert "Warehouse Delhi" in response.json()["errors"]["Warehouse Delhi"]
+    result = await db_session.execute(
+        select(Shipment.shiprocket_shipment_id, Shipment.pickup_scheduled)
+        .order_by(Shipment.shiprocket_shipment_id)
+    )
+    assert result.all() == [(9100, True), (9101, False)]
@@ -0,0 +1,98 @@
+"""Test partition helpers and cold archival."""
+
+import gzip
+import json
+from datetime import date, datetime, time
+
+from sqlalchemy import select
+
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.archive import (
+    PARTITIONED_TABLES,
+    OrderArchiver,
+    add_months,
+    create_partition,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+)
+from tests.conftest import test_engine
+
+
+def test_add_months_rolls_over_years():
+    """Month arithmetic lands on the first of the month across year ends."""
+    assert add_months(date(2026, 11, 15), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 12, 1), 1) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -14) == date(2025, 1, 1)
+
+
+def test_partition_name():
+    """Partition names match the ones created by the migration."""
+    assert partition_name("orders", date(2026, 2, 1)) == "orders_p2026_02"
+
+
+def archived_order(order_id: str, created_at: datetime, status: str) -> Order:
+    order = Order(
+        order_id=order_id, order_date=created_at, pickup_location="Primary",
+        billing_customer_name="Test User", billing_city="Bangalore", billing_pincode="560001",
+        billing_state="Karnataka", billing_country="India", billing_phone="9999999999",
+        order_items=[], payment_method="Prepaid", weight=0.5, created_at=created_at,
+    )
+    order.shipments.append(Shipment(current_status=status, created_at=created_at))
+    return order
+
+
+async def test_ensure_partitions_is_idempotent(setup_database):
+    """Upcoming monthly partitions are created once for both tables."""
+    this_month = date.today().replace(day=1)
+    await ensure_partitions(months_ahead=5, bind=test_engine)
+    await ensure_partitions(months_ahead=5, bind=test_engine)
+
+    async with test_engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            months = [month for _, month in await list_partitions(conn, table)]
+            assert [add_months(this_month, offset) for offset in range(6)] == months[-6:]
+
+
+async def test_archiver_moves_closed_orders_and_drops_empty_partitions(db_session, tmp_path):
+    """Closed old orders go to gzipped JSONL; open ones and their partitions stay."""
+    this_month = date.today().replace(day=1)
+    closed_month, open_month = add_months(this_month, -14), add_months(this_month, -13)
+    async with test_engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            for month in (closed_month, open_month):
+                await create_partition(conn, table, month)
+
+    db_session.add_all([
+        archived_order("ARCHIVE-CLOSED", datetime.combine(closed_month, time()), "DELIVERED"),
+        archived_order("ARCHIVE-OPEN", datetime.combine(open_month, time()), "IN TRANSIT"),
+    ])
+    await db_session.commit()
+
+    archiver = OrderArchiver(
+        archive_dir=str(tmp_path), retention_months=12, chunk_size=1, bind=test_engine
+    )
+    archived = await archiver.run()
+
+    assert archived == {
+        partition_name("orders", closed_month): 1,
+        partition_name("orders", open_month): 0,
+    }
+    [path] = tmp_path.iterdir()
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        [record] = [json.loads(line) for line in fh]
+    assert record["order_id"] == "ARCHIVE-CLOSED"
+    assert [shipment["current_status"] for shipment in record["shipments"]] == ["DELIVERED"]
+
+    remaining = await db_session.execute(
+        select(Order.order_id).where(Order.order_id.in_(["ARCHIVE-CLOSED", "ARCHIVE-OPEN"]))
+    )
+    assert remaining.scalars().all() == ["ARCHIVE-OPEN"]
+
+    async with test_engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            names = [name for name, _ in await list_partitions(conn, table)]
+            assert partition_name(table, closed_month) not in names
+            assert partition_name(table, open_month) in names
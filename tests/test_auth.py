@@ -0,0 +1,43 @@
+"""Test authentication helpers."""
+
+from datetime import timedelta
+import pytest
+from jose import JWTError
+
+from app.services import auth as auth_service
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """The cache stays bounded and evicts the oldest entry."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_decode_access_token_caches_verified_tokens(monkeypatch):
+    """A verified token is served from the cache on the next request."""
+    token = auth_service.create_access_token("user@example.com")
+    assert auth_service.decode_access_token(token) == "user@example.com"
+    
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should have been cached")
+    
+    monkeypatch.setattr(auth_service.jwt, "decode", fail_decode)
+    assert auth_service.decode_access_token(token) == "user@example.com"
+
+
+def test_decode_access_token_rejects_expired_tokens():
+    """Expired tokens are never cached or accepted."""
+    token = auth_service.create_access_token(
+        "user@example.com", expires_delta=timedelta(seconds=-1)
+    )
+    with pytest.raises(JWTError):
+        auth_service.decode_access_token(token)
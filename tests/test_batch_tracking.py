@@ -0,0 +1,126 @@
+"""Tests for batch tracking."""
+
+from datetime import datetime, timedelta
+
+import httpx
+import orjson
+
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.batch_tracking import BatchTracker
+from app.services.shiprocket import ShiprocketService
+from benchmarks.simulator import ShiprocketSimulator, SimulatorConfig, SimulatorServer
+
+
+class RecordingTracker(BatchTracker):
+    """Tracker whose writes are recorded instead of sent to the database."""
+
+    def __init__(self, **kwargs):
+        super().__init__(session_factory=None, **kwargs)
+        self.stored = []
+
+    async def store(self, updates, known):
+        self.stored.append({awb: status for awb, status, _, _ in updates})
+
+
+class FakeService:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def track_shipments(self, awb_codes):
+        self.calls.append(list(awb_codes))
+        if self.fail:
+            raise httpx.ConnectError("upstream down")
+        return {
+            awb: {"tracking_data": {"shipment_status": 7, "shipment_track": [{"status": "Delivered"}]}}
+            for awb in awb_codes if not awb.startswith("LOST")
+        }
+
+
+class FakeRegistry:
+    def __init__(self, service: FakeService):
+        self.service = service
+        self.tenants = []
+
+    async def get(self, tenant_id=None):
+        self.tenants.append(tenant_id)
+        return self.service
+
+
+def row(awb_code: str, tracked_ago: timedelta, tenant_id=None):
+    shipment = Shipment(
+        id=hash(awb_code) % 10_000, awb_code=awb_code, current_status="IN TRANSIT",
+        tracking_history=[{"status": "In Transit"}], created_at=datetime(2026, 2, 1),
+        last_tracked_at=datetime.utcnow() - tracked_ago,
+    )
+    return shipment, Order(tenant_id=tenant_id)
+
+
+async def collect(tracker, rows, awb_codes, accounts, max_age=timedelta(minutes=5)):
+    return [orjson.loads(line) async for line in tracker.stream(rows, awb_codes, max_age, accounts)]
+
+
+async def test_fresh_awbs_are_served_without_upstream_calls():
+    tracker = RecordingTracker()
+    registry = FakeRegistry(FakeService())
+    rows = [row("AWB1", timedelta(seconds=10)), row("AWB2", timedelta(seconds=20))]
+
+    lines = await collect(tracker, rows, ["AWB1", "AWB2"], registry)
+
+    assert [(line["awb_code"], line["source"]) for line in lines] == [("AWB1", "cache"), ("AWB2", "cache")]
+    assert lines[0]["current_status"] == "IN TRANSIT"
+    assert registry.service.calls == [] and tracker.stored == []
+
+
+async def test_stale_awbs_are_fetched_in_chunks_per_account_and_stored_once():
+    tracker = RecordingTracker(chunk_size=2, concurrency=2)
+    registry = FakeRegistry(FakeService())
+    rows = [
+        row("AWB1", timedelta(seconds=10)),
+        row("AWB2", timedelta(hours=1)),
+        row("AWB3", timedelta(hours=1), tenant_id="acme"),
+    ]
+    awb_codes = ["AWB1", "AWB2", "AWB3", "NEW1", "NEW2", "LOST1"]
+
+    lines = await collect(tracker, rows, awb_codes, registry)
+
+    by_awb = {line["awb_code"]: line for line in lines}
+    assert lines[0]["awb_code"] == "AWB1" and lines[0]["source"] == "cache"
+    assert sorted(by_awb) == sorted(awb_codes)
+    assert by_awb["AWB2"]["source"] == "shiprocket"
+    assert by_awb["AWB2"]["current_status"] == "DELIVERED"
+    assert by_awb["LOST1"]["source"] == "error"
+    # Default account: AWB2, NEW1, NEW2, LOST1 in two chunks; acme: AWB3
+    assert sorted(map(len, registry.service.calls)) == [1, 2, 2]
+    assert sorted(registry.tenants, key=str) == sorted([None, None, "acme"], key=str)
+    # Only stored shipments are written, all in one batch
+    assert tracker.stored == [{"AWB2": "DELIVERED", "AWB3": "DELIVERED"}]
+
+
+async def test_upstream_failure_is_streamed_per_awb():
+    tracker = RecordingTracker()
+    registry = FakeRegistry(FakeService(fail=True))
+
+    lines = await collect(tracker, [row("AWB1", timedelta(hours=1))], ["AWB1", "NEW1"], registry)
+
+    assert {line["awb_code"]: line["source"] for line in lines} == {"AWB1": "error", "NEW1": "error"}
+    assert tracker.stored == []
+
+
+async def test_track_shipments_against_simulator():
+    simulator = ShiprocketSimulator(SimulatorConfig(track_steps=1))
+    with SimulatorServer(simulator) as server:
+        service = ShiprocketService(base_url=server.url, email="e", password="p", name="simulator")
+        try:
+            order = await service.create_order({"order_id": "SIM-BATCH"})
+            awb = await service.assign_awb(order["shipment_id"])
+            awb_code = awb["response"]["data"]["awb_code"]
+
+            results = await service.track_shipments([awb_code, "UNKNOWN"])
+        finally:
+            await service.aclose()
+
+    assert results[awb_code]["tracking_data"]["shipment_status"] == "PICKED UP"
+    assert results["UNKNOWN"]["tracking_data"]["shipment_status"] is None
+    assert simulator.requests[("track_many", 200)] == 1
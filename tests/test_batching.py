@@ -0,0 +1,165 @@
+"""Test micro-batching helpers."""
+
+import asyncio
+from contextvars import ContextVar
+
+import httpx
+import pytest
+
+from app.services.pickup import PickupScheduler
+from app.utils.batching import KeyedMicroBatcher, MicroBatcher
+
+
+class RejectingService:
+    """Pickup endpoint that rejects any request containing shipment 13."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def schedule_pickup(self, shipment_ids):
+        self.calls.append(list(shipment_ids))
+        if 13 in shipment_ids:
+            request = httpx.Request("POST", "https://shiprocket.test/courier/generate/pickup")
+            raise httpx.HTTPStatusError(
+                "rejected", request=request, response=httpx.Response(422, request=request)
+            )
+        return {"pickup_status": 1}
+
+
+class FakeRegistry:
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, tenant_id=None):
+        return self.service
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_by_size():
+    """Submissions are flushed together once the batch is full."""
+    calls = []
+
+    async def flush(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(flush, max_size=3, max_delay=10)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+    
+    assert results == [0, 2, 4]
+    assert calls == [[0, 1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_after_delay():
+    """A partial batch is flushed once the delay expires."""
+    calls = []
+
+    async def flush(items):
+        calls.append(list(items))
+        return items
+
+    batcher = MicroBatcher(flush, max_size=100, max_delay=0.01)
+    results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+    
+    assert results == ["a", "b"]
+    assert calls == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_errors():
+    """Every submitter of a failed batch sees the exception."""
+    async def flush(items):
+        raise RuntimeError("upstream down")
+
+    batcher = MicroBatcher(flush, max_size=2, max_delay=10)
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_keyed_micro_batcher_separates_keys():
+    """Items under different keys are never flushed together."""
+    calls = []
+
+    async def flush(key, items):
+        calls.append((key, list(items)))
+        return [key] * len(items)
+
+    batcher = KeyedMicroBatcher(flush, max_size=10, max_delay=0.01)
+    results = await asyncio.gather(
+        batcher.submit("Primary", 1),
+        batcher.submit("Secondary", 2),
+        batcher.submit("Primary", 3),
+    )
+    
+    assert results == ["Primary", "Secondary", "Primary"]
+    assert sorted(calls) == [("Primary", [1, 3]), ("Secondary", [2])]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_fails_single_items():
+    """An exception returned as an item's result is raised to that submitter only."""
+    async def flush(items):
+        return [ValueError(item) if item < 0 else item for item in items]
+
+    batcher = MicroBatcher(flush, max_size=2, max_delay=10)
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(-1), return_exceptions=True
+    )
+    
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_keyed_micro_batcher_drops_idle_keys():
+    """A key's buffer is dropped once its batch has been answered."""
+    async def flush(key, items):
+        return items
+
+    batcher = KeyedMicroBatcher(flush, max_size=10, max_delay=0.01)
+    await asyncio.gather(*(batcher.submit(f"key-{i}", i) for i in range(5)))
+    
+    assert len(batcher) == 0
+    assert await batcher.submit("key-0", 0) == 0
+    assert len(batcher) == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_pickup_fails_only_its_caller():
+    """A coalesced pickup Shiprocket rejects is retried per caller."""
+    service = RejectingService()
+    scheduler = PickupScheduler(accounts=FakeRegistry(service), max_size=10, max_delay=0.01)
+    
+    results = await asyncio.gather(
+        scheduler.schedule(None, "Primary", [11, 12]),
+        scheduler.schedule(None, "Primary", [13]),
+        return_exceptions=True,
+    )
+    
+    assert results[0] == {"pickup_status": 1}
+    assert isinstance(results[1], httpx.HTTPStatusError)
+    assert service.calls == [[11, 12, 13], [11, 12], [13]]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_in_a_fresh_context():
+    """A batch is not flushed with the context variables of whoever filled it."""
+    lane: ContextVar[str] = ContextVar("lane", default="default")
+
+    async def flush(items):
+        return [lane.get()] * len(items)
+
+    batcher = MicroBatcher(flush, max_size=2, max_delay=0.01)
+
+    async def submit(item, value):
+        lane.set(value)
+        return await batcher.submit(item)
+
+    assert await asyncio.gather(submit(1, "bulk"), submit(2, "bulk")) == ["default", "default"]
+    assert await submit(3, "bulk") == "default"
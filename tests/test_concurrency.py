@@ -0,0 +1,217 @@
+"""Priority lane and adaptive concurrency limiter tests."""
+
+import asyncio
+import heapq
+import itertools
+from typing import List, Tuple
+
+import pytest
+
+from app.services.shiprocket import ShiprocketService
+from app.utils.concurrency import AdaptiveLimit, PriorityLimiter, QueueDeadlineExceeded
+from app.utils.metrics import Registry, Counter, Histogram
+
+
+async def test_backlogged_lanes_share_by_weight():
+    """While every lane is backlogged, slots are granted in proportion to weights."""
+    limiter = PriorityLimiter(1, weights={"interactive": 3, "background": 1})
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        async with limiter.acquire("background"):
+            await release.wait()
+
+    async def job(lane):
+        async with limiter.acquire(lane):
+            order.append(lane)
+
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(job("background")) for _ in range(20)]
+    tasks += [asyncio.create_task(job("interactive")) for _ in range(20)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+    # 3:1 while both are backlogged, give or take the grant in progress
+    first = order[:16]
+    assert 11 <= first.count("interactive") <= 13
+
+
+async def test_interactive_not_starved_by_background_backlog():
+    """An interactive waiter is served within a few grants of a large backlog."""
+    limiter = PriorityLimiter(2, weights={"interactive": 8, "background": 1})
+    served = []
+
+    async def job(lane, i):
+        async with limiter.acquire(lane):
+            served.append((lane, i))
+            await asyncio.sleep(0.001)
+
+    sweep = [asyncio.create_task(job("background", i)) for i in range(500)]
+    await asyncio.sleep(0.01)
+    await job("interactive", 0)
+
+    background_done = len(served) - 1
+    assert background_done < 40
+    for task in sweep:
+        task.cancel()
+    await asyncio.gather(*sweep, return_exceptions=True)
+    assert limiter.active == 0
+
+
+async def test_queue_deadline():
+    """Waiters give up after their lane's deadline and free nothing they don't hold."""
+    limiter = PriorityLimiter(1, weights={"bulk": 1}, deadlines={"bulk": 0.01})
+
+    async with limiter.acquire("bulk"):
+        with pytest.raises(QueueDeadlineExceeded):
+            async with limiter.acquire("bulk"):
+                pass
+        assert limiter.active == 1
+
+    assert limiter.active == 0
+    assert limiter.queued() == 0
+
+
+async def test_set_limit_admits_waiters():
+    """Raising the limit admits queued waiters immediately."""
+    limiter = PriorityLimiter(1, weights={"bulk": 1})
+    release = asyncio.Event()
+
+    async def job():
+        async with limiter.acquire("bulk"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(job()) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert limiter.active == 1
+    limiter.set_limit(3)
+    await asyncio.sleep(0)
+    assert limiter.active == 3
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+def test_metrics_render():
+    """Metrics render in the Prometheus text format."""
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ["lane"]))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1)))
+    requests.inc(lane="bulk")
+    requests.inc(2, lane="bulk")
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert 'requests_total{lane="bulk"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SlotCounter:
+    """Stands in for a ``PriorityLimiter`` whose slots the simulation takes itself."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+
+
+class SimulatedUpstream:
+    """Upstream that serves ``capacity`` calls at once, queues the rest and rejects beyond 4x."""
+
+    def __init__(self, capacity: int, base_latency: float = 0.01):
+        self.capacity = capacity
+        self.base_latency = base_latency
+
+    def call(self, in_flight: int) -> Tuple[float, bool]:
+        """Latency of a call started with ``in_flight`` calls running, and whether it was served."""
+        if in_flight > 4 * self.capacity:
+            return self.base_latency, False
+        return self.base_latency * max(1.0, in_flight / self.capacity), True
+
+
+def drive(limiter, adaptive, upstream, clock, seconds):
+    """Keep every slot busy against ``upstream`` for ``seconds`` of simulated time, then drain."""
+    stop = clock.now + seconds
+    running: List[Tuple[float, int, float, bool]] = []
+    sequence = itertools.count()
+    while running or clock.now < stop:
+        while clock.now < stop and limiter.active < limiter.limit:
+            limiter.active += 1
+            latency, ok = upstream.call(limiter.active)
+            heapq.heappush(running, (clock.now + latency, next(sequence), latency, ok))
+        clock.now, _, latency, ok = heapq.heappop(running)
+        # Reported while the slot is still held, as inside ``acquire``
+        adaptive.on_sample(latency, dropped=not ok)
+        limiter.active -= 1
+
+
+def test_adaptive_limit_follows_upstream():
+    """The limit settles near what the upstream can serve and tracks changes."""
+    clock = FakeClock()
+    limiter = SlotCounter(20)
+    adaptive = AdaptiveLimit(limiter, min_limit=1, max_limit=200, window=1.0, clock=clock)
+    upstream = SimulatedUpstream(capacity=10, base_latency=0.02)
+
+    drive(limiter, adaptive, upstream, clock, 1.5)
+    assert 5 <= limiter.limit <= 25
+
+    upstream.capacity = 40
+    drive(limiter, adaptive, upstream, clock, 2.0)
+    assert limiter.limit >= 30
+
+    upstream.capacity = 5
+    drive(limiter, adaptive, upstream, clock, 1.5)
+    assert limiter.limit <= 12
+
+    # Upstream gets slower for everyone: the baseline follows
+    upstream.capacity = 10
+    upstream.base_latency = 0.06
+    drive(limiter, adaptive, upstream, clock, 2.5)
+    assert adaptive.baseline >= 0.05
+    assert 5 <= limiter.limit <= 25
+
+
+def test_adaptive_limit_never_exceeds_account_budget():
+    """An account's max_concurrency is a ceiling, whatever the connection pool size."""
+    clock = FakeClock()
+    limiter = SlotCounter(8)
+    adaptive = AdaptiveLimit(limiter, min_limit=1, max_limit=8, clock=clock)
+
+    drive(limiter, adaptive, SimulatedUpstream(capacity=100), clock, 5.0)
+    assert limiter.limit == 8
+
+    service = ShiprocketService(max_concurrency=8, max_connections=50, name="budget")
+    assert service._adaptive.max_limit == 8
+    pool_bound = ShiprocketService(max_concurrency=80, max_connections=50, name="pool")
+    assert pool_bound.max_concurrency == 50
+
+
+def test_adaptive_limit_cuts_on_drops():
+    """Dropped calls cut the limit multiplicatively, at most once per round trip."""
+    clock = FakeClock()
+    limiter = PriorityLimiter(40, weights={"bulk": 1})
+    adaptive = AdaptiveLimit(limiter, min_limit=2, max_limit=100, clock=clock)
+
+    adaptive.on_sample(0.05, dropped=True)
+    assert limiter.limit == 20
+    adaptive.on_sample(0.05, dropped=True)
+    assert limiter.limit == 20
+
+    clock.now += 0.06
+    adaptive.on_sample(0.05, dropped=True)
+    assert limiter.limit == 10
@@ -0,0 +1,186 @@
+"""Fulfilment pipeline tests."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.fulfilment import FulfilmentBatch, FulfilmentItem
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.fulfilment import FulfilmentPipeline
+from tests.conftest import TestSessionLocal
+
+
+class FakeService:
+    """Shiprocket service that records calls; ``existing`` orders are found upstream."""
+
+    def __init__(self, existing=None):
+        self.existing = existing or {}
+        self.created = []
+        self.assigned = []
+        self.labelled = []
+
+    async def find_order(self, channel_order_id):
+        return self.existing.get(channel_order_id)
+
+    async def create_order(self, payload):
+        self.created.append(payload["order_id"])
+        return {"order_id": 9000 + len(self.created), "shipment_id": 7000 + len(self.created)}
+
+    async def assign_awb(self, shipment_id, courier_id=None):
+        self.assigned.append(shipment_id)
+        return {"response": {"data": {
+            "awb_code": f"AWB{shipment_id}", "courier_company_id": 1, "courier_name": "Fake",
+        }}}
+
+    async def generate_label(self, shipment_ids):
+        self.labelled.append(list(shipment_ids))
+        return {"label_url": "https://labels.example/1.pdf"}
+
+
+class FakeRegistry:
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, tenant_id=None):
+        return self.service
+
+
+class RecordingPickups:
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.scheduled = []
+
+    async def schedule(self, tenant_id, pickup_location, shipment_ids):
+        if pickup_location in self.rejected:
+            raise RuntimeError(f"pickup at {pickup_location} rejected")
+        self.scheduled.append((pickup_location, sorted(shipment_ids)))
+        return {}
+
+
+def pipeline(service, pickups):
+    return FulfilmentPipeline(
+        accounts=FakeRegistry(service),
+        pickups=pickups,
+        session_factory=TestSessionLocal,
+        batch_delay=0.01,
+    )
+
+
+async def create_items(
+    order_ids, status="pending", updated_at=None, pickup_location="Primary", claimed_at=None
+):
+    """Store one order and fulfilment item per order ID; returns the item IDs."""
+    async with TestSessionLocal() as db:
+        batch = FulfilmentBatch(courier_id=1)
+        for order_id in order_ids:
+            order = Order(
+                order_id=order_id, order_date=datetime.utcnow(), pickup_location=pickup_location,
+                billing_customer_name="Test User", billing_city="Bangalore",
+                billing_pincode="560001", billing_state="Karnataka", billing_country="India",
+                billing_phone="9999999999", order_items=[], payment_method="Prepaid", weight=0.5,
+            )
+            db.add(order)
+            await db.flush()
+            batch.items.append(FulfilmentItem(
+                order_id=order.id, payload={"order_id": order_id}, status=status,
+                updated_at=updated_at or datetime.utcnow(),
+                owner="other-worker" if claimed_at else None, claimed_at=claimed_at,
+            ))
+        db.add(batch)
+        await db.commit()
+        return [item.id for item in batch.items]
+
+
+async def get_items(item_ids):
+    async with TestSessionLocal() as db:
+        result = await db.execute(
+            select(FulfilmentItem, Shipment)
+            .join(Shipment, FulfilmentItem.shipment_id == Shipment.id)
+            .where(FulfilmentItem.id.in_(item_ids))
+            .order_by(FulfilmentItem.id)
+        )
+        return result.all()
+
+
+async def test_run_drives_items_through_every_stage(setup_database):
+    """Orders are created and assigned one by one; labels and pickups are batched."""
+    service, pickups = FakeService(), RecordingPickups()
+    item_ids = await create_items(["FUL1", "FUL2"])
+
+    await pipeline(service, pickups).run(item_ids)
+
+    rows = await get_items(item_ids)
+    assert [(item.stage, item.status) for item, _ in rows] == [("done", "completed")] * 2
+    assert sorted(shipment.awb_code for _, shipment in rows) == ["AWB7001", "AWB7002"]
+    assert all(shipment.pickup_scheduled for _, shipment in rows)
+    assert sorted(service.created) == ["FUL1", "FUL2"]
+    assert [sorted(ids) for ids in service.labelled] == [[7001, 7002]]
+    assert pickups.scheduled == [("Primary", [7001, 7002])]
+
+
+async def test_rejected_pickup_fails_only_its_location(setup_database):
+    """Shipments at other locations of the micro-batch are still recorded as scheduled."""
+    service, pickups = FakeService(), RecordingPickups(rejected={"Warehouse Delhi"})
+    primary = await create_items(["LOC1"])
+    delhi = await create_items(["LOC2"], pickup_location="Warehouse Delhi")
+
+    await pipeline(service, pickups).run(primary + delhi)
+
+    rows = await get_items(primary + delhi)
+    assert [(item.stage, item.status) for item, _ in rows] == [
+        ("done", "completed"), ("schedule_pickup", "failed")
+    ]
+    assert [shipment.pickup_scheduled for _, shipment in rows] == [True, False]
+    assert "Warehouse Delhi" in rows[1][0].error
+    assert len(pickups.scheduled) == 1 and pickups.scheduled[0][0] == "Primary"
+
+
+async def test_run_skips_items_already_claimed(setup_database):
+    """Only pending items are claimed, so a second run does nothing."""
+    service = FakeService()
+    item_ids = await create_items(["FUL3"])
+
+    await pipeline(service, RecordingPickups()).run(item_ids)
+    await pipeline(service, RecordingPickups()).run(item_ids)
+
+    assert service.created == ["FUL3"]
+
+
+async def test_resume_stalled_reuses_orders_created_upstream(setup_database):
+    """A stalled item whose order already exists upstream is not created twice."""
+    service = FakeService(existing={"RES1": {"order_id": 8001, "shipment_id": 6001}})
+    pickups = RecordingPickups()
+    stalled = await create_items(
+        ["RES1", "RES2"], status="in_progress", updated_at=datetime.utcnow() - timedelta(days=1)
+    )
+    fresh = await create_items(["RES3"], status="in_progress")
+
+    resumed = await pipeline(service, pickups).resume_stalled()
+
+    assert resumed == 2
+    assert service.created == ["RES2"]
+    assert sorted(service.assigned) == [6001, 7001]
+    rows = await get_items(stalled + fresh)
+    assert [(item.id, item.status) for item, _ in rows] == [
+        (stalled[0], "completed"), (stalled[1], "completed")
+    ]
+
+
+async def test_resume_stalled_skips_items_with_a_live_lease(setup_database):
+    """An item whose worker still renews its lease is not taken over, however old its stage."""
+    service = FakeService()
+    day_ago = datetime.utcnow() - timedelta(days=1)
+    live = await create_items(
+        ["LEASE1"], status="in_progress", updated_at=day_ago, claimed_at=datetime.utcnow()
+    )
+    expired = await create_items(
+        ["LEASE2"], status="in_progress", updated_at=day_ago, claimed_at=day_ago
+    )
+
+    resumed = await pipeline(service, RecordingPickups()).resume_stalled()
+
+    assert resumed == 1
+    assert service.created == ["LEASE2"]
+    rows = await get_items(live + expired)
+    assert [(item.id, item.status) for item, _ in rows] == [(expired[0], "completed")]
@@ -0,0 +1,92 @@
+"""Tests for the leader-elected job scheduler."""
+
+import asyncio
+
+from app.jobs.scheduler import JOB_OVERLAPS, Job, JobScheduler
+
+
+class FakeLease:
+    """In-memory stand-in for the advisory lock, shared by all candidates."""
+
+    holder = None
+
+    def __init__(self):
+        self.alive = True
+
+    async def try_acquire(self) -> bool:
+        if FakeLease.holder is None and self.alive:
+            FakeLease.holder = self
+        return FakeLease.holder is self
+
+    async def heartbeat(self) -> bool:
+        if FakeLease.holder is not self:
+            return False
+        if not self.alive:
+            FakeLease.holder = None
+            return False
+        return True
+
+    async def release(self) -> None:
+        if FakeLease.holder is self:
+            FakeLease.holder = None
+
+
+def scheduler(lease, jobs):
+    return JobScheduler(lease, jobs, heartbeat_interval=0.01, retry_interval=0.01)
+
+
+async def test_only_the_leader_runs_jobs_and_a_follower_takes_over():
+    FakeLease.holder = None
+    runs = {"a": 0, "b": 0}
+
+    def counting(name):
+        async def job():
+            runs[name] += 1
+        return job
+
+    lease_a, lease_b = FakeLease(), FakeLease()
+    first = scheduler(lease_a, [Job("tick", counting("a"), interval=0.01)])
+    second = scheduler(lease_b, [Job("tick", counting("b"), interval=0.01)])
+    first.start()
+    await asyncio.sleep(0.005)
+    second.start()
+    await asyncio.sleep(0.1)
+
+    assert first.leading and not second.leading
+    assert runs["a"] > 0 and runs["b"] == 0
+
+    # The leader loses its database: it steps down and the follower is elected
+    lease_a.alive = False
+    await asyncio.sleep(0.1)
+    assert not first.leading and second.leading
+    assert runs["b"] > 0
+
+    await first.stop()
+    await second.stop()
+    assert FakeLease.holder is None
+
+
+async def test_overlapping_runs_are_skipped_and_cancelled_on_stop():
+    FakeLease.holder = None
+    started = 0
+    cancelled = asyncio.Event()
+
+    async def slow():
+        nonlocal started
+        started += 1
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    before = JOB_OVERLAPS.value(job="slow")
+    jobs = scheduler(FakeLease(), [Job("slow", slow, interval=0.01)])
+    jobs.start()
+    await asyncio.sleep(0.1)
+
+    assert started == 1
+    assert JOB_OVERLAPS.value(job="slow") > before
+
+    await jobs.stop()
+    assert cancelled.is_set()
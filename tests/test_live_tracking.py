@@ -0,0 +1,175 @@
+"""Live tracking fan-out tests (local dispatch and a stub pub/sub, no Redis needed)."""
+
+import asyncio
+import json
+
+from redis.exceptions import RedisError
+
+from app.services.live_tracking import (
+    Subscription,
+    TrackingBroker,
+    channel_for,
+    format_sse,
+    tracking_event,
+)
+
+
+class StubPubSub:
+    """In-memory pub/sub connection recording (un)subscriptions."""
+
+    def __init__(self):
+        self.subscribed = []
+        self.unsubscribed = []
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.subscribed.append(sorted(channels))
+
+    async def unsubscribe(self, *channels):
+        self.unsubscribed.append(sorted(channels))
+
+    async def get_message(self, timeout=None):
+        try:
+            message = await asyncio.wait_for(self.messages.get(), 0.01)
+        except asyncio.TimeoutError:
+            return None
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def aclose(self):
+        self.closed = True
+
+
+class StubRedis:
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        self.pubsubs.append(StubPubSub())
+        return self.pubsubs[-1]
+
+    async def aclose(self):
+        pass
+
+
+def stub_broker():
+    broker = TrackingBroker(redis_url="redis://unused")
+    broker._redis = StubRedis()
+    return broker
+
+
+def message(awb_code, status):
+    return {
+        "type": "message",
+        "channel": channel_for(awb_code).encode(),
+        "data": json.dumps(tracking_event(awb_code, status)).encode(),
+    }
+
+
+async def test_slow_subscriber_keeps_latest_updates():
+    """A full subscription drops its oldest update, never blocks the reader."""
+    subscription = Subscription(["AWB1"], maxsize=2)
+    for status in ("PICKED UP", "IN TRANSIT", "DELIVERED"):
+        subscription.deliver(tracking_event("AWB1", status))
+
+    first = await subscription.get(timeout=0.1)
+    second = await subscription.get(timeout=0.1)
+    assert [first["status"], second["status"]] == ["IN TRANSIT", "DELIVERED"]
+    assert await subscription.get(timeout=0.01) is None
+
+
+async def test_dispatch_reaches_only_watchers_of_the_awb():
+    """A pub/sub message is delivered to every local subscription of its AWB."""
+    broker = TrackingBroker(redis_url="redis://unused")
+    watching_one = Subscription(["AWB1"])
+    watching_both = Subscription(["AWB1", "AWB2"])
+    watching_other = Subscription(["AWB2"])
+    for subscription in (watching_one, watching_both, watching_other):
+        for awb_code in subscription.awb_codes:
+            broker._subscribers[awb_code].add(subscription)
+
+    payload = json.dumps(tracking_event("AWB1", "DELIVERED"))
+    broker.dispatch(channel_for("AWB1").encode(), payload.encode())
+
+    assert (await watching_one.get(timeout=0.1))["status"] == "DELIVERED"
+    assert (await watching_both.get(timeout=0.1))["awb_code"] == "AWB1"
+    assert await watching_other.get(timeout=0.01) is None
+
+
+def test_format_sse():
+    """Updates are framed as named server-sent events."""
+    frame = format_sse({"awb_code": "AWB1", "status": "SHIPPED"})
+    assert frame.startswith("event: tracking\ndata: {")
+    assert frame.endswith("\n\n")
+
+
+async def test_channels_are_subscribed_once_per_worker():
+    """Only AWBs nobody watched yet are subscribed; the last watcher releases them."""
+    broker = stub_broker()
+    one = await broker.subscribe(["AWB1"])
+    both = await broker.subscribe(["AWB1", "AWB2"])
+    pubsub = broker._redis.pubsubs[0]
+
+    await broker.unsubscribe(both)
+    await broker.unsubscribe(one)
+
+    assert len(broker._redis.pubsubs) == 1
+    assert pubsub.subscribed == [[channel_for("AWB1")], [channel_for("AWB2")]]
+    assert pubsub.unsubscribed == [[channel_for("AWB2")], [channel_for("AWB1")]]
+    await broker.aclose()
+
+
+async def test_reader_dispatches_until_nothing_is_watched():
+    """The reader task delivers messages and stops with the last subscription."""
+    broker = stub_broker()
+    subscription = await broker.subscribe(["AWB1"])
+    pubsub = broker._redis.pubsubs[0]
+
+    pubsub.messages.put_nowait({"type": "subscribe", "channel": b"x", "data": 1})
+    pubsub.messages.put_nowait(message("AWB1", "DELIVERED"))
+    event = await subscription.get(timeout=1)
+    await broker.unsubscribe(subscription)
+    await asyncio.wait_for(broker._reader, 1)
+
+    assert event["status"] == "DELIVERED"
+    await broker.aclose()
+
+
+async def test_resubscribe_replaces_a_lost_connection():
+    """A fresh pub/sub connection is subscribed to every watched AWB."""
+    broker = stub_broker()
+    subscription = await broker.subscribe(["AWB1", "AWB2"])
+    lost = broker._redis.pubsubs[0]
+
+    await broker._resubscribe()
+    fresh = broker._redis.pubsubs[1]
+    fresh.messages.put_nowait(message("AWB2", "IN TRANSIT"))
+
+    assert lost.closed
+    assert fresh.subscribed == [sorted([channel_for("AWB1"), channel_for("AWB2")])]
+    assert (await subscription.get(timeout=1))["awb_code"] == "AWB2"
+    await broker.unsubscribe(subscription)
+    await broker.aclose()
+
+
+async def test_reader_reconnects_after_connection_errors(monkeypatch):
+    """A pub/sub error makes the reader resubscribe on a new connection."""
+    broker = stub_broker()
+    resubscribed = asyncio.Event()
+    resubscribe = broker._resubscribe
+
+    async def tracked_resubscribe():
+        await resubscribe()
+        resubscribed.set()
+
+    monkeypatch.setattr(broker, "_resubscribe", tracked_resubscribe)
+    subscription = await broker.subscribe(["AWB1"])
+    broker._redis.pubsubs[0].messages.put_nowait(RedisError("connection lost"))
+
+    await asyncio.wait_for(resubscribed.wait(), 3)
+
+    assert broker._redis.pubsubs[1].subscribed == [[channel_for("AWB1")]]
+    await broker.unsubscribe(subscription)
+    await broker.aclose()
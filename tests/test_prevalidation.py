@@ -0,0 +1,147 @@
+"""Tests for local order pre-validation."""
+
+import asyncio
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.order import OrderCreate
+from app.services.prevalidation import OrderPrevalidator, PickupLocationCache
+from app.services.shiprocket import ShiprocketService
+from benchmarks.simulator import ShiprocketSimulator, SimulatorServer
+
+
+class FakeService:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def get_pickup_locations(self):
+        self.calls += 1
+        if self.fail:
+            raise httpx.ConnectError("upstream down")
+        return [
+            {"pickup_location": "Primary", "pin_code": 560001},
+            {"pickup_location": "Warehouse Delhi", "pin_code": 110037},
+        ]
+
+
+class FakeRegistry:
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, tenant_id=None):
+        return self.service
+
+
+def order(**overrides) -> OrderCreate:
+    data = {
+        "order_id": "PRE001",
+        "order_date": "2026-02-07",
+        "pickup_location": "Primary",
+        "billing_customer_name": "Test User",
+        "billing_city": "Bangalore",
+        "billing_pincode": "560034",
+        "billing_state": "Karnataka",
+        "billing_phone": "9999999999",
+        "order_items": [{"name": "Cable", "sku": "USB001", "units": 1, "selling_price": 299}],
+        "payment_method": "Prepaid",
+        "weight": 0.5,
+    }
+    return OrderCreate(**{**data, **overrides})
+
+
+async def test_unknown_pickup_location_is_rejected_from_cache():
+    service = FakeService()
+    prevalidator = OrderPrevalidator(enabled=True)
+
+    assert await prevalidator.problems(order(), service) == []
+    problems = await prevalidator.problems(order(pickup_location="Mumbai"), service)
+
+    assert problems == [
+        "pickup_location: Unknown pickup location 'Mumbai' (known: Primary, Warehouse Delhi)"
+    ]
+    assert service.calls == 1
+
+
+async def test_locations_are_refreshed_and_kept_when_refresh_fails():
+    service = FakeService()
+    cache = PickupLocationCache(refresh_seconds=0.01, retry_seconds=60)
+    assert "Primary" in await cache.get(None, service)
+
+    await asyncio.sleep(0.02)
+    service.fail = True
+    assert "Primary" in await cache.get(None, service)
+    assert "Primary" in await cache.get(None, service)
+    assert service.calls == 2
+
+
+async def test_orders_pass_when_locations_are_unavailable():
+    service = FakeService()
+    service.fail = True
+    prevalidator = OrderPrevalidator(enabled=True)
+
+    assert await prevalidator.problems(order(pickup_location="Anywhere"), service) == []
+
+
+async def test_lanes_without_couriers_are_rejected():
+    service = FakeService()
+    prevalidator = OrderPrevalidator(enabled=True)
+    prevalidator.record_serviceability(None, "560001", "560034", 0.5, 0, [])
+    # A COD-only gap says nothing about prepaid orders
+    prevalidator.record_serviceability(None, "560001", "110045", 0.5, 1, [])
+
+    unserviceable = ["pincode: No courier serves 560001 to 560034"]
+    assert await prevalidator.problems(order(), service) == unserviceable
+    assert await prevalidator.problems(order(billing_pincode="110045"), service) == []
+    # Nor does a gap at one weight slab about another
+    assert await prevalidator.problems(order(weight=0.4), service) == unserviceable
+    assert await prevalidator.problems(order(weight=2), service) == []
+
+    prevalidator.record_serviceability(
+        None, "560001", "560034", 0.5, 0, [{"courier_company_id": 1}]
+    )
+    assert await prevalidator.problems(order(), service) == []
+
+
+async def test_split_reports_rows_in_upload_format():
+    prevalidator = OrderPrevalidator(enabled=True)
+    rows = [(2, order()), (3, order(order_id="PRE002", pickup_location="Mumbai"))]
+
+    valid, errors = await prevalidator.split(rows, FakeRegistry(FakeService()))
+
+    assert [row for row, _ in valid] == [2]
+    assert errors[0]["row"] == 3 and errors[0]["order_id"] == "PRE002"
+
+
+def test_package_and_pincode_checks():
+    with pytest.raises(ValidationError, match="length, breadth and height"):
+        order(length=10)
+    with pytest.raises(ValidationError, match="dimensions"):
+        order(length=10, breadth=10, height=1000)
+    with pytest.raises(ValidationError, match="weight"):
+        order(weight=5000)
+    with pytest.raises(ValidationError, match="billing_pincode"):
+        order(billing_pincode="012345")
+    assert order(length=10, breadth=10, height=5).height == 5
+
+
+def test_payload_drops_unset_fields():
+    payload = order().to_shiprocket_payload()
+
+    assert "tenant_id" not in payload
+    assert "shipping_pincode" not in payload and "length" not in payload
+    assert "hsn" not in payload["order_items"][0]
+    assert payload["billing_pincode"] == "560034"
+
+
+async def test_pickup_locations_against_simulator():
+    with SimulatorServer(ShiprocketSimulator()) as server:
+        service = ShiprocketService(base_url=server.url, email="e", password="p", name="simulator")
+        try:
+            locations = await service.get_pickup_locations()
+        finally:
+            await service.aclose()
+
+    assert [location["pickup_location"] for location in locations] == ["Primary", "Warehouse Delhi"]
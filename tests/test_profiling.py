@@ -0,0 +1,71 @@
+"""Tests for on-demand request profiling."""
+
+import time
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.middleware.profiling import ProfilingMiddleware
+from app.utils import profiling
+from app.utils.profiling import ProfileStore, sign_token, verify_token
+
+
+def busy_work(seconds: float) -> int:
+    total, until = 0, time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        total += 1
+    return total
+
+
+def make_app(store: ProfileStore) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/orders/{order_id}")
+    async def get_order(order_id: int):
+        started = time.perf_counter()
+        busy_work(0.05)
+        profiling.record("shiprocket", "GET /courier/track/awb/1", started)
+        return {"id": order_id}
+
+    app.add_middleware(ProfilingMiddleware, sample_rate=0.0, store=store)
+    return app
+
+
+def test_tokens_are_signed_and_expire():
+    token = sign_token(int(time.time()) + 60, secret="s3cret")
+    assert verify_token(token, secret="s3cret")
+    assert not verify_token(token, secret="other")
+    extended = f"{int(time.time()) + 3600}.{token.partition('.')[2]}"
+    assert not verify_token(extended, secret="s3cret")
+    assert not verify_token(sign_token(int(time.time()) - 1, secret="s3cret"), secret="s3cret")
+    assert not verify_token("garbage", secret="s3cret")
+
+
+async def test_signed_request_is_profiled_and_stored(tmp_path):
+    store = ProfileStore(directory=str(tmp_path), keep=5)
+    app = make_app(store)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        plain = await ac.get("/orders/1")
+        assert "x-profile-id" not in plain.headers
+        assert store.list() == []
+
+        token = sign_token(int(time.time()) + 60)
+        response = await ac.get("/orders/7", headers={"X-Profile": token})
+        assert response.json() == {"id": 7}
+
+        forged = await ac.get("/orders/7", headers={"X-Profile": "1.deadbeef"})
+        assert "x-profile-id" not in forged.headers
+
+    profile_id = response.headers["x-profile-id"]
+    summary = store.summary(profile_id)
+    assert summary["route"] == "/orders/{order_id}"
+    assert summary["status_code"] == 200
+    assert summary["totals"]["shiprocket"]["count"] == 1
+    assert summary["samples"] > 0
+
+    with open(store.path(profile_id, "folded")) as f:
+        folded = f.read()
+    assert folded.startswith("GET /orders/{order_id};")
+    assert "busy_work" in folded
+    assert [profile["id"] for profile in store.list()] == [profile_id]
+    assert store.path("../etc/passwd", "json") is None
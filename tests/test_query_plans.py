@@ -0,0 +1,77 @@
+"""Query plan tests for the list endpoint filters."""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+
+from app.schemas.order import OrderFilters
+from app.schemas.shipment import ShipmentFilters
+from app.services.queries import (
+    ORDER_LIST_COLUMNS,
+    SHIPMENT_LIST_COLUMNS,
+    escape_like,
+    order_list_query,
+    shipment_list_query,
+    sku_units_query,
+)
+
+
+async def explain(db_session, query) -> str:
+    """Return the plan of ``query`` with sequential scans discouraged."""
+    compiled = query.limit(100).compile(
+        dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    result = await db_session.execute(text(f"EXPLAIN {compiled}"))
+    plan = "\n".join(row[0] for row in result.all())
+    await db_session.rollback()
+    return plan
+
+
+def test_escape_like():
+    """LIKE wildcards in user input are matched literally."""
+    assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+
+
+def test_list_projections_skip_json_columns():
+    """List pages select only response columns, never the heavy JSON ones."""
+    orders = str(order_list_query(OrderFilters(), ORDER_LIST_COLUMNS))
+    shipments = str(shipment_list_query(ShipmentFilters(), SHIPMENT_LIST_COLUMNS))
+    assert "order_items" not in orders
+    assert "tracking_history" not in shipments and "courier_name" in shipments
+
+
+@pytest.mark.parametrize("filters", [
+    OrderFilters(),
+    OrderFilters(status="created"),
+    OrderFilters(billing_pincode="110001"),
+    OrderFilters(payment_method="COD"),
+    OrderFilters(created_from=datetime(2026, 1, 1), created_to=datetime(2026, 2, 1)),
+    OrderFilters(q="John"),
+    OrderFilters(q="98765"),
+    OrderFilters(sku="SKU-1"),
+])
+async def test_order_filters_use_indexes(db_session, filters):
+    """Every order filter is served by an index."""
+    plan = await explain(db_session, order_list_query(filters, ORDER_LIST_COLUMNS))
+    assert "Seq Scan" not in plan, plan
+
+
+async def test_sku_units_use_items_index(db_session):
+    """Per-day SKU units only unnest orders found through the GIN index."""
+    plan = await explain(db_session, sku_units_query("SKU-1", OrderFilters()))
+    # Partitions inherit ix_orders_order_items as <partition>_order_items_idx
+    assert "_order_items_idx" in plan, plan
+
+
+@pytest.mark.parametrize("filters", [
+    ShipmentFilters(),
+    ShipmentFilters(status="NEW"),
+    ShipmentFilters(courier_name="Delhivery"),
+    ShipmentFilters(awb_prefix="SR12"),
+    ShipmentFilters(created_from=datetime(2026, 1, 1)),
+])
+async def test_shipment_filters_use_indexes(db_session, filters):
+    """Every shipment filter is served by an index."""
+    plan = await explain(db_session, shipment_list_query(filters, SHIPMENT_LIST_COLUMNS))
+    assert "Seq Scan" not in plan, plan
@@ -0,0 +1,98 @@
+"""Tests for statement instrumentation and N+1 detection."""
+
+from datetime import datetime
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+
+from app.api.deps import get_current_user
+from app.db.instrumentation import DB_N_PLUS_ONE, instrument_engine, statement_shape, track_queries
+from app.main import app as main_app
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models.order import Order
+from app.models.shipment import Shipment
+from app.services.accounts import get_account_registry
+
+sqlite = create_engine("sqlite://")
+instrument_engine(sqlite)
+
+
+def run_n_plus_one(ids) -> None:
+    with sqlite.connect() as conn:
+        for shipment_id in ids:
+            conn.execute(text("SELECT :id AS id"), {"id": shipment_id})
+
+
+def test_statement_shapes_ignore_values_and_list_lengths():
+    assert statement_shape("SELECT * FROM t WHERE id = $1") == "SELECT * FROM t WHERE id = ?"
+    assert (
+        statement_shape("SELECT *\n  FROM t WHERE id IN ($1, $2, $3) AND s = 'x'")
+        == statement_shape("SELECT * FROM t WHERE id IN ($4) AND s = 'it''s'")
+    )
+    assert statement_shape("SET LOCAL statement_timeout = 1500") == "SET LOCAL statement_timeout = ?"
+
+
+def test_repeated_shapes_are_flagged():
+    with track_queries() as outer:
+        with track_queries() as inner:
+            run_n_plus_one(range(6))
+        run_n_plus_one(range(2))
+
+    assert inner.count == 6 and outer.count == 8
+    assert inner.repeated(threshold=5) == ["SELECT ? AS id"]
+    assert inner.repeated(threshold=7) == []
+
+
+async def test_middleware_reports_server_timing_and_n_plus_one():
+    app = FastAPI()
+
+    @app.get("/labels/{count}")
+    async def labels(count: int):
+        run_n_plus_one(range(count))
+        return {"ok": True}
+
+    app.add_middleware(QueryStatsMiddleware)
+    before = DB_N_PLUS_ONE.value(route="/labels/{count}")
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        few = await ac.get("/labels/2")
+        many = await ac.get("/labels/10")
+
+    assert few.headers["server-timing"].endswith('desc="2 queries"')
+    assert many.headers["server-timing"].startswith("db;dur=")
+    assert DB_N_PLUS_ONE.value(route="/labels/{count}") == before + 1
+
+
+class FakeService:
+    async def generate_label(self, shipment_ids):
+        return {"label_url": "https://labels.example/1.pdf"}
+
+
+class FakeRegistry:
+    async def get(self, tenant_id=None):
+        return FakeService()
+
+
+async def test_generate_label_query_count(client: AsyncClient, db_session, max_queries):
+    """Labelling any number of shipments is a fixed number of statements."""
+    order = Order(
+        order_id="LABEL001", order_date=datetime(2026, 2, 7), pickup_location="Primary",
+        billing_customer_name="Test User", billing_city="Bangalore", billing_pincode="560001",
+        billing_state="Karnataka", billing_country="India", billing_phone="9999999999",
+        order_items=[], payment_method="Prepaid", weight=0.5,
+    )
+    db_session.add(order)
+    await db_session.flush()
+    db_session.add_all(
+        Shipment(order_id=order.id, shiprocket_shipment_id=9000 + i) for i in range(10)
+    )
+    await db_session.commit()
+
+    main_app.dependency_overrides[get_current_user] = lambda: "test@example.com"
+    main_app.dependency_overrides[get_account_registry] = FakeRegistry
+    with max_queries(4):
+        response = await client.post(
+            "/api/v1/shipments/generate-label",
+            json={"shipment_id": [9000 + i for i in range(10)]},
+        )
+    assert response.status_code == 200
@@ -0,0 +1,63 @@
+"""Tests for the courier rate history."""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete
+
+from app.models.rates import Courier, CourierRateDaily, CourierRateQuote
+from app.services.rates import RateHistory, parse_quotes, rate_lane, weight_slab
+from tests.conftest import TestSessionLocal
+
+COURIERS = [
+    {"courier_company_id": 12, "courier_name": "Delhivery", "rate": 52.0, "estimated_delivery_days": "4"},
+    {"courier_company_id": 7, "courier_name": "Xpressbees", "rate": 47.5, "estimated_delivery_days": 5},
+]
+
+
+def test_weight_slabs_round_up():
+    assert weight_slab(0.1) == 500
+    assert weight_slab(0.5) == 500
+    assert weight_slab(0.51) == 1000
+    assert weight_slab(2.2) == 2500
+
+
+def test_parse_quotes_skips_malformed_entries():
+    quotes = parse_quotes(COURIERS + [{"courier_name": "No id", "rate": 10}])
+    assert quotes == [(12, "Delhivery", 52.0, 4), (7, "Xpressbees", 47.5, 5)]
+    assert rate_lane("560001", "110045") == "560001>110"
+
+
+async def test_quotes_are_served_then_downsampled(setup_database):
+    """Recent quotes answer lookups; old ones survive as daily summaries."""
+    history = RateHistory(session_factory=TestSessionLocal)
+    observed = datetime.utcnow() - timedelta(days=2)
+    await history.record("560001", "110045", 0.4, 0, COURIERS, observed_at=observed)
+    await history.record("560001", "110045", 0.4, 0, COURIERS, tenant_id="acme")
+    await history.record("560001", "110045", 0.4, 1, COURIERS[:1], observed_at=observed)
+
+    async with TestSessionLocal() as db:
+        observed_at, couriers = await history.latest(db, "560001", "110045", 0.3, 0)
+        assert observed_at is None  # the default account's quote is too old
+
+        observed_at, couriers = await history.latest(
+            db, "560001", "110045", 0.3, 0, max_age=timedelta(days=3)
+        )
+        assert observed_at == observed
+        assert [c["courier_name"] for c in couriers] == ["Xpressbees", "Delhivery"]
+
+    await history.downsample(retention=timedelta(days=1))
+
+    async with TestSessionLocal() as db:
+        trend = await history.trend(
+            db, "560001", "110099", 0.5, 0, date.today() - timedelta(days=3), date.today()
+        )
+        assert [(point["courier_id"], point["samples"]) for point in trend] == [(7, 1), (12, 1)]
+        assert trend[0]["day"] == observed.date()
+        # COD rates are summarized apart from prepaid ones
+        cod_trend = await history.trend(
+            db, "560001", "110099", 0.5, 1, date.today() - timedelta(days=3), date.today()
+        )
+        assert [(point["courier_id"], point["samples"]) for point in cod_trend] == [(12, 1)]
+
+        for model in (CourierRateQuote, CourierRateDaily, Courier):
+            await db.execute(delete(model))
+        await db.commit()
@@ -0,0 +1,148 @@
+"""Test Shiprocket service client behaviour."""
+
+import asyncio
+import itertools
+import random
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.shiprocket import ShiprocketService
+from app.utils.hedging import Hedger
+
+
+def make_service(handler) -> ShiprocketService:
+    """Build a service whose HTTP client is backed by ``handler``."""
+    service = ShiprocketService(base_url="http://shiprocket.test")
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+@pytest.mark.asyncio
+async def test_token_is_reused_across_calls():
+    """Only the first call performs an upstream login."""
+    logins = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/login":
+            logins.append(request)
+            return httpx.Response(200, json={"token": "t1"})
+        assert request.headers["Authorization"] == "Bearer t1"
+        return httpx.Response(200, json={"tracking_data": {}})
+
+    service = make_service(handler)
+    await service.track_shipment("AWB1")
+    await service.track_shipment("AWB2")
+    
+    assert len(logins) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_refreshed_once():
+    """A 401 triggers one re-authentication and a retry."""
+    tokens = iter(["old", "new"])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/login":
+            return httpx.Response(200, json={"token": next(tokens)})
+        if request.headers["Authorization"] == "Bearer old":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"tracking_data": {"shipment_status": 7}})
+
+    service = make_service(handler)
+    data = await service.track_shipment("AWB1")
+    
+    assert data["tracking_data"]["shipment_status"] == 7
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop on a fake clock that jumps to the next timer once nothing is ready.
+
+    Sleeps and timeouts take no real time and always fire in the same order,
+    so latencies measured with ``loop.time()`` are exact.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._now = 0.0
+
+    def time(self) -> float:
+        return self._now
+
+    def _run_once(self) -> None:
+        if not self._ready and self._scheduled:
+            self._now = max(self._now, self._scheduled[0]._when)
+        super()._run_once()
+
+
+async def track_p99() -> float:
+    """p99 latency of tracking calls against a server with a 10x tail."""
+    calls = itertools.count()
+    jitter = random.Random(0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/login":
+            return httpx.Response(200, json={"token": "t1"})
+        # Every 30th upstream call is ten times slower than the rest
+        slow = next(calls) % 30 == 29
+        await asyncio.sleep((0.1 if slow else 0.01) * jitter.uniform(0.8, 1.2))
+        return httpx.Response(200, json={"tracking_data": {}})
+
+    service = make_service(handler)
+    loop = asyncio.get_running_loop()
+    latencies = []
+
+    async def track(awb: str) -> None:
+        started = loop.time()
+        await service.track_shipment(awb)
+        latencies.append(loop.time() - started)
+
+    for batch in range(30):
+        await asyncio.gather(*(track(f"AWB{batch}-{i}") for i in range(10)))
+
+    latencies.sort()
+    return latencies[int(len(latencies) * 0.99)]
+
+
+def run_virtual(coro):
+    loop = VirtualTimeLoop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_hedging_cuts_tracking_tail_latency(monkeypatch):
+    """Hedged tracking reads avoid most of the slow upstream tail."""
+    # The adaptive limit samples wall-clock latency, which is not simulated
+    monkeypatch.setattr(settings, "SHIPROCKET_ADAPTIVE_CONCURRENCY", False)
+    # Room for every slow call plus the fast ones beyond the percentile
+    monkeypatch.setattr(settings, "SHIPROCKET_HEDGE_BUDGET_RATIO", 0.1)
+
+    monkeypatch.setattr(settings, "SHIPROCKET_HEDGING_ENABLED", False)
+    unhedged = run_virtual(track_p99())
+    monkeypatch.setattr(settings, "SHIPROCKET_HEDGING_ENABLED", True)
+    hedged = run_virtual(track_p99())
+
+    assert unhedged >= 0.08
+    assert hedged < 0.03
+
+
+@pytest.mark.asyncio
+async def test_hedge_budget_caps_extra_requests():
+    """With every call slow, hedges stay within the budget ratio."""
+    calls = 0
+
+    async def call() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.002)
+        return "ok"
+
+    hedger = Hedger(percentile=0.0, budget_ratio=0.05, min_samples=1)
+    for _ in range(200):
+        assert await hedger.run(call) == "ok"
+
+    assert calls <= 200 * 1.05 + 1
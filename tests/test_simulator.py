@@ -0,0 +1,76 @@
+"""Tests for the Shiprocket simulator and benchmark report comparison."""
+
+import random
+import httpx
+import pytest
+
+from app.services.shiprocket import ShiprocketService
+from benchmarks.compare import regressions
+from benchmarks.simulator import Latency, ShiprocketSimulator, SimulatorConfig, SimulatorServer
+
+
+def test_latency_follows_median_and_tail():
+    rng = random.Random(7)
+    latency = Latency(median_ms=100, p99_ms=1000)
+    samples = sorted(latency.sample(rng) for _ in range(20_000))
+    assert 0.09 < samples[10_000] < 0.11
+    assert 0.8 < samples[19_800] < 1.2
+    assert Latency().sample(rng) == 0.0
+
+
+async def test_service_round_trip_against_simulator():
+    """Order, lookup, AWB, label, pickup and tracking work end to end without credentials."""
+    simulator = ShiprocketSimulator(SimulatorConfig(track_steps=1, seed=1))
+    with SimulatorServer(simulator) as server:
+        service = ShiprocketService(base_url=server.url, email="e", password="p", name="simulator")
+        try:
+            couriers = await service.check_serviceability("560001", "110045", 0.7)
+            assert len(couriers) == 4 and couriers[0]["rate"] > 0
+
+            order = await service.create_order({"order_id": "SIM-1"})
+            assert await service.find_order("SIM-1") == {
+                "order_id": order["order_id"], "shipment_id": order["shipment_id"]
+            }
+            assert await service.find_order("SIM-0") is None
+            awb = await service.assign_awb(order["shipment_id"])
+            awb_code = awb["response"]["data"]["awb_code"]
+            assert (await service.generate_label([order["shipment_id"]]))["label_url"]
+            assert (await service.schedule_pickup([order["shipment_id"]]))["pickup_status"] == 1
+
+            first = await service.track_shipment(awb_code)
+            second = await service.track_shipment(awb_code)
+            assert first["tracking_data"]["shipment_status"] == "PICKED UP"
+            assert second["tracking_data"]["shipment_status"] == "IN TRANSIT"
+            assert len(second["tracking_data"]["shipment_track"]) == 3
+        finally:
+            await service.aclose()
+
+    assert simulator.requests[("create_order", 200)] == 1
+
+
+async def test_simulated_errors_and_rate_limits():
+    simulator = ShiprocketSimulator(SimulatorConfig(error_rate=1.0, rate_limit=3))
+    with SimulatorServer(simulator) as server:
+        service = ShiprocketService(base_url=server.url, email="e", password="p", name="simulator")
+        try:
+            with pytest.raises(httpx.HTTPStatusError) as error:
+                await service.create_order({"order_id": "SIM-2"})
+            assert error.value.response.status_code in (500, 502, 503)
+
+            statuses = set()
+            for _ in range(5):
+                try:
+                    await service.create_order({"order_id": "SIM-3"})
+                except httpx.HTTPStatusError as e:
+                    statuses.add(e.response.status_code)
+            assert 429 in statuses
+        finally:
+            await service.aclose()
+
+
+def test_compare_flags_regressions():
+    base = {"scenarios": {"orders.get": {"rps": 100, "p95_ms": 20, "db_queries_max": 1, "errors": 0}}}
+    same = {"scenarios": {"orders.get": {"rps": 95, "p95_ms": 21, "db_queries_max": 1, "errors": 0}}}
+    worse = {"scenarios": {"orders.get": {"rps": 70, "p95_ms": 20, "db_queries_max": 3, "errors": 0}}}
+    assert regressions(base, same, threshold=0.1) == []
+    assert len(regressions(base, worse, threshold=0.1)) == 2
@@ -0,0 +1,44 @@
+"""Tests for the soak test's resource accounting."""
+
+import os
+
+from benchmarks.soak import descriptor_counts, evaluate, rss_bytes
+
+LIMITS = {
+    "max_rss_growth_mb": 50,
+    "max_traced_growth_mb": 20,
+    "max_fd_growth": 10,
+    "max_socket_growth": 10,
+    "max_task_growth": 10,
+}
+
+
+def sample(**values):
+    base = {"rss_mb": 200, "traced_mb": 40, "fds": 30, "sockets": 12, "tasks": 5, "pool_checked_out": 0}
+    base.update(values)
+    return base
+
+
+def test_growth_within_limits_passes():
+    growth, failures = evaluate(sample(), sample(rss_mb=230, fds=35), LIMITS)
+    assert failures == []
+    assert growth["rss_mb"] == 30 and growth["fds"] == 5
+
+
+def test_leaks_and_held_connections_fail():
+    _, failures = evaluate(sample(), sample(sockets=40, traced_mb=75, pool_checked_out=2), LIMITS)
+    assert len(failures) == 3
+    assert any("sockets" in failure for failure in failures)
+
+
+def test_descriptor_counts_see_new_files():
+    fds, _ = descriptor_counts()
+    if fds is None:
+        return  # no /proc on this platform
+    read_end, write_end = os.pipe()
+    try:
+        assert descriptor_counts()[0] == fds + 2
+    finally:
+        os.close(read_end)
+        os.close(write_end)
+    assert rss_bytes() > 0
@@ -0,0 +1,93 @@
+"""Tests for the shipment status write-behind buffer."""
+
+import asyncio
+from contextvars import ContextVar
+from datetime import datetime
+
+from app.models.shipment import Shipment
+from app.services.status_buffer import ShipmentStatusBuffer
+
+
+class RecordingBuffer(ShipmentStatusBuffer):
+    """Buffer whose writes are recorded instead of sent to the database."""
+
+    def __init__(self, fail_times: int = 0, **kwargs):
+        super().__init__(session_factory=None, enabled=True, **kwargs)
+        self.fail_times = fail_times
+        self.batches = []
+
+    async def write(self, batch):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        self.batches.append({params["b_id"]: params["b_tracking_history"] for params in batch})
+
+
+def shipment(shipment_id: int) -> Shipment:
+    return Shipment(id=shipment_id, created_at=datetime(2026, 2, 1))
+
+
+async def test_updates_coalesce_per_shipment():
+    """Only the latest update per shipment is written, in one batch."""
+    buffer = RecordingBuffer(max_pending=100, flush_interval=0.05)
+    for version in range(3):
+        buffer.submit(shipment(1), "IN TRANSIT", [version])
+    buffer.submit(shipment(2), "IN TRANSIT", ["only"])
+
+    await asyncio.sleep(0.1)
+
+    assert buffer.batches == [{1: [2], 2: ["only"]}]
+
+
+async def test_flushes_when_full():
+    buffer = RecordingBuffer(max_pending=2, flush_interval=60)
+    buffer.submit(shipment(1), "IN TRANSIT", [1])
+    buffer.submit(shipment(2), "IN TRANSIT", [2])
+    await asyncio.sleep(0)
+
+    assert buffer.batches == [{1: [1], 2: [2]}]
+    assert len(buffer) == 0
+
+
+async def test_failed_flush_is_retried_without_losing_newer_updates():
+    buffer = RecordingBuffer(fail_times=1, max_pending=100, flush_interval=0.05)
+    buffer.submit(shipment(1), "IN TRANSIT", ["old"])
+    await asyncio.sleep(0.08)
+    assert buffer.batches == []
+
+    # Arrived after the failed flush: must win over the requeued update
+    buffer.submit(shipment(1), "IN TRANSIT", ["new"])
+    await buffer.drain()
+
+    assert buffer.batches == [{1: ["new"]}]
+
+
+async def test_discarded_updates_are_not_written():
+    buffer = RecordingBuffer(max_pending=100, flush_interval=60)
+    buffer.submit(shipment(1), "IN TRANSIT", ["stale"])
+    buffer.submit(shipment(2), "IN TRANSIT", ["kept"])
+    buffer.discard(1)
+
+    await buffer.drain()
+
+    assert buffer.batches == [{2: ["kept"]}]
+
+
+async def test_flushes_run_outside_the_submitting_request_context():
+    """A flush does not see context variables of the request that triggered it."""
+    request_id: ContextVar[str] = ContextVar("request_id", default="none")
+    seen = []
+
+    class ContextBuffer(RecordingBuffer):
+        async def write(self, batch):
+            seen.append(request_id.get())
+
+    buffer = ContextBuffer(max_pending=2, flush_interval=0.01)
+    request_id.set("request-1")
+    buffer.submit(shipment(1), "IN TRANSIT", [1])
+    await asyncio.sleep(0.05)
+    buffer.submit(shipment(2), "IN TRANSIT", [2])
+    buffer.submit(shipment(3), "IN TRANSIT", [3])
+    await asyncio.sleep(0)
+
+    assert seen == ["none", "none"]
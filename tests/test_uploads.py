@@ -0,0 +1,184 @@
+"""Order sheet parsing, validation and import tests."""
+
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app.models.fulfilment import FulfilmentBatch, FulfilmentItem
+from app.models.upload import UploadJob
+from app.services.prevalidation import OrderPrevalidator
+from app.services.uploads import (
+    OrderUploadProcessor,
+    UploadError,
+    file_extension,
+    iter_csv,
+    iter_orders,
+    read_chunk,
+)
+from tests.conftest import TestSessionLocal
+
+HEADER = (
+    "order_id,order_date,billing_customer_name,billing_city,billing_pincode,billing_state,"
+    "billing_phone,payment_method,weight,item_name,item_sku,item_units,item_selling_price\n"
+)
+
+
+def row(order_id, sku, phone="9999999999", units="1"):
+    return (
+        f"{order_id},2026-02-07,Rajarshi,Bangalore,560001,Karnataka,"
+        f"{phone},Prepaid,0.3,Cable,{sku},{units},299\n"
+    )
+
+
+def test_rows_are_grouped_into_orders(tmp_path):
+    """Consecutive rows with the same order_id become one order with several items."""
+    path = tmp_path / "orders.csv"
+    path.write_text(HEADER + row("ORD1", "A") + row("ORD1", "B") + row("ORD2", "C"))
+
+    valid, errors, rows = read_chunk(iter_orders(iter_csv(str(path))), size=10, tenant_id="acme")
+
+    assert errors == []
+    assert rows == 3
+    assert [(line, order.order_id) for line, order in valid] == [(2, "ORD1"), (4, "ORD2")]
+    assert [item.sku for item in valid[0][1].order_items] == ["A", "B"]
+    assert valid[0][1].tenant_id == "acme"
+
+
+def test_invalid_rows_are_reported_with_their_row(tmp_path):
+    """Validation errors name the sheet row, order and field."""
+    path = tmp_path / "orders.csv"
+    path.write_text(HEADER + row("ORD1", "A") + row("ORD2", "B", phone="123") + row("ORD3", "C", units="0"))
+
+    valid, errors, _ = read_chunk(iter_orders(iter_csv(str(path))), size=10)
+
+    assert [order.order_id for _, order in valid] == ["ORD1"]
+    assert [(error["row"], error["order_id"]) for error in errors] == [(3, "ORD2"), (4, "ORD3")]
+    assert errors[0]["errors"][0].startswith("billing_phone:")
+    assert errors[1]["errors"][0].startswith("order_items.0.units:")
+
+
+def test_chunks_are_bounded(tmp_path):
+    """Each chunk holds at most ``size`` orders and the stream resumes where it stopped."""
+    path = tmp_path / "orders.csv"
+    path.write_text(HEADER + "".join(row(f"ORD{i}", "A") for i in range(25)))
+    orders = iter_orders(iter_csv(str(path)))
+
+    sizes = []
+    while True:
+        valid, errors, rows = read_chunk(orders, size=10)
+        if not rows:
+            break
+        sizes.append(len(valid) + len(errors))
+
+    assert sizes == [10, 10, 5]
+
+
+def test_unsupported_file_type():
+    """Only CSV and XLSX uploads are accepted."""
+    with pytest.raises(UploadError):
+        file_extension("orders.pdf")
+
+
+class RecordingPipeline:
+    """Pipeline that records the items it is handed instead of fulfilling them."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.runs = []
+
+    async def run(self, item_ids):
+        self.runs.append(list(item_ids))
+        if self.fail:
+            raise RuntimeError("pipeline down")
+
+
+class FakeRegistry:
+    async def get(self, tenant_id=None):
+        return None
+
+
+def upload_processor(pipeline: RecordingPipeline) -> OrderUploadProcessor:
+    return OrderUploadProcessor(
+        pipeline=pipeline,
+        session_factory=TestSessionLocal,
+        chunk_size=2,
+        max_pending=1,
+        prevalidator=OrderPrevalidator(enabled=False),
+        accounts=FakeRegistry(),
+    )
+
+
+async def create_job() -> int:
+    async with TestSessionLocal() as db:
+        job = UploadJob(filename="orders.csv", status="pending", errors=[])
+        db.add(job)
+        await db.commit()
+        return job.id
+
+
+async def get_job(job_id: int) -> UploadJob:
+    async with TestSessionLocal() as db:
+        return await db.get(UploadJob, job_id)
+
+
+async def test_store_skips_existing_and_repeated_order_ids(setup_database, tmp_path):
+    """A chunk becomes one batch of new orders; known order IDs are reported per row."""
+    path = tmp_path / "orders.csv"
+    path.write_text(HEADER + row("STORE1", "A") + row("STORE2", "B") + row("STORE1", "C"))
+    valid, _, _ = read_chunk(iter_orders(iter_csv(str(path))), size=10)
+    processor = upload_processor(RecordingPipeline())
+    job_id = await create_job()
+
+    item_ids, duplicates = await processor._store(job_id, valid[:1], courier_id=None)
+    assert len(item_ids) == 1 and duplicates == []
+
+    item_ids, duplicates = await processor._store(job_id, valid, courier_id=7)
+    assert [error["row"] for error in duplicates] == [2, 4]
+    assert {error["order_id"] for error in duplicates} == {"STORE1"}
+    async with TestSessionLocal() as db:
+        result = await db.execute(
+            select(FulfilmentItem, FulfilmentBatch)
+            .join(FulfilmentBatch)
+            .where(FulfilmentItem.id.in_(item_ids))
+        )
+        [(item, batch)] = result.all()
+    assert item.payload["order_id"] == "STORE2" and item.stage == "create_order"
+    assert (batch.upload_job_id, batch.courier_id) == (job_id, 7)
+
+
+async def test_run_imports_in_chunks_and_completes(setup_database, tmp_path):
+    """Every chunk is stored and handed to the pipeline; progress adds up on the job."""
+    path = tmp_path / "orders.csv"
+    path.write_text(
+        HEADER + row("RUN1", "A") + row("RUN1", "B") + row("RUN2", "C", phone="123")
+        + row("RUN3", "D") + row("RUN1", "E")
+    )
+    pipeline = RecordingPipeline()
+    job_id = await create_job()
+
+    await upload_processor(pipeline).run(job_id, str(path))
+
+    job = await get_job(job_id)
+    assert job.status == "completed" and job.completed_at is not None
+    assert (job.rows_processed, job.orders_accepted, job.orders_rejected) == (5, 2, 2)
+    assert [(error["row"], error["order_id"]) for error in job.errors] == [
+        (4, "RUN2"), (6, "RUN1")
+    ]
+    assert list(map(len, pipeline.runs)) == [1, 1]
+    assert not os.path.exists(path)
+
+
+async def test_run_fails_the_job_when_the_pipeline_fails(setup_database, tmp_path):
+    """A failed pipeline run fails the job instead of completing it."""
+    path = tmp_path / "orders.csv"
+    path.write_text(HEADER + row("FAIL1", "A") + row("FAIL2", "B") + row("FAIL3", "C"))
+    pipeline = RecordingPipeline(fail=True)
+    job_id = await create_job()
+
+    await upload_processor(pipeline).run(job_id, str(path))
+
+    job = await get_job(job_id)
+    assert job.status == "failed" and job.error == "pipeline down"
+    assert len(pipeline.runs) == 1
+    assert not os.path.exists(path)